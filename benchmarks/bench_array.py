@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+Compare building a 64x64 patch array element by element with copy(), 
+paste(), and move() against create_array(), reporting COM call counts and 
+wall time.  A thinned variant removes a random quarter of the elements, and
+a last run has the duplicate calls return no names, as in older versions
+of HFSS.
+
+Usage::
+
+    python benchmarks/bench_array.py
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import timeit
+
+import numpy as np
+
+import hycohanz.modeler3d as hfssm3d
+
+from recording_editor import RecordingEditor
+
+COUNTS = (64, 64)
+PITCH = (2.0, 2.0)
+
+def loop_array(oEditor, patch, remove):
+    elements = {(0, 0): patch}
+    for i in range(COUNTS[0]):
+        for j in range(COUNTS[1]):
+            if (i, j) == (0, 0):
+                continue
+            hfssm3d.copy(oEditor, [patch])
+            pastelist = hfssm3d.paste(oEditor)
+            hfssm3d.move(oEditor, pastelist, i*PITCH[0], j*PITCH[1], 0)
+            elements[(i, j)] = pastelist[0]
+    for index in zip(*np.nonzero(remove)):
+        hfssm3d.delete(oEditor, [elements.pop(index)])
+    return elements
+
+def native_array(oEditor, patch, remove):
+    return hfssm3d.create_array(oEditor, patch, COUNTS, PITCH, Remove=remove)
+
+def run(label, func, remove, ReturnClones=True):
+    oEditor = RecordingEditor(ReturnClones)
+    patch = hfssm3d.create_rectangle(oEditor, 0, 0, 0, 1, 1, Name='Patch')
+    t0 = timeit.default_timer()
+    elements = func(oEditor, patch, remove)
+    elapsed = timeit.default_timer() - t0
+    assert len(elements) == remove.size - remove.sum()
+    print('{0:<28} {1:>8} {2:>10.3f}'.format(label, len(oEditor.calls) - 1, elapsed))
+
+if __name__ == '__main__':
+    full = np.zeros(COUNTS, dtype=bool)
+    thinned = np.random.RandomState(0).rand(*COUNTS) < 0.25
+    thinned[0, 0] = False
+
+    print('{0:<28} {1:>8} {2:>10}'.format('64x64 array', 'calls', 'seconds'))
+    run('copy/paste/move', loop_array, full)
+    run('create_array', native_array, full)
+    run('copy/paste/move, thinned', loop_array, thinned)
+    run('create_array, thinned', native_array, thinned)
+    run('create_array, no names', native_array, full, ReturnClones=False)
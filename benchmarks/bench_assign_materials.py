@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Assign one of a dozen materials to each of many parts with one
+assign_material() call per part, and with assign_materials(), by explicit
+mapping and by wildcard rules, reporting editor call counts and wall time.
+
+Usage::
+
+    python benchmarks/bench_assign_materials.py [parts]
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import sys
+import timeit
+
+import hycohanz.modeler3d as hfssm3d
+
+from recording_editor import RecordingEditor
+
+MATERIALS = [("copper", False), ("FR4_epoxy", True), ("Rogers RO4003 (tm)", True),
+             ("vacuum", True), ("aluminum", False), ("silver", False),
+             ("pec", False), ("air", True), ("polyimide", True),
+             ("alumina_96pct", True), ("gold", False), ("solder", False)]
+
+def setup(nparts):
+    oEditor = RecordingEditor()
+    parts = [hfssm3d.create_box(oEditor, n, 0, 0, 1, 1, 1,
+                                Name="Layer{0}_Box".format(n % len(MATERIALS)))
+             for n in range(nparts)]
+    oEditor.calls = []
+    return oEditor, parts
+
+def main(nparts=10000):
+    mapping = None
+    for method in ('assign_material', 'assign_materials', 'assign_materials rules'):
+        oEditor, parts = setup(nparts)
+        mapping = dict((part, MATERIALS[n % len(MATERIALS)]) for n, part in enumerate(parts))
+
+        t0 = timeit.default_timer()
+        if method == 'assign_material':
+            for part, (material, solveinside) in mapping.items():
+                hfssm3d.assign_material(oEditor, [part], material, solveinside)
+        elif method == 'assign_materials':
+            hfssm3d.assign_materials(oEditor, mapping)
+        else:
+            oEditor.GetMatchedObjectName = lambda name_filter: parts
+            hfssm3d.assign_materials(oEditor, rules=[("Layer{0}_*".format(n), material)
+                                                     for n, material in enumerate(MATERIALS)])
+        elapsed = timeit.default_timer() - t0
+
+        print('{0:<24} {1:>6} editor calls, {2:.3f} s'.format(
+            method, len(oEditor.calls), elapsed))
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
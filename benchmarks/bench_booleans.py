@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+Compare subtracting via holes from a board one at a time with subtract() 
+against a BooleanPlan, reporting modeler operation counts and wall time.
+
+Usage::
+
+    python benchmarks/bench_booleans.py
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import timeit
+
+import hycohanz.modeler3d as hfssm3d
+from hycohanz.booleanplan import BooleanPlan
+
+from recording_editor import RecordingEditor
+
+NVIAS = 500
+
+def one_at_a_time(oEditor, board, vias, traces):
+    for via in vias:
+        hfssm3d.subtract(oEditor, [board], [via])
+    for trace in traces[1:]:
+        hfssm3d.unite(oEditor, [traces[0], trace])
+
+def planned(oEditor, board, vias, traces, FanIn=None):
+    plan = BooleanPlan(FanIn=FanIn)
+    for via in vias:
+        plan.subtract(board, via)
+    for trace in traces[1:]:
+        plan.unite([traces[0], trace])
+    plan.execute(oEditor)
+    return plan.report()
+
+def run(label, func, **kwargs):
+    oEditor = RecordingEditor()
+    board = hfssm3d.create_box(oEditor, 0, 0, 0, 100, 100, 1, Name='Board')
+    vias = [hfssm3d.create_cylinder(oEditor, 0.2*n, 50, 0, 0.05, 1, Name='Via') 
+            for n in range(NVIAS)]
+    traces = [hfssm3d.create_box(oEditor, 0, 2*n, 1, 100, 1, 0.1, Name='Trace') 
+              for n in range(50)]
+    ncreated = len(oEditor.calls)
+    t0 = timeit.default_timer()
+    func(oEditor, board, vias, traces, **kwargs)
+    elapsed = timeit.default_timer() - t0
+    print('{0:<28} {1:>8} {2:>10.4f}'.format(label, len(oEditor.calls) - ncreated, elapsed))
+
+if __name__ == '__main__':
+    print('{0:<28} {1:>8} {2:>10}'.format('500 vias, 50 traces', 'ops', 'seconds'))
+    run('one at a time', one_at_a_time)
+    run('BooleanPlan', planned)
+    run('BooleanPlan, FanIn=8', planned, FanIn=8)
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+Compare a loop over create_box() with create_boxes() for a regular array 
+of boxes and for randomly placed boxes, reporting COM call counts and wall 
+time.
+
+Usage::
+
+    python benchmarks/bench_bulk_create.py
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import timeit
+
+import numpy as np
+
+import hycohanz.modeler3d as hfssm3d
+
+from recording_editor import RecordingEditor
+
+def grid_positions(count, pitch=2.0):
+    ncols = int(np.ceil(np.sqrt(count)))
+    i = np.arange(count)
+    return np.column_stack([(i % ncols) * pitch, (i // ncols) * pitch, np.zeros(count)])
+
+def loop_create(oEditor, positions, size):
+    return [hfssm3d.create_box(oEditor, x, y, z, size[0], size[1], size[2]) 
+            for x, y, z in positions.tolist()]
+
+def bulk_create(oEditor, positions, size):
+    return hfssm3d.create_boxes(oEditor, positions, size)
+
+def run(label, func, positions, size):
+    oEditor = RecordingEditor()
+    t0 = timeit.default_timer()
+    names = func(oEditor, positions, size)
+    elapsed = timeit.default_timer() - t0
+    assert len(names) == len(positions)
+    print('{0:<28} {1:>8} {2:>10.3f}'.format(label, len(oEditor.calls), elapsed))
+
+if __name__ == '__main__':
+    size = (1.0, 1.0, 0.1)
+    rng = np.random.RandomState(0)
+    
+    print('{0:<28} {1:>8} {2:>10}'.format('case', 'calls', 'seconds'))
+    for count in (1000, 10000, 50000):
+        grid = grid_positions(count)
+        scattered = rng.uniform(0, 100, size=(count, 3))
+        
+        run('grid {0} create_box'.format(count), loop_create, grid, size)
+        run('grid {0} create_boxes'.format(count), bulk_create, grid, size)
+        run('random {0} create_box'.format(count), loop_create, scattered, size)
+        run('random {0} create_boxes'.format(count), bulk_create, scattered, size)
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+Build a parametric array of boxes through a DependencyGraph on the fake
+HFSS, reporting the scanning overhead, and the number of face lookups
+needed to re-query the model after changing one variable, with and without
+the graph.
+
+Usage::
+
+    python benchmarks/bench_dependency.py [boxes] [variables]
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import sys
+import timeit
+
+import hycohanz as hfss
+
+def build(nboxes, nvariables, graph):
+    fake = hfss.FakeHfss()
+    [oAnsoftApp, oDesktop] = hfss.setup_interface(fake=fake)
+    oProject = hfss.new_project(oDesktop)
+    oDesign = hfss.insert_design(oProject, "HFSSDesign1", "DrivenModal")
+    oEditor = hfss.TopologyCache(hfss.set_active_editor(oDesign))
+    if graph:
+        oEditor = hfss.DependencyGraph(oEditor, oDesign, oProject)
+        oDesign = oEditor.design
+
+    for n in range(nvariables):
+        hfss.add_property(oDesign, "h{0}".format(n), "1mm")
+
+    t0 = timeit.default_timer()
+    boxes = [hfss.create_box(oEditor, 2*n, 0, 0, 1, 1, "h{0}".format(n % nvariables))
+             for n in range(nboxes)]
+    return oEditor, oDesign, boxes, timeit.default_timer() - t0
+
+def main(nboxes=10000, nvariables=100):
+    for graph in (False, True):
+        oEditor, oDesign, boxes, elapsed = build(nboxes, nvariables, graph)
+        oDesign.SetVariableValue("h0", "2mm")
+        requery = len(oEditor.stale) if graph else len(boxes)
+        print('{0:<10} create {1:7.3f} s, {2:>6} boxes to re-query after changing h0'.format(
+            'graph' if graph else 'no graph', elapsed, requery))
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
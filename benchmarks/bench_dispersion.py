@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+Fit the dispersive models to noisy synthetic measurements of many
+laminates from 1 to 110 GHz, reporting the fitting time, the fit errors,
+and the length of the emitted material expressions.
+
+Usage::
+
+    python benchmarks/bench_dispersion.py [materials] [frequencies]
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import sys
+import timeit
+
+import numpy as np
+
+import hycohanz as hfss
+
+def measurements(nmaterials, nfrequencies, seed=0):
+    """
+    Return Djordjevic-Sarkar laminates with 0.2% noise on the permittivity
+    and 1% on the loss tangent.
+    """
+    rng = np.random.RandomState(seed)
+    freq = np.logspace(9, np.log10(110e9), nfrequencies)
+    eps_inf = rng.uniform(2.5, 4.5, nmaterials)[:, None]
+    delta = rng.uniform(0.05, 0.5, nmaterials)[:, None]
+    eps = eps_inf + delta*np.log10((1e13 + 1j*freq)/(1e3 + 1j*freq))/10
+    noise = rng.standard_normal((2, nmaterials, nfrequencies))
+    return (freq,
+            eps.real*(1 + 0.002*noise[0]),
+            -eps.imag/eps.real*(1 + 0.01*noise[1]))
+
+def main(nmaterials=500, nfrequencies=100):
+    freq, permittivity, loss_tangent = measurements(nmaterials, nfrequencies)
+    names = ["Laminate{0}".format(n) for n in range(nmaterials)]
+
+    print('{0} materials at {1} frequencies'.format(nmaterials, nfrequencies))
+    for fitter in (hfss.fit_debye, hfss.fit_multipole_debye, hfss.fit_djordjevic_sarkar):
+        t0 = timeit.default_timer()
+        fit = fitter(freq, permittivity, loss_tangent)
+        elapsed = timeit.default_timer() - t0
+
+        materials = fit.materials(names)
+        length = np.mean([len(material['rel_permittivity']) + len(material['diel_loss_tan'])
+                          for material in materials])
+        print('{0:<24} {1:7.3f} s, RMS error median {2:.2e} worst {3:.2e}, '
+              'loss tangent error {4:.1e}, {5:.0f} chars per material'.format(
+                  fitter.__name__, elapsed, np.median(fit.rms_error), np.max(fit.rms_error),
+                  np.median(fit.max_loss_tangent_error), length))
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
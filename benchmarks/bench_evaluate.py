@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Evaluate a geometry Expression over a 10^4-point design-of-experiments
+grid, once vectorized over NumPy arrays and once point by point, reporting
+the compile time and the evaluation rate.
+
+Usage::
+
+    python benchmarks/bench_evaluate.py [points]
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import sys
+import timeit
+
+import numpy as np
+
+from hycohanz.expression import (Expression,
+                                 cos,
+                                 sqrt)
+
+def airbox():
+    """
+    The side of an airbox a quarter wavelength clear of a tilted patch.
+    """
+    w = Expression('w')
+    l = Expression('l')
+    tilt = Expression('tilt')
+    clearance = 3e8/(4*Expression('f')*sqrt(Expression('er')))
+    return (w*cos(tilt) + l + 2*clearance + '2mm')
+
+def main(points=10000):
+    n = int(round(np.sqrt(points)))
+    w, f = np.meshgrid(np.linspace(1e-3, 5e-3, n), np.linspace(1e9, 10e9, n))
+    variables = {'w': w.ravel(), 'f': f.ravel(), 'l': '10mm', 'tilt': '15deg', 'er': 4.4}
+
+    e = airbox()
+    print(e.expr)
+
+    t0 = timeit.default_timer()
+    evaluate = e.compile()
+    t1 = timeit.default_timer()
+    vectorized = evaluate(variables)
+    t2 = timeit.default_timer()
+    looped = np.array([evaluate(dict(variables, w=wi, f=fi))
+                       for wi, fi in zip(variables['w'], variables['f'])])
+    t3 = timeit.default_timer()
+
+    assert np.allclose(vectorized, looped)
+    print('{0} points, compile {1:.4f} s'.format(len(vectorized), t1 - t0))
+    print('  vectorized {0:9.4f} s {1:12.0f} points/s'.format(t2 - t1, len(vectorized)/(t2 - t1)))
+    print('  per point  {0:9.4f} s {1:12.0f} points/s'.format(t3 - t2, len(vectorized)/(t3 - t2)))
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Build and render Expressions of 10^4 nodes, comparing the AST Expression
+with the previous string-concatenating implementation, and reporting the
+time to build, the time to render, the length of the rendered string, and
+its maximum parenthesis nesting depth.
+
+Usage::
+
+    python benchmarks/bench_expression.py [nodes]
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import sys
+import timeit
+
+from hycohanz.expression import Expression
+
+class LegacyExpression(object):
+    """
+    The previous Expression, which wrapped the left operand of every
+    operation in parentheses.
+    """
+    def __init__(self, expr):
+        if isinstance(expr, LegacyExpression):
+            self.expr = expr.expr
+        else:
+            self.expr = str(expr)
+
+    def _op(self, op, y):
+        if isinstance(y, LegacyExpression):
+            y = y.expr
+        return LegacyExpression('(' + self.expr + ') ' + op + ' ' + str(y))
+
+    def __add__(self, y):
+        return self._op('+', y)
+
+    def __sub__(self, y):
+        return self._op('-', y)
+
+    def __mul__(self, y):
+        return self._op('*', y)
+
+    def __truediv__(self, y):
+        return self._op('/', y)
+
+    def __neg__(self):
+        return LegacyExpression('-(' + self.expr + ')')
+
+def chain(cls, nodes):
+    """
+    A parametric layout: a running position built from many offsets.
+    """
+    pitch = cls('pitch')
+    gap = cls('gap')
+    e = cls('x0')
+    for n in range(nodes//4):
+        e = e + pitch*2 - gap/2
+    return e
+
+def balanced(cls, nodes):
+    """
+    A sum of products, built pairwise.
+    """
+    terms = [cls('w{0}'.format(n))*cls('l{0}'.format(n)) for n in range(nodes//2)]
+    while len(terms) > 1:
+        terms = [terms[n] + terms[n + 1] if n + 1 < len(terms) else terms[n]
+                 for n in range(0, len(terms), 2)]
+    return terms[0]
+
+def depth(text):
+    level = deepest = 0
+    for c in text:
+        if c == '(':
+            level += 1
+            deepest = max(deepest, level)
+        elif c == ')':
+            level -= 1
+    return deepest
+
+def run(label, func, cls, nodes):
+    t0 = timeit.default_timer()
+    e = func(cls, nodes)
+    t1 = timeit.default_timer()
+    text = e.expr
+    t2 = timeit.default_timer()
+    print('{0:<24} build {1:8.4f} s  render {2:8.4f} s  {3:>8} chars  depth {4:>5}'.format(
+        label, t1 - t0, t2 - t1, len(text), depth(text)))
+
+def main(nodes=10000):
+    for name, func in (('chain', chain), ('balanced', balanced)):
+        run(name + ' legacy', func, LegacyExpression, nodes)
+        run(name + ' AST', func, Expression, nodes)
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Build a parametric patch array with repeated offset and thickness
+expressions, with and without a SubexpressionHoister, and report the total
+length of the string arguments sent (a stand-in for the size of the model
+history in the project file), and the time to regenerate the model on a
+stand-in: parsing and evaluating each variable once, in order, and then
+every expression argument, as HFSS does when it replays the history.
+
+Usage::
+
+    python benchmarks/bench_hoist.py [cells]
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import sys
+import timeit
+
+import hycohanz as hfss
+import hycohanz.expression
+from recording_editor import RecordingEditor
+
+VARIABLES = [("cell_w", "12mm"),
+             ("gap", "0.5mm"),
+             ("patch_w", "7.2mm"),
+             ("patch_l", "5.9mm"),
+             ("substrate_h", "0.787mm"),
+             ("copper_t", "35um"),
+             ("via_r", "0.2mm")]
+
+def build(ncells, hoist):
+    [oAnsoftApp, oDesktop] = hfss.setup_interface(fake=hfss.FakeHfss())
+    oProject = hfss.new_project(oDesktop)
+    oDesign = hfss.insert_design(oProject, "HFSSDesign1", "DrivenModal")
+    for name, value in VARIABLES:
+        hfss.add_property(oDesign, name, value)
+
+    recorder = oEditor = RecordingEditor()
+    if hoist:
+        oEditor = hfss.SubexpressionHoister(oEditor, oDesign)
+
+    side = int(ncells**0.5)
+    t0 = timeit.default_timer()
+    for n in range(ncells):
+        x = "{0}*(cell_w + gap)".format(n % side)
+        y = "{0}*(cell_w + gap)".format(n // side)
+        hfss.create_box(oEditor, x, y, 0, "cell_w", "cell_w", "substrate_h")
+        hfss.create_box(oEditor,
+                        "{0} + (cell_w - patch_w)/2".format(x),
+                        "{0} + (cell_w - patch_l)/2".format(y),
+                        "substrate_h",
+                        "patch_w", "patch_l", "copper_t")
+        hfss.create_cylinder(oEditor,
+                             "{0} + cell_w/2".format(x),
+                             "{0} + (cell_w - patch_l)/2 + patch_l/4".format(y),
+                             "-copper_t", "via_r", "substrate_h + 2*copper_t")
+    elapsed = timeit.default_timer() - t0
+
+    variables = list(VARIABLES)
+    if hoist:
+        variables.extend(oEditor.variables.items())
+    return recorder, variables, elapsed
+
+def _strings(args, found):
+    for arg in args:
+        if isinstance(arg, (list, tuple)):
+            _strings(arg, found)
+        elif isinstance(arg, str) and not arg.endswith(':=') and not arg.startswith('NAME:'):
+            found.append(arg)
+    return found
+
+def regenerate(recorder, variables):
+    """
+    Parse and evaluate the variables and the numeric arguments of the
+    recorded calls from scratch, returning the elapsed time.
+    """
+    hycohanz.expression._COMPILED.clear()
+    arguments = []
+    for method, args in recorder.calls:
+        for text in _strings(args, []):
+            try:
+                hfss.parse_expression(text)
+            except hfss.ExpressionSyntaxError:
+                continue
+            arguments.append(text)
+
+    t0 = timeit.default_timer()
+    values = {}
+    for name, value in variables:
+        values[name] = hfss.parse_expression(value).evaluate(values)
+    for text in arguments:
+        try:
+            hfss.parse_expression(text).evaluate(values)
+        except (KeyError, ValueError):
+            pass
+    return timeit.default_timer() - t0
+
+def main(ncells=2500):
+    results = {}
+    for hoist in (False, True):
+        recorder, variables, elapsed = build(ncells, hoist)
+        size = sum(len(text) for method, args in recorder.calls for text in _strings(args, []))
+        size += sum(len(name) + len(value) for name, value in variables)
+        regen = regenerate(recorder, variables)
+        results[hoist] = (size, regen)
+        print('{0:<10} {1:>6} variables, {2:>9} chars of arguments, '
+              'build {3:.3f} s, regenerate {4:.3f} s'.format(
+                  'hoisted' if hoist else 'as written', len(variables), size, elapsed, regen))
+
+    (size0, regen0), (size1, regen1) = results[False], results[True]
+    print('size {0:+.1%}, regeneration {1:+.1%}'.format(size1/size0 - 1, regen1/regen0 - 1))
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Import a material library into a project on the fake HFSS, checking each
+material with DoesMaterialExist before adding it, as add_material() used
+to, with add_material(), and with add_materials() from a CSV file,
+reporting COM call counts and wall time.  Each is run with the fake's usual
+COM objects, and with unhashable pywin32-like wrappers, a new one for each
+project fetched.
+
+Usage::
+
+    python benchmarks/bench_materials.py [materials]
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import csv
+import io
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+import warnings
+
+import hycohanz as hfss
+
+def write_library(path, nmaterials):
+    with io.open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "permittivity", "dielectric_loss_tangent", "conductivity"])
+        writer.writerow(["copper", 1, "", 5.8e7])
+        for n in range(nmaterials):
+            writer.writerow(["Laminate{0}".format(n), 2 + n/100, 0.001*(n % 20), ""])
+
+def main(nmaterials=400):
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'library.csv')
+        write_library(path, nmaterials)
+
+        methods = ('check then add', 'add_material', 'add_materials')
+        for dispatch, method in itertools.product((False, True), methods):
+            fake = hfss.FakeHfss(dispatch=dispatch)
+            [oAnsoftApp, oDesktop] = hfss.setup_interface(fake=fake)
+            oProject = hfss.new_project(oDesktop)
+
+            ncalls = fake.ncalls
+            t0 = timeit.default_timer()
+            if method == 'add_materials':
+                report = hfss.add_materials(oProject, path)
+                created = len(report['created'])
+            else:
+                created = 0
+                with io.open(path, encoding='utf-8', newline='') as f:
+                    for record in csv.DictReader(f):
+                        if method == 'add_material':
+                            with warnings.catch_warnings():
+                                warnings.simplefilter('ignore')
+                                result = hfss.add_material(
+                                    oDesktop, record["name"], float(record["permittivity"]))
+                            created += not result.endswith('No material was created')
+                            continue
+                        oProject = oDesktop.GetActiveProject()
+                        if not hfss.does_material_exist(oProject, record["name"]):
+                            oProject.GetDefinitionManager().AddMaterial(
+                                ["NAME:" + record["name"],
+                                 "permittivity:=", float(record["permittivity"])])
+                            created += 1
+            elapsed = timeit.default_timer() - t0
+
+            print('{0:<16} {1:<9} {2:>4} created, {3:>5} COM calls, {4:.3f} s'.format(
+                method, 'dispatch' if dispatch else '', created,
+                fake.ncalls - ncalls, elapsed))
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+Assign a perfect E boundary to each face of many boxes on the fake HFSS,
+with the module handle cache disabled and enabled, reporting COM call
+counts and wall time for the assignments.  Each is run with the fake's
+usual COM objects, and with unhashable pywin32-like wrappers, a new one for
+each design fetched.
+
+Usage::
+
+    python benchmarks/bench_modules.py [boundaries]
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import itertools
+import sys
+import timeit
+
+import hycohanz as hfss
+
+def main(nboundaries=2000):
+    for dispatch, cached in itertools.product((False, True), (False, True)):
+        hfss.enable_module_cache(cached)
+        fake = hfss.FakeHfss(dispatch=dispatch)
+        [oAnsoftApp, oDesktop] = hfss.setup_interface(fake=fake)
+        oProject = hfss.new_project(oDesktop)
+        oDesign = hfss.insert_design(oProject, "HFSSDesign1", "DrivenModal")
+        oEditor = hfss.set_active_editor(oDesign)
+        boxes = [hfss.create_box(oEditor, 2*n, 0, 0, 1, 1, 1) for n in range(nboundaries)]
+        faces = [hfss.get_face_by_position(oEditor, box, 2*n + 0.5, 0.5, 1)
+                 for n, box in enumerate(boxes)]
+
+        ncalls = fake.ncalls
+        t0 = timeit.default_timer()
+        for n, face in enumerate(faces):
+            if n % 100 == 0:
+                oDesign = oProject.GetActiveDesign()
+            hfss.assign_perfect_e(oDesign, "PerfE{0}".format(n), [face])
+        elapsed = timeit.default_timer() - t0
+
+        print('{0:<10} {1:<9} {2:>6} COM calls, {3:.3f} s'.format(
+            'cached' if cached else 'uncached', 'dispatch' if dispatch else '',
+            fake.ncalls - ncalls, elapsed))
+    hfss.enable_module_cache(True)
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+Parse the values of a large synthetic set of project variables, as read
+back from HFSS, reporting the parse rate, and checking that rendering and
+reparsing each result reproduces it.
+
+Usage::
+
+    python benchmarks/bench_parse.py [variables]
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import random
+import sys
+import timeit
+
+from hycohanz.expression import parse_expression
+
+TEMPLATES = ['{a}mm',
+             '{b}GHz',
+             'w{i}',
+             '$pitch*{a} + {b}mm',
+             'w{i}/2 - gap',
+             '(l{i} + 2*gap)*sqrt(er)',
+             'sin(theta{i}*1deg)^2 + cos(theta{i}*1deg)^2',
+             '-(x{i} - x{j})/($scale*{a})',
+             'max(w{i}, w{j}, {a}mil) + atan2(y{i}, x{i})*r']
+
+def variables(count, seed=0):
+    rng = random.Random(seed)
+    return [rng.choice(TEMPLATES).format(a=rng.randint(1, 99), b=rng.random(),
+                                         i=rng.randint(0, count), j=rng.randint(0, count))
+            for n in range(count)]
+
+def main(count=50000):
+    texts = variables(count)
+
+    t0 = timeit.default_timer()
+    expressions = [parse_expression(text) for text in texts]
+    t1 = timeit.default_timer()
+    rendered = [expression.expr for expression in expressions]
+    t2 = timeit.default_timer()
+
+    assert [parse_expression(text).expr for text in rendered] == rendered
+    print('{0} variables, {1:.1f} characters on average'.format(
+        count, sum(len(text) for text in texts)/count))
+    print('  parse  {0:8.3f} s {1:10.0f} variables/s'.format(t1 - t0, count/(t1 - t0)))
+    print('  render {0:8.3f} s {1:10.0f} variables/s'.format(t2 - t1, count/(t2 - t1)))
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
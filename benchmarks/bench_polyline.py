@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Compare create_polyline() with create_polyline_array() for large board 
+outlines, reporting wall time and peak Python memory.
+
+Usage::
+
+    python benchmarks/bench_polyline.py
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import timeit
+import tracemalloc
+
+import numpy as np
+
+import hycohanz.modeler3d as hfssm3d
+
+from recording_editor import RecordingEditor
+
+def outline(count):
+    t = np.linspace(0, 2*np.pi, count, endpoint=False)
+    r = 0.05 + 0.01*np.sin(40*t)
+    return np.column_stack([r*np.cos(t), r*np.sin(t), np.zeros(count)])
+
+def per_point(oEditor, points):
+    return hfssm3d.create_polyline(oEditor, 
+                                   points[:, 0].tolist(), 
+                                   points[:, 1].tolist(), 
+                                   points[:, 2].tolist())
+
+def array_path(oEditor, points):
+    return hfssm3d.create_polyline_array(oEditor, points)
+
+def run(label, func, points):
+    oEditor = RecordingEditor()
+    tracemalloc.start()
+    t0 = timeit.default_timer()
+    func(oEditor, points)
+    elapsed = timeit.default_timer() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    
+    # Time again without tracemalloc, which slows down allocation.
+    t0 = timeit.default_timer()
+    func(RecordingEditor(), points)
+    elapsed = timeit.default_timer() - t0
+    
+    print('{0:<28} {1:>10.3f} {2:>12.1f}'.format(label, elapsed, peak/2**20))
+
+if __name__ == '__main__':
+    print('{0:<28} {1:>10} {2:>12}'.format('case', 'seconds', 'peak MiB'))
+    for count in (20000, 200000):
+        points = outline(count)
+        run('{0} create_polyline'.format(count), per_point, points)
+        run('{0} create_polyline_array'.format(count), array_path, points)
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+Define the local variables of a parametric template on the fake HFSS with
+one add_property() call per variable, and with add_properties(), reporting
+COM call counts and wall time.
+
+Usage::
+
+    python benchmarks/bench_properties.py [variables] [chunksize]
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import sys
+import timeit
+
+import hycohanz as hfss
+
+def template(nvariables):
+    variables = [("w0", "1mm")]
+    for n in range(1, nvariables):
+        variables.append(("w{0}".format(n), "w{0} + 0.1mm".format(n - 1)))
+    return variables
+
+def main(nvariables=2000, chunksize=500):
+    variables = template(nvariables)
+    for bulk in (False, True):
+        fake = hfss.FakeHfss()
+        [oAnsoftApp, oDesktop] = hfss.setup_interface(fake=fake)
+        oProject = hfss.new_project(oDesktop)
+        oDesign = hfss.insert_design(oProject, "HFSSDesign1", "DrivenModal")
+
+        ncalls = fake.ncalls
+        t0 = timeit.default_timer()
+        if bulk:
+            failures = hfss.add_properties(oDesign, variables, ChunkSize=chunksize)
+            assert not failures
+        else:
+            for name, value in variables:
+                hfss.add_property(oDesign, name, value)
+        elapsed = timeit.default_timer() - t0
+
+        print('{0:<16} {1:>6} COM calls, {2:.3f} s'.format(
+            'add_properties' if bulk else 'add_property', fake.ncalls - ncalls, elapsed))
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+Time writing an HFSS script for a board with many via holes using 
+ScriptWriter, reporting the number of API calls written, the script size, 
+and wall time.
+
+Usage::
+
+    python benchmarks/bench_scriptwriter.py
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import timeit
+
+import hycohanz.design as hfssdesign
+import hycohanz.desktop as hfssdesktop
+import hycohanz.modeler3d as hfssm3d
+import hycohanz.project as hfssproject
+from hycohanz.scriptwriter import ScriptWriter
+
+NVIAS = 50000
+
+def build(script):
+    [oAnsoftApp, oDesktop] = script.setup_interface()
+    oProject = hfssdesktop.new_project(oDesktop)
+    oDesign = hfssproject.insert_design(oProject, "HFSSDesign1", "DrivenModal")
+    oEditor = hfssdesign.set_active_editor(oDesign)
+    board = hfssm3d.create_box(oEditor, 0, 0, 0, 500, 500, 1, Name='Board')
+    vias = [hfssm3d.create_cylinder(oEditor, n % 250, n // 250, 0, 0.1, 1, Name='Via')
+            for n in range(NVIAS)]
+    hfssm3d.subtract(oEditor, [board], vias)
+
+if __name__ == '__main__':
+    script = ScriptWriter()
+    t0 = timeit.default_timer()
+    build(script)
+    elapsed = timeit.default_timer() - t0
+    print('{0} vias: {1} calls, {2:.1f} MB of script in {3:.3f} s'.format(
+        NVIAS, script.calls, len(script.getvalue())/1e6, elapsed))
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Read the values of the variables of a design and its project on the fake
+HFSS once per logged solve, with GetVariableValue calls and through a
+VariableSnapshot, reporting COM call counts and wall time, and time diffing
+the snapshots of successive variations.
+
+Usage::
+
+    python benchmarks/bench_snapshot.py [variables] [solves]
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import sys
+import timeit
+
+import hycohanz as hfss
+
+def setup(nvariables):
+    fake = hfss.FakeHfss()
+    [oAnsoftApp, oDesktop] = hfss.setup_interface(fake=fake)
+    oProject = hfss.new_project(oDesktop)
+    oDesign = hfss.insert_design(oProject, "HFSSDesign1", "DrivenModal")
+    hfss.add_properties(oDesign,
+                        [("$p{0}".format(n), "{0}mm".format(n)) for n in range(nvariables//10)] +
+                        [("x{0}".format(n), "{0}mm".format(n)) for n in range(nvariables)],
+                        oProject)
+    return fake, oProject, oDesign
+
+def main(nvariables=1000, nsolves=100):
+    for snapshots in (False, True):
+        fake, oProject, oDesign = setup(nvariables)
+        store = hfss.VariableStore(oProject, oDesign)
+
+        ncalls = fake.ncalls
+        t0 = timeit.default_timer()
+        snapshot = hfss.VariableSnapshot(oDesign, oProject)
+        for solve in range(nsolves):
+            store.update({"x{0}".format(solve % nvariables): "{0}mm".format(solve)})
+            if snapshots:
+                log = snapshot.variation()
+            else:
+                log = ' '.join("{0}='{1}'".format(name, server.GetVariableValue(name))
+                               for server in (oProject, oDesign)
+                               for name in server.GetVariables())
+        elapsed = timeit.default_timer() - t0
+        print('{0:<16} {1:>7} COM calls, {2:.3f} s'.format(
+            'VariableSnapshot' if snapshots else 'GetVariableValue',
+            fake.ncalls - ncalls, elapsed))
+
+    # The snapshot refetches after each write; lookups between writes are
+    # local, and diffs of successive variations are array comparisons.
+    before = snapshot.copy()
+    store.update({"x0": "0.5mm"})
+    after = snapshot.copy()
+    ndiffs = 1000
+    t0 = timeit.default_timer()
+    for n in range(ndiffs):
+        diff = after.diff(before)
+    elapsed = timeit.default_timer() - t0
+    print('diff of {0} variables: {1:.1f} us, {2}'.format(
+        len(after), 1e6*elapsed/ndiffs, diff['changed']))
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
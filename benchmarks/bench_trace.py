@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+Record a large run against the fake HFSS to a trace, plain and
+gzip-compressed, and replay it, reporting the trace size, the recording and
+replay rates, and the peak Python memory of the replay.  (The memory of the
+recording is dominated by the fake's object store.)
+
+Usage::
+
+    python benchmarks/bench_trace.py [ncalls]
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import os
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+import hycohanz as hfss
+
+def work(oDesktop, nboxes):
+    oProject = hfss.new_project(oDesktop)
+    oDesign = hfss.insert_design(oProject, "HFSSDesign1", "DrivenModal")
+    oEditor = hfss.set_active_editor(oDesign, "3D Modeler")
+    for n in range(nboxes):
+        box = hfss.create_box(oEditor, 2*n, 0, 0, 1, 1, 1)
+        hfss.get_face_by_position(oEditor, box, 2*n + 0.5, 0.5, 1)
+
+def run(label, func):
+    t0 = timeit.default_timer()
+    calls = func()
+    elapsed = timeit.default_timer() - t0
+    print('{0:<24} {1:>9} calls {2:>8.2f} s {3:>10.0f} calls/s'.format(
+        label, calls, elapsed, calls/elapsed))
+
+def peak(label, func):
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print('{0:<24} {1:>8.1f} MB peak'.format(label, peak/2**20))
+
+def main(ncalls=200000):
+    nboxes = ncalls//2
+    directory = tempfile.mkdtemp()
+
+    for name in ('run.trace', 'run.trace.gz'):
+        filename = os.path.join(directory, name)
+
+        def record():
+            with hfss.TraceRecorder(filename) as recorder:
+                [oAnsoftApp, oDesktop] = hfss.setup_interface(fake=hfss.FakeHfss(),
+                                                              recorder=recorder)
+                work(oDesktop, nboxes)
+            return recorder.calls
+
+        def replay():
+            with hfss.TraceReplayer(filename) as replayer:
+                [oAnsoftApp, oDesktop] = hfss.setup_interface(fake=replayer)
+                work(oDesktop, nboxes)
+            return replayer.calls
+
+        print(name)
+        run('  record', record)
+        print('  {0:.1f} MB, {1:.0f} bytes/call'.format(
+            os.path.getsize(filename)/2**20, os.path.getsize(filename)/ncalls))
+        run('  replay', replay)
+        peak('  replay', replay)
+        os.remove(filename)
+
+    os.rmdir(directory)
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
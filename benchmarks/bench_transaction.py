@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Compare a parametric rebuild sent straight to the editor with the same 
+rebuild inside a modeler_transaction(), reporting COM call counts and wall 
+time.
+
+Each of the parts is moved along x, y, and z in separate steps, rotated 
+twice, and assigned a material; every fourth part is then deleted.
+
+Usage::
+
+    python benchmarks/bench_transaction.py
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import timeit
+
+import hycohanz.modeler3d as hfssm3d
+from hycohanz.transaction import modeler_transaction
+
+from recording_editor import RecordingEditor
+
+NPARTS = 2000
+MATERIALS = ['copper', 'FR4_epoxy', 'Rogers RO4003 (tm)']
+
+def rebuild(oEditor, parts):
+    for n, part in enumerate(parts):
+        hfssm3d.move(oEditor, [part], 0.1*n, 0, 0)
+        hfssm3d.move(oEditor, [part], 0, 0.2, 0)
+        hfssm3d.move(oEditor, [part], 0, 0, 0.3)
+        hfssm3d.rotate(oEditor, [part], 'Z', '10deg')
+        hfssm3d.rotate(oEditor, [part], 'Z', '5deg')
+        hfssm3d.assign_material(oEditor, [part], MATERIALS[n % len(MATERIALS)])
+    for part in parts[::4]:
+        hfssm3d.delete(oEditor, [part])
+
+def direct(oEditor, parts):
+    rebuild(oEditor, parts)
+
+def transaction(oEditor, parts):
+    with modeler_transaction(oEditor) as tx:
+        rebuild(tx, parts)
+
+def run(label, func):
+    oEditor = RecordingEditor()
+    parts = [hfssm3d.create_box(oEditor, 0, 0, 0, 1, 1, 1) for n in range(NPARTS)]
+    ncreated = len(oEditor.calls)
+    t0 = timeit.default_timer()
+    func(oEditor, parts)
+    elapsed = timeit.default_timer() - t0
+    print('{0:<28} {1:>8} {2:>10.3f}'.format(label, len(oEditor.calls) - ncreated, elapsed))
+
+if __name__ == '__main__':
+    print('{0:<28} {1:>8} {2:>10}'.format('{0} parts'.format(NPARTS), 'calls', 'seconds'))
+    run('direct', direct)
+    run('modeler_transaction', transaction)
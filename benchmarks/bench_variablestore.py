@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+Run an optimization-style loop on the fake HFSS, setting every variable on
+every iteration while only a few change, with set_variable() and with a
+VariableStore, reporting COM call counts and wall time.
+
+Usage::
+
+    python benchmarks/bench_variablestore.py [iterations] [variables] [changed]
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import sys
+import timeit
+
+import hycohanz as hfss
+
+def main(niterations=500, nvariables=50, nchanged=5):
+    names = ["x{0}".format(n) for n in range(nvariables)]
+    for store in (False, True):
+        fake = hfss.FakeHfss()
+        [oAnsoftApp, oDesktop] = hfss.setup_interface(fake=fake)
+        oProject = hfss.new_project(oDesktop)
+        oDesign = hfss.insert_design(oProject, "HFSSDesign1", "DrivenModal")
+        hfss.add_properties(oDesign, [(name, "1mm") for name in names])
+
+        values = dict((name, 1.0) for name in names)
+        ncalls = fake.ncalls
+        t0 = timeit.default_timer()
+        if store:
+            variables = hfss.VariableStore(oProject)
+        for iteration in range(niterations):
+            for n in range(nchanged):
+                values[names[(iteration*nchanged + n) % nvariables]] += 0.01
+            if store:
+                variables.update([(name, "{0}mm".format(values[name])) for name in names])
+            else:
+                for name in names:
+                    hfss.set_variable(oProject, name, "{0}mm".format(values[name]))
+        elapsed = timeit.default_timer() - t0
+
+        print('{0:<14} {1:>6} COM calls, {2:.3f} s{3}'.format(
+            'VariableStore' if store else 'set_variable', fake.ncalls - ncalls, elapsed,
+            ', {0} writes sent, {1} skipped'.format(variables.sent, variables.skipped)
+            if store else ''))
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+A stand-in for the HFSS 3D Modeler editor that records every call made to 
+it, for benchmarking hycohanz without a running HFSS.
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import collections
+import fnmatch
+
+class RecordingEditor(object):
+    """
+    Record the calls made to an HFSS editor.
+    
+    Create* calls return the requested object name, numbered HFSS-style 
+    if the name is already taken.  DuplicateAlongLine and 
+    DuplicateAroundAxis return the names of the clones, clone by clone,
+    unless ReturnClones is False, as in older versions of HFSS.  Paste
+    returns new names for the parts last copied, and GetMatchedObjectName
+    the names of the objects created and not deleted, in creation order.
+    All other calls return None.
+    
+    Parameters
+    ----------
+    ReturnClones : bool
+        Whether the duplicate calls return the names of the clones.
+
+    Attributes
+    ----------
+    calls : list of (str, tuple)
+        The method name and arguments of every call, in order.
+    counts : collections.Counter
+        The number of calls made to each method.
+    """
+    def __init__(self, ReturnClones=True):
+        self.ReturnClones = ReturnClones
+        self.calls = []
+        self.counts = collections.Counter()
+        self.names = collections.OrderedDict()
+        self.next_number = collections.Counter()
+        self.clipboard = []
+        
+    def _unique_name(self, name):
+        base = name.rstrip('0123456789')
+        while name in self.names:
+            self.next_number[base] += 1
+            name = base + str(self.next_number[base])
+        self.names[name] = True
+        return name
+        
+    def __getattr__(self, method):
+        if method.startswith('_'):
+            raise AttributeError(method)
+        
+        def call(*args):
+            self.calls.append((method, args))
+            self.counts[method] += 1
+            
+            if method.startswith('Create'):
+                attributes = args[-1]
+                return self._unique_name(attributes[attributes.index("Name:=") + 1])
+            elif method == 'Copy':
+                self.clipboard = args[0][2].split(',')
+            elif method == 'Paste':
+                return [self._unique_name(part) for part in self.clipboard]
+            elif method == 'Delete':
+                for part in args[0][2].split(','):
+                    self.names.pop(part, None)
+            elif method == 'GetMatchedObjectName':
+                return [name for name in self.names if fnmatch.fnmatchcase(name, args[0])]
+            elif method in ('DuplicateAlongLine', 'DuplicateAroundAxis'):
+                seeds = args[0][2].split(',')
+                nclones = int(args[1][args[1].index("NumClones:=") + 1])
+                clones = [self._unique_name('{0}_{1}'.format(seed, k)) 
+                          for k in range(1, nclones) for seed in seeds]
+                if self.ReturnClones:
+                    return clones
+            
+        return call
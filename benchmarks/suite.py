@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+"""
+Run the examples directory, and scaled-up scenarios, against the in-process
+fake HFSS, recording wall time, COM call count, and peak Python memory for
+each, and compare the results with a JSON baseline.
+
+The examples are run non-interactively, with raw_input() answering
+immediately and their output discarded.  A scenario regresses if it fails,
+unless it is listed in EXPECTED_FAILURES, makes more COM calls than the
+baseline, or its wall time or peak memory exceeds the baseline by more
+than the tolerance.
+Call counts are deterministic and portable; times and memory depend on the
+machine, so regenerate the baseline with --update on the machine that
+compares against it.
+
+Usage::
+
+    python benchmarks/suite.py                      # compare with baseline
+    python benchmarks/suite.py --update             # write a new baseline
+    python benchmarks/suite.py -k polyline -o results.json
+"""
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import argparse
+import collections
+import contextlib
+import fnmatch
+import gc
+import glob
+import io
+import json
+import os
+import sys
+import timeit
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import hycohanz as hfss
+import hycohanz.appobject
+
+EXAMPLES = os.path.join(ROOT, 'examples')
+BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+
+# Increase in peak memory, in kB, always allowed, whatever the tolerance.
+MEMORY_FLOOR = 1024
+
+# Examples known to fail, and why.  Their status is 'xfail' while they do.
+EXPECTED_FAILURES = {
+    'example_close_all_projects': "uses oEditor without defining it",
+    'example_close_all_projects_except_current': "uses oEditor without defining it",
+    'example_close_current_project': "uses oEditor without defining it",
+    'example_close_project_byhandle': "uses oEditor without defining it",
+    'example_close_project_byname': "uses oEditor without defining it",
+    'example_create_box': "calls create_box() without zsize",
+    'example_get_active_project': "uses projectname without defining it",
+    'example_get_matched_object_name': "calls sweep_along_path(), which hycohanz lacks",
+    'example_get_module': "the fake HFSS has no Optimetrics module",
+    'example_get_object_name': "assumes an object with index 0",
+    'example_get_object_name_by_faceid': "assumes a face with id 10",
+    'example_rename_part': "prints res without defining it",
+}
+
+SCENARIOS = collections.OrderedDict()
+
+def scenario(func):
+    SCENARIOS[func.__name__] = func
+    return func
+
+def _editor(oDesktop):
+    oProject = hfss.new_project(oDesktop)
+    oDesign = hfss.insert_design(oProject, "HFSSDesign1", "DrivenModal")
+    return oDesign, hfss.set_active_editor(oDesign)
+
+@scenario
+def boxes_10k_loop(oDesktop):
+    oDesign, oEditor = _editor(oDesktop)
+    for n in range(10000):
+        hfss.create_box(oEditor, 2*(n % 100), 2*(n // 100), 0, 1, 1, 1)
+
+@scenario
+def boxes_10k_bulk(oDesktop):
+    oDesign, oEditor = _editor(oDesktop)
+    n = np.arange(10000)
+    positions = np.column_stack([2*(n % 100), 2*(n // 100), np.zeros(len(n))])
+    hfss.create_boxes(oEditor, positions, [1, 1, 1])
+
+@scenario
+def polyline_100k(oDesktop):
+    oDesign, oEditor = _editor(oDesktop)
+    t = np.linspace(0, 2*np.pi, 100000)
+    hfss.create_polyline(oEditor, np.cos(t), np.sin(t), t/10, IsPolylineClosed=False)
+
+@scenario
+def polyline_array_100k(oDesktop):
+    oDesign, oEditor = _editor(oDesktop)
+    t = np.linspace(0, 2*np.pi, 100000)
+    hfss.create_polyline_array(oEditor, np.column_stack([np.cos(t), np.sin(t), t/10]),
+                               IsPolylineClosed=False)
+
+@scenario
+def boundary_faces_1k(oDesktop):
+    oDesign, oEditor = _editor(oDesktop)
+    boxes = [hfss.create_box(oEditor, 2*n, 0, 0, 1, 1, 1) for n in range(1000)]
+    faces = [hfss.get_face_by_position(oEditor, box, 2*n + 0.5, 0.5, 1)
+             for n, box in enumerate(boxes)]
+    hfss.assign_perfect_e(oDesign, "PEC1", faces)
+
+@scenario
+def calculator_10k(oDesktop):
+    oProject = hfss.open_project(oDesktop, os.path.join(EXAMPLES, 'WR284.hfss'))
+    oDesign = hfss.set_active_design(oProject, 'HFSSDesign1')
+    oFieldsReporter = hfss.get_module(oDesign, 'FieldsReporter')
+    for n in range(10000):
+        hfss.enter_qty(oFieldsReporter, 'E')
+        hfss.calc_op(oFieldsReporter, 'Mag')
+        hfss.enter_vol(oFieldsReporter, 'Polyline1')
+        hfss.calc_op(oFieldsReporter, 'Maximum')
+        hfss.clc_eval(oFieldsReporter, 'Setup1', 'LastAdaptive', 3.95e9, 0.0, {})
+        hfss.get_top_entry_value(oFieldsReporter, 'Setup1', 'LastAdaptive', 3.95e9, 0.0, {})
+
+def _example(path):
+    """
+    Return a scenario running the example script at path.
+    """
+    with io.open(path, encoding='utf-8') as f:
+        code = compile(f.read().expandtabs(4), path, 'exec')
+
+    def run(oDesktop):
+        cwd = os.getcwd()
+        os.chdir(os.path.dirname(path))
+        try:
+            exec(code, {'__name__': '__main__',
+                        '__file__': path,
+                        'raw_input': lambda prompt='': ''})
+        finally:
+            os.chdir(cwd)
+
+    return run
+
+def scenarios():
+    """
+    Return the scenarios by name: the examples, then the scaled variants.
+    """
+    result = collections.OrderedDict()
+    for path in sorted(glob.glob(os.path.join(EXAMPLES, '*.py'))):
+        name = 'example_' + os.path.splitext(os.path.basename(path))[0]
+        try:
+            result[name] = _example(path)
+        except SyntaxError as e:
+            result[name] = e
+    result.update(SCENARIOS)
+    return result
+
+def measure(func):
+    """
+    Run a scenario against a fresh fake HFSS.
+
+    Returns
+    -------
+    result : dict
+        status ('ok' or the error), time in seconds, COM calls, and peak
+        Python memory in kB (None without tracemalloc).
+    """
+    fake = hfss.FakeHfss()
+    hycohanz.appobject.default_fake = fake
+    gc.collect()
+    if tracemalloc is not None:
+        tracemalloc.start()
+
+    status = 'ok'
+    t0 = timeit.default_timer()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            if isinstance(func, Exception):
+                raise func
+            [oAnsoftApp, oDesktop] = hfss.setup_interface()
+            func(oDesktop)
+    except Exception as e:
+        status = '{0}: {1}'.format(type(e).__name__, e)
+    elapsed = timeit.default_timer() - t0
+
+    peak = None
+    if tracemalloc is not None:
+        peak = tracemalloc.get_traced_memory()[1] // 1024
+        tracemalloc.stop()
+    hycohanz.appobject.default_fake = None
+
+    return collections.OrderedDict([('status', status),
+                                    ('time', round(elapsed, 4)),
+                                    ('calls', fake.ncalls),
+                                    ('peak_kb', peak)])
+
+def compare(results, baseline, tolerance, floor):
+    """
+    Return a list of regressions of results against baseline.
+    """
+    regressions = []
+    for name, result in results.items():
+        if result['status'] not in ('ok', 'xfail'):
+            regressions.append('{0}: failed ({1})'.format(name, result['status']))
+
+        base = baseline.get(name)
+        if base is None:
+            continue
+
+        if result['calls'] > base['calls']:
+            regressions.append('{0}: {1} COM calls, baseline {2}'.format(
+                name, result['calls'], base['calls']))
+        if result['time'] > base['time']*(1 + tolerance) + floor:
+            regressions.append('{0}: {1:.3f} s, baseline {2:.3f} s'.format(
+                name, result['time'], base['time']))
+        if (result['peak_kb'] is not None and base.get('peak_kb') is not None and
+                result['peak_kb'] > base['peak_kb']*(1 + tolerance) + MEMORY_FLOOR):
+            regressions.append('{0}: {1} kB peak, baseline {2} kB'.format(
+                name, result['peak_kb'], base['peak_kb']))
+
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('-k', dest='pattern', default='*',
+                        help='only run scenarios matching this pattern')
+    parser.add_argument('-b', '--baseline', default=BASELINE,
+                        help='baseline JSON file (default %(default)s)')
+    parser.add_argument('-o', '--output',
+                        help='also write the results to this JSON file')
+    parser.add_argument('--update', action='store_true',
+                        help='write the results to the baseline instead of comparing')
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help='allowed relative increase in time and memory (default %(default)s)')
+    parser.add_argument('--floor', type=float, default=0.05,
+                        help='increase in time, in seconds, always allowed '
+                             '(default %(default)s)')
+    args = parser.parse_args(argv)
+
+    pattern = args.pattern if any(c in args.pattern for c in '*?[') else '*' + args.pattern + '*'
+
+    results = collections.OrderedDict()
+    print('{0:<44} {1:>8} {2:>9} {3:>9}  {4}'.format('scenario', 'calls', 'seconds',
+                                                    'peak kB', 'status'))
+    for name, func in scenarios().items():
+        if not fnmatch.fnmatch(name, pattern):
+            continue
+        result = results[name] = measure(func)
+        status = result['status']
+        if name in EXPECTED_FAILURES:
+            if status == 'ok':
+                status = 'ok, but listed in EXPECTED_FAILURES'
+            else:
+                result['status'] = 'xfail'
+                status = 'xfail: ' + EXPECTED_FAILURES[name]
+        print('{0:<44} {calls:>8} {time:>9.3f} {1:>9}  {2}'.format(
+            name, result['peak_kb'] if result['peak_kb'] is not None else '-', status,
+            **result))
+
+    if args.output:
+        with io.open(args.output, 'w', encoding='utf-8') as f:
+            f.write('{0}'.format(json.dumps(results, indent=2)))
+
+    if args.update:
+        baseline = collections.OrderedDict()
+        if os.path.exists(args.baseline):
+            with io.open(args.baseline, encoding='utf-8') as f:
+                baseline.update(json.load(f, object_pairs_hook=collections.OrderedDict))
+        baseline.update(results)
+        with io.open(args.baseline, 'w', encoding='utf-8') as f:
+            f.write('{0}\n'.format(json.dumps(baseline, indent=2)))
+        print('\nWrote {0} results to {1}'.format(len(results), args.baseline))
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print('\nNo baseline at {0}; run with --update to create one.'.format(args.baseline))
+        return 0
+
+    with io.open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    regressions = compare(results, baseline, args.tolerance, args.floor)
+    if regressions:
+        print('\nRegressions against {0}:'.format(args.baseline))
+        for regression in regressions:
+            print('  ' + regression)
+        return 1
+    else:
+        print('\nNo regressions against {0}.'.format(args.baseline))
+        return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
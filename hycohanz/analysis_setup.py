@@ -61,7 +61,7 @@ def insert_frequency_sweep(oDesign,
     None
     
     """
-    oAnalysisSetup = oDesign.GetModule("AnalysisSetup")
+    oAnalysisSetup = get_module(oDesign, "AnalysisSetup")
     return oAnalysisSetup.InsertFrequencySweep(setupname, 
                                         ["NAME:" + sweepname, 
                                          "IsEnabled:=", IsEnabled, 
@@ -8,12 +8,33 @@ At last count there were 1 functions implemented out of 15.
 """
 from __future__ import division, print_function, unicode_literals, absolute_import
 
-import win32com.client
+import os
 
-def setup_interface():
+# A hycohanz FakeHfss object used by setup_interface() in place of HFSS, 
+# unless it is called with fake=False.
+default_fake = None
+
+def setup_interface(fake=None, instrument=None, recorder=None):
     """
     Set up the COM interface to the running HFSS process.
     
+    Parameters
+    ----------
+    fake : bool or hycohanz FakeHfss object, optional
+        If True, return the interface of a new in-process fake HFSS 
+        instead, configured by FakeHfss.from_environment().  A FakeHfss, 
+        TraceReplayer, or other object with a setup_interface() method is 
+        used as is.  If None, default_fake is used if set, or 
+        else a new fake when the HYCOHANZ_FAKE environment variable is set 
+        to anything other than '' or '0'.
+    instrument : hycohanz Instrument object, optional
+        If given, the returned objects, and every object obtained through 
+        them, are wrapped so that the instrument records each COM call.
+    recorder : hycohanz TraceRecorder object, optional
+        If given, the returned objects, and every object obtained through 
+        them, are wrapped so that the recorder writes each COM call to its 
+        trace.
+    
     Returns
     -------
     oAnsoftApp : pywin32 COMObject
@@ -27,6 +48,35 @@ def setup_interface():
     >>> [oAnsoftApp, oDesktop] = hfss.setup_interface()
     
     """
+    if fake is None:
+        fake = default_fake or os.environ.get('HYCOHANZ_FAKE', '') not in ('', '0')
+        
+    if fake:
+        from hycohanz.fakehfss import FakeHfss
+        
+        if not hasattr(fake, 'setup_interface'):
+            fake = FakeHfss.from_environment()
+            
+        oAnsoftApp, oDesktop = fake.setup_interface()
+    else:
+        oAnsoftApp, oDesktop = _dispatch()
+        
+    if recorder is not None:
+        oAnsoftApp = recorder.wrap(oAnsoftApp)
+        oDesktop = recorder.wrap(oDesktop)
+        
+    if instrument is not None:
+        oAnsoftApp = instrument.wrap(oAnsoftApp, 'App')
+        oDesktop = instrument.wrap(oDesktop, 'Desktop')
+        
+    return [oAnsoftApp, oDesktop]
+
+def _dispatch():
+    """
+    Attach to the running HFSS process through COM.
+    """
+    import win32com.client
+    
     # I'm still looking for a better way to do this.  This attaches to an 
     # existing HFSS process instead of creating a new one.  I would highly 
     # prefer that a new process is created.  Apparently 
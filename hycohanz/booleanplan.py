@@ -0,0 +1,379 @@
+# -*- coding: utf-8 -*-
+"""
+Plan batches of subtract and unite operations before sending them to the
+HFSS 3D Modeler.
+
+Example Usage
+-------------
+>>> import hycohanz as hfss
+>>> [oAnsoftApp, oDesktop] = hfss.setup_interface()
+>>> oProject = hfss.new_project(oDesktop)
+>>> oDesign = hfss.insert_design(oProject, "HFSSDesign1", "DrivenModal")
+>>> oEditor = hfss.set_active_editor(oDesign, "3D Modeler")
+>>> board = hfss.create_box(oEditor, 0, 0, 0, 10, 10, 1, Name='Board')
+>>> plan = hfss.BooleanPlan()
+>>> for n in range(100):
+...     via = hfss.create_cylinder(oEditor, 0.1*n, 5, 0, 0.02, 1, Name='Via')
+...     plan.subtract(board, via)
+>>> plan.execute(oEditor)
+['Board']
+>>> plan.report()
+{'requested': 100, 'planned': 1, 'dropped': 0, 'saved': 99}
+
+"""
+
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import collections
+
+from hycohanz.modeler3d import (subtract,
+                                unite,
+                                delete)
+
+def _as_partlist(parts):
+    if isinstance(parts, (list, tuple)):
+        return list(parts)
+    else:
+        return [parts]
+
+def _unique(partlist):
+    return list(collections.OrderedDict.fromkeys(partlist))
+
+class BooleanPlan(object):
+    """
+    Collect a boolean workload and execute it with as few modeler operations
+    as possible.
+
+    Calls to subtract() and unite() are recorded rather than sent to HFSS.
+    execute() then
+
+    * merges overlapping unite groups, so that each resulting part is
+      united in a single operation;
+    * merges all tools subtracted from the same blank, and subtracts the
+      same tool set from all of its blanks in a single operation;
+    * optionally unites the tools of each subtraction in a balanced tree
+      before the subtraction (see FanIn);
+    * drops operations that do nothing, such as subtracting a part from
+      itself, repeating a tool, or uniting a single part.
+
+    Unions are performed before the subtractions recorded with them, and
+    parts united into a group are afterwards referred to by the first part
+    of the group.  A unite of a part that is a blank or tool of an earlier
+    subtraction, or is united with one, is performed after it, as
+    recorded: it starts a new phase, planned after the phases before it.
+    A blank that is also used as a tool is finished before it is used.
+
+    Parameters
+    ----------
+    FanIn : int or None
+        If None, each subtraction passes all of its tools to a single
+        Subtract, and each unite group is united in a single Unite.  If an
+        integer of at least 2, tools and unite groups are united in a
+        balanced tree of Unite operations of at most FanIn parts each,
+        which keeps the intermediate solids small for the CAD kernel.
+        Tools are not united when KeepTools is set, as uniting them would
+        not keep them.
+    KeepTools : bool
+        Whether to keep the tool parts of the subtractions.
+
+    Attributes
+    ----------
+    requested : int
+        The number of operations recorded.
+    dropped : int
+        The number of recorded operations, or tools within them, that were
+        dropped as no-ops.
+    """
+    def __init__(self, FanIn=None, KeepTools=False):
+        if FanIn is not None and FanIn < 2:
+            raise ValueError('FanIn must be None or at least 2')
+
+        self.FanIn = FanIn
+        self.KeepTools = KeepTools
+        self.requested = 0
+        self.dropped = 0
+        self._phases = []
+        self._new_phase()
+        self._operations = None
+        self._heads = []
+        self._head = {}
+        self._empty = 0
+
+    def _new_phase(self):
+        """
+        Start a new phase of operations, planned after those recorded before.
+        """
+        self._subtractions = collections.OrderedDict()
+        self._unions = []
+        # The unite groups recorded so far in the phase, as a union-find
+        # forest, and the roots of those with parts used by a subtraction.
+        self._parent = {}
+        self._touched = set()
+        self._phases.append((self._subtractions, self._unions))
+
+    def _find(self, part):
+        parent = self._parent
+        parent.setdefault(part, part)
+        root = part
+        while parent[root] != root:
+            root = parent[root]
+        while parent[part] != root:
+            parent[part], part = root, parent[part]
+        return root
+
+    def subtract(self, blanks, tools):
+        """
+        Record the subtraction of tools from each of blanks.
+
+        Parameters
+        ----------
+        blanks : str or list of str
+            The part, or parts, to subtract from.
+        tools : str or list of str
+            The part, or parts, to subtract.
+        """
+        self.requested += 1
+        self._operations = None
+
+        tools = _as_partlist(tools)
+        if not tools:
+            self._empty += 1
+
+        blanks = _as_partlist(blanks)
+        for blank in blanks:
+            self._subtractions.setdefault(blank, []).extend(tools)
+
+        self._touched.update(self._find(part) for part in blanks + tools)
+
+    def unite(self, partlist):
+        """
+        Record the union of the given parts.
+
+        Parameters
+        ----------
+        partlist : list of str
+            The parts to unite.
+        """
+        self.requested += 1
+        self._operations = None
+
+        partlist = _as_partlist(partlist)
+        if any(self._find(part) in self._touched for part in partlist):
+            self._new_phase()
+
+        self._unions.append(partlist)
+        roots = set(self._find(part) for part in partlist)
+        root = self._find(partlist[0]) if partlist else None
+        for other in roots:
+            self._parent[other] = root
+        if roots & self._touched:
+            self._touched.add(root)
+
+    def _merge_unions(self, unions):
+        """
+        Merge the unite groups that share a part, returning the groups and a
+        map from each part to the head of its group.
+        """
+        parent = {}
+
+        def find(part):
+            root = part
+            while parent[root] != root:
+                root = parent[root]
+            while parent[part] != root:
+                parent[part], part = root, parent[part]
+            return root
+
+        rank = {}
+        for group in unions:
+            group = _unique(group)
+            if len(group) < 2:
+                self.dropped += 1
+            for part in group:
+                if part not in parent:
+                    parent[part] = part
+                    rank[part] = len(rank)
+            for part in group[1:]:
+                root, other = find(group[0]), find(part)
+                if root != other:
+                    # Keep the part recorded first as the head of the group
+                    if rank[other] < rank[root]:
+                        root, other = other, root
+                    parent[other] = root
+
+        groups = collections.OrderedDict()
+        for part in sorted(rank, key=rank.get):
+            groups.setdefault(find(part), []).append(part)
+
+        head = dict((part, find(part)) for part in rank)
+
+        return [group for group in groups.values() if len(group) > 1], head
+
+    def _tree(self, partlist):
+        """
+        Return the Unite operations uniting partlist in a balanced tree.
+        """
+        operations = []
+        if self.FanIn is None:
+            if len(partlist) > 1:
+                operations.append(('unite', partlist))
+            return operations
+
+        while len(partlist) > 1:
+            chunks = [partlist[n:n + self.FanIn]
+                      for n in range(0, len(partlist), self.FanIn)]
+            operations += [('unite', chunk) for chunk in chunks if len(chunk) > 1]
+            partlist = [chunk[0] for chunk in chunks]
+
+        return operations
+
+    def _order_subtractions(self, subtractions):
+        """
+        Order the blanks so that a blank used as a tool elsewhere is
+        finished first.
+        """
+        ordered = []
+        state = {}
+
+        def visit(blank):
+            if state.get(blank) == 'done':
+                return
+            elif state.get(blank) == 'visiting':
+                raise ValueError('Circular subtraction involving ' + blank)
+
+            state[blank] = 'visiting'
+            for tool in subtractions[blank]:
+                if tool in subtractions:
+                    visit(tool)
+            state[blank] = 'done'
+            ordered.append(blank)
+
+        for blank in subtractions:
+            visit(blank)
+
+        return ordered
+
+    def plan(self):
+        """
+        Return the planned operations.
+
+        Returns
+        -------
+        operations : list of tuples
+            ('unite', partlist), ('subtract', blanklist, toollist,
+            KeepOriginals), or ('delete', partlist), in execution order.
+        """
+        if self._operations is not None:
+            return self._operations
+
+        self.dropped = self._empty
+        operations = []
+        heads = []
+        head = {}
+        for subtractions, unions in self._phases:
+            # Parts united in earlier phases are referred to by their heads
+            unions = [[head.get(part, part) for part in group] for group in unions]
+            groups, phase_head = self._merge_unions(unions)
+            for part in list(head):
+                head[part] = phase_head.get(head[part], head[part])
+            head.update(phase_head)
+            heads += [group[0] for group in groups]
+
+            for group in groups:
+                operations += self._tree(group)
+            operations += self._plan_subtractions(subtractions, head)
+
+        self._heads = _unique(head.get(part, part) for part in heads)
+        self._head = head
+        self._operations = operations
+        return operations
+
+    def _plan_subtractions(self, recorded, head):
+        """
+        Return the operations for the subtractions of a phase.
+        """
+        operations = []
+
+        # Resolve united parts and drop repeated and self-subtracted tools
+        subtractions = collections.OrderedDict()
+        for blank, tools in recorded.items():
+            blank = head.get(blank, blank)
+            merged = subtractions.setdefault(blank, [])
+            seen = set(merged)
+            for tool in tools:
+                tool = head.get(tool, tool)
+                if tool == blank or tool in seen:
+                    self.dropped += 1
+                else:
+                    merged.append(tool)
+                    seen.add(tool)
+
+        # Blanks with the same tool set are subtracted in one operation
+        toolsets = collections.OrderedDict()
+        for blank in self._order_subtractions(subtractions):
+            tools = subtractions[blank]
+            if tools:
+                toolsets.setdefault(tuple(tools), []).append(blank)
+
+        uses = collections.Counter(tool for tools in toolsets for tool in tools)
+
+        kept = []
+        for tools, blanks in toolsets.items():
+            tools = list(tools)
+            shared = any(uses[tool] > 1 for tool in tools)
+            keep = self.KeepTools or shared
+            if self.FanIn is not None and not keep:
+                tree = self._tree(tools)
+                operations += tree
+                if tree:
+                    tools = tools[:1]
+
+            operations.append(('subtract', blanks, tools, keep))
+            if keep and not self.KeepTools:
+                kept += tools
+
+        if kept:
+            operations.append(('delete', _unique(kept)))
+
+        return operations
+
+    def execute(self, oEditor):
+        """
+        Send the planned operations to HFSS.
+
+        Parameters
+        ----------
+        oEditor : pywin32 COMObject
+            The HFSS editor in which the operations will be performed.
+
+        Returns
+        -------
+        partlist : list of str
+            Names of the parts remaining after the operations: the unite
+            group heads and the subtraction blanks.
+        """
+        partlist = []
+        for operation in self.plan():
+            if operation[0] == 'unite':
+                unite(oEditor, operation[1])
+            elif operation[0] == 'subtract':
+                subtract(oEditor, operation[1], operation[2],
+                         KeepOriginals=operation[3])
+                partlist += operation[1]
+            else:
+                delete(oEditor, operation[1])
+
+        return _unique(self._heads + [self._head.get(part, part) for part in partlist])
+
+    def report(self):
+        """
+        Return the operation counts as a dict.
+
+        The 'saved' entry is the number of modeler operations saved by the
+        plan compared to sending each recorded operation on its own.
+        """
+        planned = len(self.plan())
+        return {'requested': self.requested,
+                'planned': planned,
+                'dropped': self.dropped,
+                'saved': self.requested - planned}
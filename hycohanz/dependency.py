@@ -0,0 +1,548 @@
+# -*- coding: utf-8 -*-
+"""
+A client-side graph of the dependencies of HFSS parts, boundaries, and
+setups on design and project variables.
+
+Example Usage
+-------------
+>>> import hycohanz as hfss
+>>> [oAnsoftApp, oDesktop] = hfss.setup_interface()
+>>> oProject = hfss.new_project(oDesktop)
+>>> oDesign = hfss.insert_design(oProject, "HFSSDesign1", "DrivenModal")
+>>> oEditor = hfss.TopologyCache(hfss.set_active_editor(oDesign))
+>>> graph = hfss.DependencyGraph(oEditor, oDesign)
+>>> hfss.add_property(graph.design, "w", "1mm")
+>>> hfss.add_property(graph.design, "gap", hfss.Expression("w")/2)
+>>> box = hfss.create_box(graph, 0, 0, 0, "w", "w", "1mm")
+>>> via = hfss.create_cylinder(graph, "gap", 0, 0, "0.1mm", "1mm")
+>>> graph.affected_by("w")['parts']
+['Box1', 'Cylinder1']
+>>> faces = list(hfss.get_face_ids(graph, box))
+>>> hfss.assign_perfect_e(graph.design, "PerfE1", faces[:1])
+>>> hfss.insert_analysis_setup(graph.design, "gap*1e12")
+'Setup1'
+>>> graph.affected_by("w")['boundaries'], graph.affected_by("w")['setups']
+(['PerfE1'], ['Setup1'])
+>>> graph.unused_variables()
+[]
+
+"""
+
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import collections
+
+from hycohanz.editorproxy import (EditorProxy,
+                                  get_array_value,
+                                  get_partlist)
+from hycohanz.expression import Expression
+from hycohanz.registry import CREATE_METHODS
+from hycohanz.topology import (RESET_METHODS,
+                               _affected_parts)
+
+# Editor methods returning the names of new parts copied from the selection.
+DUPLICATE_METHODS = frozenset(["DuplicateAlongLine",
+                               "DuplicateAroundAxis",
+                               "DuplicateMirror"])
+
+# Property tabs holding variables.
+VARIABLE_TABS = frozenset(["NAME:LocalVariableTab",
+                           "NAME:ProjectVariableTab"])
+
+# Keys whose values are names, selections, or enumerations rather than
+# expressions, and so aren't scanned for variable references.
+NAME_KEYS = frozenset(["Name", "Old Name", "New Name", "BodyName",
+                       "Selections", "Blank Parts", "Tool Parts",
+                       "Objects", "Faces", "Edges", "Vertices",
+                       "FacesToUncover", "NewPartsModelFlag",
+                       "PartCoordinateSystem", "UDMId", "Flags", "Color",
+                       "MaterialValue", "MaterialName", "PropType",
+                       "WhichAxis", "RotateAxis", "SweepAxis", "SplitPlane",
+                       "WhichSide", "SegmentType", "XSectionType",
+                       "XSectionOrient", "XSectionBendType", "DraftType",
+                       "Type", "SetupType", "HealOption", "FileType",
+                       "SourceFile"])
+
+# The modules whose definitions are recorded, and the graph attribute
+# recording them.
+MODULE_TABLES = {"BoundarySetup": "boundaries",
+                 "AnalysisSetup": "setups"}
+
+def _definition_name(array):
+    """
+    Return the name given by the "NAME:..." first element of an HFSS array,
+    or None.
+    """
+    if isinstance(array, (list, tuple)) and array:
+        head = '{0}'.format(array[0])
+        if head[:5].upper() == "NAME:":
+            return head[5:]
+    return None
+
+class _ModuleProxy(object):
+    """
+    Stand in for an HFSS BoundarySetup or AnalysisSetup module, reporting
+    the boundaries, excitations, setups, and sweeps defined through it to a
+    DependencyGraph.
+    """
+    def __init__(self, graph, obj, table):
+        self._graph = graph
+        self._obj = obj
+        self._table = table
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        method = getattr(self._obj, name)
+        if not callable(method) or name.startswith('Get'):
+            return method
+
+        def record(*args):
+            result = method(*args)
+            self._graph._record_definition(self._table, name, args)
+            return result
+
+        return record
+
+class _VariableServerProxy(object):
+    """
+    Stand in for an HFSS design or project, reporting variable changes to
+    a DependencyGraph.
+    """
+    def __init__(self, graph, obj):
+        self._graph = graph
+        self._obj = obj
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self._obj, name)
+
+    def ChangeProperty(self, alltabsarray):
+        result = self._obj.ChangeProperty(alltabsarray)
+
+        for tab in alltabsarray[1:]:
+            if not isinstance(tab, (list, tuple)) or tab[0] not in VARIABLE_TABS:
+                continue
+            for props in tab[1:]:
+                if props[0] in ("NAME:NewProps", "NAME:ChangedProps"):
+                    for prop in props[1:]:
+                        value = get_array_value(prop, "Value")
+                        if value is not None:
+                            self._graph.set_variable(prop[0][5:], value)
+                elif props[0] == "NAME:DeletedProps":
+                    for name in props[1:]:
+                        self._graph.delete_variable(name)
+
+        return result
+
+    def SetVariableValue(self, name, value):
+        result = self._obj.SetVariableValue(name, value)
+        self._graph.set_variable(name, value)
+        return result
+
+    def GetModule(self, name):
+        oModule = self._obj.GetModule(name)
+        table = MODULE_TABLES.get(name)
+        if table is None:
+            return oModule
+        return _ModuleProxy(self._graph, oModule, table)
+
+    def GetActiveDesign(self):
+        design = self._obj.GetActiveDesign()
+        if self._graph.design is not None and design == self._graph.design._obj:
+            return self._graph.design
+        return _VariableServerProxy(self._graph, design)
+
+class DependencyGraph(EditorProxy):
+    """
+    Wrap an HFSS editor and record which variables each part depends on.
+
+    Each editor call made through the graph (and hence create_box(),
+    move(), rotate(), sweep_along_vector(), fillet(), and the other
+    modeler functions) is scanned for references to variables in its
+    expression arguments, and the created or selected parts are recorded
+    as depending on them.  Dependencies are carried through copies,
+    duplicates, renames, unites, and subtractions.  Variables defined or
+    changed through the design and project proxies (and hence by
+    add_property() and set_variable()) are recorded with the variables
+    their values reference.
+
+    The BoundarySetup and AnalysisSetup modules fetched from the design
+    proxy (and hence assign_perfect_e(), insert_analysis_setup(), and the
+    other boundary and setup functions given the design proxy) record the
+    boundaries, excitations, setups, and sweeps defined through them, with
+    the variables they reference, and the parts they are assigned to.
+    Parts are known by their names under "Objects", and faces by the face
+    ids that GetFaceByPosition and GetFaceIDs calls through the graph
+    returned.
+
+    When a variable is changed, the parts that depend on it are added to
+    stale, and their entries in any TopologyCache wrapped by the graph are
+    invalidated, so that only they are re-queried.
+
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor to wrap.
+    oDesign : pywin32 COMObject, optional
+        The design of the editor.  Its existing variables are read with a
+        single GetVariables call, and pass the design proxy to add_property()
+        to record new ones.
+    oProject : pywin32 COMObject, optional
+        The project of the design, for project variables and set_variable().
+
+    Attributes
+    ----------
+    design : design proxy or None
+        Pass in place of oDesign to record changes to design variables.
+    project : project proxy or None
+        Pass in place of oProject to record changes to project variables.
+    variables : OrderedDict
+        The known variables, mapped to the set of variables their values
+        reference.
+    parts : dict
+        The parts created or changed through the graph, mapped to the set of
+        variables they depend on directly.
+    boundaries : dict
+        The boundaries and excitations defined through the design proxy,
+        mapped to a (variables, parts) pair of sets: the variables they
+        reference directly, and the parts they are assigned to.
+    setups : dict
+        Likewise for the analysis setups, including their sweeps.
+    stale : set
+        The parts affected by variable changes since the last call to
+        clear_stale().
+    """
+    def __init__(self, oEditor, oDesign=None, oProject=None):
+        super(DependencyGraph, self).__init__(oEditor)
+        self.design = None
+        self.project = None
+        self.variables = collections.OrderedDict()
+        self.parts = {}
+        self.boundaries = {}
+        self.setups = {}
+        self.stale = set()
+        self._faces = {}
+        self._users = collections.defaultdict(set)
+        self._references = {}
+        self._clipboard = set()
+
+        if oDesign is not None:
+            self.design = _VariableServerProxy(self, oDesign)
+            for name in oDesign.GetVariables():
+                self.variables.setdefault(name, frozenset())
+        if oProject is not None:
+            self.project = _VariableServerProxy(self, oProject)
+            for name in oProject.GetVariables():
+                self.variables.setdefault(name, frozenset())
+
+    def __getattr__(self, name):
+        method = super(DependencyGraph, self).__getattr__(name)
+
+        if name in ("GetFaceByPosition", "GetFaceIDs"):
+            def faces(arg):
+                result = method(arg)
+                self._record_faces(name, arg, result)
+                return result
+            return faces
+        elif not callable(method) or name.startswith('Get'):
+            return method
+
+        def record(*args):
+            result = method(*args)
+            self._record(name, args, result)
+            return result
+
+        return record
+
+    # Expression scanning
+
+    def references(self, text, refs=None):
+        """
+        Return the known variables, and any project variables, referenced by
+        an expression string.
+        """
+        if refs is None:
+            refs = set()
+        try:
+            names = self._references[text]
+        except KeyError:
+            names = self._references[text] = Expression(text).variables()
+        for name in names:
+            if name in self.variables or name.startswith('$'):
+                refs.add(name)
+        return refs
+
+    def _scan(self, args, refs=None):
+        """
+        Return the variables referenced by the expression values in HFSS
+        arrays, the values of "Key:=" entries other than NAME_KEYS.
+        """
+        if refs is None:
+            refs = set()
+        for arg in args:
+            if isinstance(arg, (list, tuple)):
+                self._scan_array(arg, refs)
+        return refs
+
+    def _scan_array(self, array, refs):
+        cache = self._references
+        key = None
+        for item in array:
+            if key is not None:
+                if key in NAME_KEYS:
+                    pass
+                elif isinstance(item, (list, tuple)):
+                    self._scan_array(item, refs)
+                else:
+                    # Numbers are cached too, as referencing nothing.
+                    names = cache.get(item)
+                    if names is None and isinstance(item, str):
+                        names = cache[item] = Expression(item).variables()
+                    for name in names or ():
+                        if name in self.variables or name.startswith('$'):
+                            refs.add(name)
+                key = None
+            elif isinstance(item, (list, tuple)):
+                self._scan_array(item, refs)
+            elif isinstance(item, str) and item.endswith(':='):
+                key = item[:-2]
+
+    # Part bookkeeping
+
+    def _depend(self, part, refs):
+        current = self.parts.setdefault(part, set())
+        current.update(refs)
+        for name in refs:
+            self._users[name].add(part)
+
+    def _remove(self, partlist):
+        for part in partlist:
+            for name in self.parts.pop(part, ()):
+                self._users[name].discard(part)
+
+    def _union(self, partlist):
+        refs = set()
+        for part in partlist:
+            refs.update(self.parts.get(part, ()))
+        return refs
+
+    def _record(self, method, args, result):
+        refs = self._scan(args)
+        selected = _affected_parts(args)
+
+        if method in CREATE_METHODS:
+            if result:
+                self._depend(result, refs)
+        elif method == "Copy":
+            self._clipboard = self._union(get_partlist(args[0]))
+        elif method == "Paste":
+            for part in result or ():
+                self._depend(part, self._clipboard)
+        elif method in DUPLICATE_METHODS:
+            refs.update(self._union(get_partlist(args[0])))
+            for part in result or ():
+                self._depend(part, refs)
+            for part in get_partlist(args[0]):
+                self._depend(part, ())
+        elif method == "RenamePart":
+            oldname = get_array_value(args[0], "Old Name")
+            newname = get_array_value(args[0], "New Name")
+            old = self.parts.get(oldname, set())
+            self._remove([oldname, newname])
+            self._depend(newname, old | refs)
+        elif method in ("Delete", "Cut"):
+            self._remove(get_partlist(args[0]))
+        elif method in ("Unite", "Connect"):
+            partlist = get_partlist(args[0])
+            if partlist:
+                self._depend(partlist[0], self._union(partlist) | refs)
+                if not get_array_value(args[-1], "KeepOriginals", False):
+                    self._remove(partlist[1:])
+        elif method in ("Subtract", "Imprint", "Intersect"):
+            blanks = get_partlist(args[0], "Blank Parts") or get_partlist(args[0])
+            tools = get_partlist(args[0], "Tool Parts")
+            merged = self._union(tools) | refs
+            for part in blanks:
+                self._depend(part, merged)
+            if tools and not get_array_value(args[-1], "KeepOriginals", False):
+                self._remove(tools)
+        elif method in RESET_METHODS:
+            pass
+        else:
+            for part in selected:
+                self._depend(part, refs)
+
+    def _record_faces(self, method, arg, result):
+        """
+        Remember the body of the faces returned by a query.
+        """
+        if method == "GetFaceIDs":
+            body, faceids = arg, result or ()
+        else:
+            body, faceids = get_array_value(arg, "BodyName"), [result]
+        for faceid in faceids:
+            self._faces['{0}'.format(faceid)] = body
+
+    # Boundaries and setups
+
+    def _record_definition(self, table, method, args):
+        """
+        Record a definition made, edited, or deleted through a module proxy.
+        """
+        definitions = getattr(self, table)
+
+        if method.startswith("Delete"):
+            for name in args[0]:
+                definitions.pop(name, None)
+            return
+
+        if method.startswith("Edit"):
+            oldname, array = args[0], args[1]
+            name = _definition_name(array) or oldname
+            definitions.pop(oldname, None)
+            entry = (set(), set())
+        elif method == "InsertFrequencySweep":
+            # A sweep belongs to its setup
+            name, array = args[0], args[1]
+            entry = definitions.setdefault(name, (set(), set()))
+        else:
+            names = [(_definition_name(arg), arg) for arg in args]
+            names = [(name, arg) for name, arg in names if name is not None]
+            if not names:
+                return
+            name, array = names[0]
+            entry = (set(), set())
+
+        variables, parts = entry
+        self._scan(args, variables)
+        parts.update(get_array_value(array, "Objects", None) or ())
+        for faceid in get_array_value(array, "Faces", None) or ():
+            body = self._faces.get('{0}'.format(faceid))
+            if body is not None:
+                parts.add(body)
+        definitions[name] = entry
+
+    # Variables
+
+    def set_variable(self, name, value):
+        """
+        Record the value of a variable, defined or changed in HFSS, marking
+        the parts that depend on it as stale if it changed.
+        """
+        changed = name in self.variables
+        self.variables[name] = frozenset(self.references('{0}'.format(value)) - set([name]))
+
+        if changed:
+            parts = self.affected_by(name)['parts']
+            self.stale.update(parts)
+            self._invalidate(parts)
+
+    def delete_variable(self, name):
+        """
+        Forget a variable deleted in HFSS.
+        """
+        self.variables.pop(name, None)
+
+    def _invalidate(self, partlist):
+        """
+        Invalidate the parts in any caches wrapped by the graph.
+        """
+        oEditor = self.oEditor
+        while isinstance(oEditor, EditorProxy):
+            invalidate = getattr(type(oEditor), 'invalidate', None)
+            if invalidate is not None:
+                invalidate(oEditor, partlist)
+            oEditor = oEditor.oEditor
+
+    def clear_stale(self):
+        """
+        Empty the set of stale parts, once they have been re-queried.
+        """
+        self.stale.clear()
+
+    # Queries
+
+    def dependents(self, name):
+        """
+        Return the variables whose values reference the given variable,
+        directly or through other variables.
+        """
+        users = collections.defaultdict(list)
+        for variable, refs in self.variables.items():
+            for ref in refs:
+                users[ref].append(variable)
+
+        found = collections.OrderedDict()
+        queue = [name]
+        while queue:
+            for variable in users.get(queue.pop(0), ()):
+                if variable not in found and variable != name:
+                    found[variable] = None
+                    queue.append(variable)
+        return list(found)
+
+    def affected_by(self, name):
+        """
+        Return what changing a variable affects.
+
+        Parameters
+        ----------
+        name : str
+            The variable.
+
+        Returns
+        -------
+        affected : dict
+            'variables' lists the variables whose values depend on it,
+            'parts' the parts that depend on it or on them, and
+            'boundaries' and 'setups' those that reference it or them, or
+            are assigned to those parts, sorted.
+        """
+        variables = self.dependents(name)
+        parts = set()
+        for variable in [name] + variables:
+            parts.update(self._users.get(variable, ()))
+
+        names = set([name] + variables)
+        affected = {'variables': variables,
+                    'parts': sorted(parts)}
+        for table in ('boundaries', 'setups'):
+            affected[table] = sorted(
+                definition
+                for definition, (refs, assigned) in getattr(self, table).items()
+                if refs & names or assigned & parts)
+        return affected
+
+    def depends_on(self, part):
+        """
+        Return the variables a part depends on, directly or through the
+        values of other variables, sorted.
+        """
+        names = set()
+        queue = list(self.parts.get(part, ()))
+        while queue:
+            name = queue.pop()
+            if name not in names:
+                names.add(name)
+                queue.extend(self.variables.get(name, ()))
+        return sorted(names)
+
+    def unused_variables(self):
+        """
+        Return the known variables that no part depends on, directly or
+        through other variables.
+        """
+        used = set()
+        queue = [name for name, parts in self._users.items() if parts]
+        for definitions in (self.boundaries, self.setups):
+            for refs, assigned in definitions.values():
+                queue.extend(refs)
+        while queue:
+            name = queue.pop()
+            if name not in used:
+                used.add(name)
+                queue.extend(self.variables.get(name, ()))
+        return [name for name in self.variables if name not in used]
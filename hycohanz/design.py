@@ -7,9 +7,82 @@ At last count there were 2 functions implemented out of 27.
 """
 from __future__ import division, print_function, unicode_literals, absolute_import
 
-def get_module(oDesign, ModuleName):
+# The module handles fetched from the designs most recently used, as
+# [oDesign, {ModuleName: oModule}, DesignName, oProject] entries, most
+# recently used first.  pywin32 COM objects are unhashable, and a new one is
+# returned each time a design is fetched, but they compare equal when they
+# refer to the same design, so the designs are compared with ==.  The cache
+# holds at most MODULE_CACHE_SIZE designs, so that designs no longer used
+# aren't kept alive.  The project of a design is recorded when hycohanz
+# fetches the design from it, and its name only when it is needed to clear
+# the cache.
+MODULE_CACHE_SIZE = 16
+
+_modules = []
+
+_module_cache_enabled = True
+
+def _module_entry(oDesign):
+    """
+    Return the cache entry of a design, adding it if there is none.
+    """
+    for n, entry in enumerate(_modules):
+        if entry[0] is oDesign or entry[0] == oDesign:
+            if n:
+                del _modules[n]
+                _modules.insert(0, entry)
+            return entry
+
+    entry = [oDesign, {}, None, None]
+    _modules.insert(0, entry)
+    del _modules[MODULE_CACHE_SIZE:]
+    return entry
+
+def _remember_project(oDesign, oProject):
+    """
+    Record the project of a design fetched from it, so that its handles can
+    be discarded when the project is closed without asking HFSS.
+    """
+    if _module_cache_enabled:
+        _module_entry(oDesign)[3] = oProject
+
+def _entry_name(entry):
+    """
+    Return the name of the design of a cache entry, or None if it can't be
+    fetched, as when its project has been closed.
+    """
+    if entry[2] is None:
+        try:
+            entry[2] = entry[0].GetName()
+        except Exception:
+            return None
+    return entry[2]
+
+def _in_project(entry, oProject, DesignName):
+    """
+    Return whether a cache entry may be of the design named DesignName of
+    oProject, or of any of its designs if DesignName is a set of names.
+    Entries whose project isn't known are matched by name.
+    """
+    project = entry[3]
+    if project is not None and not (project is oProject or project == oProject):
+        return False
+    if project is not None and isinstance(DesignName, set):
+        return True
+    name = _entry_name(entry)
+    if isinstance(DesignName, set):
+        return name is None or name in DesignName
+    return name is None or name == DesignName
+
+def get_module(oDesign, ModuleName, UseCache=True):
     """
     Get a module handle for the given module.
+
+    Handles are cached for each design, so that hycohanz functions called
+    many times, such as assign_perfect_e(), don't fetch the module on every
+    call.  Cached handles are discarded when their project is closed or
+    their design deleted through hycohanz; call clear_module_cache() if
+    that is done by other means.
     
     Parameters
     ----------
@@ -25,6 +98,9 @@ def get_module(oDesign, ModuleName):
             - "FieldsReporter"
             - "RadField"
             - "UserDefinedSolutionModule"
+    UseCache : bool
+        Whether to use the cache.  If False, the module is fetched from
+        HFSS and the cache left unchanged.  See also enable_module_cache().
         
     Returns
     -------
@@ -32,10 +108,83 @@ def get_module(oDesign, ModuleName):
         Handle to the given module
         
     """
-    oModule = oDesign.GetModule(ModuleName)
+    if not (UseCache and _module_cache_enabled):
+        return oDesign.GetModule(ModuleName)
+
+    modules = _module_entry(oDesign)[1]
+    oModule = modules.get(ModuleName)
+    if oModule is None:
+        oModule = modules[ModuleName] = oDesign.GetModule(ModuleName)
     
     return oModule
 
+def clear_module_cache(oDesign=None, oProject=None, DesignName=None,
+                       oDesktop=None, ProjectName=None):
+    """
+    Discard cached module handles.  With no arguments, the whole cache is
+    cleared.
+    
+    The handles of a project's designs are found by the project they were
+    fetched from through hycohanz, or failing that by name, fetching the
+    name of each such cached design once, and the project's list of
+    designs.  Designs of other projects with the same names are discarded
+    too.  Call this before deleting the designs or closing their project.
+    Nothing is fetched if the cache is empty.
+    
+    Parameters
+    ----------
+    oDesign : pywin32 COMObject, optional
+        Discard the handles of this design.
+    oProject : pywin32 COMObject, optional
+        Discard the handles of the design named DesignName of this project,
+        or of all its designs if DesignName is None.
+    DesignName : str, optional
+        See oProject.
+    oDesktop : pywin32 COMObject, optional
+        With ProjectName, discard the handles of all the designs of the open
+        project named ProjectName.
+    ProjectName : str, optional
+        See oDesktop.
+        
+    Returns
+    -------
+    None
+    
+    """
+    if oDesign is None and oProject is None and ProjectName is None:
+        del _modules[:]
+        return
+    if not _modules:
+        return
+
+    if oDesign is not None:
+        _modules[:] = [entry for entry in _modules
+                       if not (entry[0] is oDesign or entry[0] == oDesign)]
+
+    if ProjectName is not None:
+        for project in oDesktop.GetProjects():
+            if project.GetName() == ProjectName:
+                oProject = project
+                break
+    if oProject is not None and _modules:
+        if DesignName is None:
+            if all(entry[3] is not None for entry in _modules):
+                DesignName = set()
+            else:
+                DesignName = set(oProject.GetTopDesignList())
+        _modules[:] = [entry for entry in _modules
+                       if not _in_project(entry, oProject, DesignName)]
+
+def enable_module_cache(enabled=True):
+    """
+    Enable or disable the module handle cache for all hycohanz functions.
+    Disabling it also clears it.
+    """
+    global _module_cache_enabled
+    _module_cache_enabled = bool(enabled)
+    if not enabled:
+        del _modules[:]
+
 def set_active_editor(oDesign, editorname="3D Modeler"):
     """
     Set the active editor.
@@ -7,6 +7,8 @@ At last count there were 10 functions implemented out of 31.
 """
 from __future__ import division, print_function, unicode_literals, absolute_import
 
+from hycohanz.design import clear_module_cache
+from hycohanz.material import clear_material_libraries
 from hycohanz.project import get_project_name
 
 def quit_application(oDesktop):
@@ -30,6 +32,8 @@ def quit_application(oDesktop):
     
     """
     oDesktop.QuitApplication()
+    clear_module_cache()
+    clear_material_libraries()
 
 def new_project(oDesktop):
     """
@@ -66,6 +70,8 @@ def close_project_byname(oDesktop, projectname):
     None
     
     """
+    clear_module_cache(oDesktop=oDesktop, ProjectName=projectname)
+    clear_material_libraries(ProjectName=projectname)
     oDesktop.CloseProject(projectname)
 
 def get_active_project(oDesktop):
@@ -101,6 +107,8 @@ def close_project_byhandle(oDesktop, oProject):
     None
     
     """
+    clear_module_cache(oProject=oProject)
+    clear_material_libraries(oProject)
     oDesktop.CloseProject(get_project_name(oProject))
 
 def close_current_project(oDesktop):
@@ -119,6 +127,8 @@ def close_current_project(oDesktop):
     """
     oProject = get_active_project(oDesktop)
     projectname = get_project_name(oProject)
+    clear_module_cache(oProject=oProject)
+    clear_material_libraries(oProject)
     oDesktop.CloseProject(projectname)
 
 def get_projects(oDesktop):
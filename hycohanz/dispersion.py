@@ -0,0 +1,403 @@
+# -*- coding: utf-8 -*-
+"""
+Fitting of dispersive dielectric models to measured permittivity and loss
+tangent, for compact frequency-dependent material definitions.
+
+The models are fitted to many materials at once, given as the rows of
+arrays sampled at the same frequencies, and the fitted permittivity and
+loss tangent are emitted as HFSS expressions of Freq, in Hz, for
+add_materials().
+
+Example Usage
+-------------
+>>> import numpy as np
+>>> import hycohanz as hfss
+>>> freq = np.logspace(9, 11, 41)
+>>> x = freq/20e9
+>>> eps = 3.5 + 0.4/(1 + x**2)
+>>> tand = 0.4*x/(1 + x**2)/eps
+>>> fit = hfss.fit_debye(freq, eps, tand)
+>>> print(fit.expressions()[0])
+3.5 + 0.4/(1 + (Freq/2e+10)^2)
+>>> bool(fit.rms_error[0] < 1e-6)
+True
+>>> [oAnsoftApp, oDesktop] = hfss.setup_interface()
+>>> oProject = hfss.new_project(oDesktop)
+>>> hfss.add_materials(oProject, fit.materials(["Substrate"]))['created']
+['Substrate']
+
+"""
+
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import numpy as np
+
+from hycohanz.expression import (Expression,
+                                 function,
+                                 ln)
+
+def _compact(value):
+    """
+    Return a number rounded to 6 significant digits, as an HFSS expression
+    string.
+    """
+    return '{0:.6g}'.format(value)
+
+def _inputs(freq, permittivity, loss_tangent):
+    """
+    Return the frequencies as a vector, and the real and imaginary parts of
+    the measured permittivity as (materials, frequencies) arrays.
+    """
+    freq = np.asarray(freq, dtype=float)
+    eps1 = np.atleast_2d(np.asarray(permittivity, dtype=float))
+    tand = np.atleast_2d(np.asarray(loss_tangent, dtype=float))
+    if freq.ndim != 1 or eps1.shape[-1] != len(freq) or tand.shape[-1] != len(freq):
+        raise ValueError('The permittivity and loss tangent must be sampled at the '
+                         'frequencies, along their last axis')
+    eps1, tand = np.broadcast_arrays(eps1, tand)
+    return freq, eps1, eps1*tand
+
+def _weights(eps1, eps2):
+    """
+    Return the weight of the imaginary part of each material's
+    permittivity, so that its relative error counts as much as the real
+    part's.
+    """
+    return np.mean(np.abs(eps1), axis=1)/np.maximum(np.mean(np.abs(eps2), axis=1), 1e-12)
+
+def _solve(re, im, eps1, eps2, weights, active=None):
+    """
+    Solve the weighted least-squares problems for the coefficients of the
+    basis functions, for all materials at once.
+
+    Parameters
+    ----------
+    re, im : ndarray
+        The real part, and minus the imaginary part, of the basis
+        functions, shaped (..., materials or 1, frequencies, coefficients).
+    eps1, eps2 : ndarray
+        The measured real part and minus the imaginary part, shaped
+        (materials, frequencies).
+    weights : ndarray
+        The weight of the imaginary part of each material.
+    active : ndarray of bool, optional
+        The coefficients to use for each material, shaped (materials,
+        coefficients); the others are zero.
+
+    Returns
+    -------
+    coefficients : ndarray
+        Shaped (..., materials, coefficients).
+    residuals : ndarray
+        The weighted sums of squared errors, shaped (..., materials).
+    """
+    w2 = weights**2
+    ret = np.swapaxes(re, -1, -2)
+    imt = np.swapaxes(im, -1, -2)
+    gram = np.matmul(ret, re) + w2[:, None, None]*np.matmul(imt, im)
+    rhs = (np.matmul(ret, eps1[:, :, None]) +
+           w2[:, None, None]*np.matmul(imt, eps2[:, :, None]))[..., 0]
+
+    if active is not None:
+        gram = gram*(active[:, :, None] & active[:, None, :])
+        gram = gram + np.eye(gram.shape[-1])*~active[:, :, None]
+        rhs = rhs*active
+
+    coefficients = np.linalg.solve(gram, rhs[..., None])[..., 0]
+    norms = np.sum(eps1**2, axis=1) + w2*np.sum(eps2**2, axis=1)
+    residuals = (norms - 2*np.sum(coefficients*rhs, axis=-1) +
+                 np.sum(coefficients*np.matmul(gram, coefficients[..., None])[..., 0],
+                        axis=-1))
+    return coefficients, residuals
+
+def _debye_basis(freq, poles):
+    """
+    Return the real and minus imaginary parts of [1, 1/(1 + j f/fp)...].
+    """
+    x = freq[..., :, None]/poles[..., None, :]
+    ones = np.ones(x.shape[:-1] + (1,))
+    re = np.concatenate([ones, 1/(1 + x**2)], axis=-1)
+    im = np.concatenate([0*ones, x/(1 + x**2)], axis=-1)
+    return re, im
+
+class DispersionFit(object):
+    """
+    A dispersive model fitted to the permittivity of one or more materials.
+
+    Attributes
+    ----------
+    model : str
+        'debye', 'multipole_debye', or 'djordjevic_sarkar'.
+    parameters : dict of ndarray
+        The fitted parameters, with one row per material: 'eps_inf', the
+        permittivity at infinite frequency, and 'delta_eps' the change in
+        permittivity of each pole (or of the Djordjevic-Sarkar term), and
+        'poles', the relaxation frequency of each pole in Hz, or
+        'corners', the lower and upper corner frequencies in Hz.
+    rms_error : ndarray
+        The RMS relative error of the fitted complex permittivity over the
+        measured frequencies, for each material.
+    max_error : ndarray
+        The largest relative error of the fitted complex permittivity, for
+        each material.
+    max_loss_tangent_error : ndarray
+        The largest absolute error of the fitted loss tangent, for each
+        material.
+    """
+    def __init__(self, model, parameters, freq, eps1, eps2):
+        self.model = model
+        self.parameters = parameters
+
+        measured = eps1 - 1j*eps2
+        fitted = self.permittivity(freq)
+        error = np.abs(fitted - measured)/np.abs(measured)
+        self.rms_error = np.sqrt(np.mean(error**2, axis=1))
+        self.max_error = np.max(error, axis=1)
+        self.max_loss_tangent_error = np.max(np.abs(-fitted.imag/fitted.real - eps2/eps1),
+                                             axis=1)
+
+    def __len__(self):
+        return len(self.parameters['eps_inf'])
+
+    def __repr__(self):
+        return '<DispersionFit {0} of {1} materials, worst RMS error {2:.3g}>'.format(
+            self.model, len(self), np.max(self.rms_error))
+
+    def permittivity(self, freq):
+        """
+        Return the fitted complex relative permittivity, eps' - j eps'',
+        of each material at the given frequencies in Hz, shaped (materials,
+        frequencies).
+        """
+        freq = np.asarray(freq, dtype=float)
+        eps_inf = self.parameters['eps_inf'][:, None]
+        delta = self.parameters['delta_eps']
+        if self.model == 'djordjevic_sarkar':
+            f1, f2 = self.parameters['corners']
+            return eps_inf + (delta[:, 0, None]/np.log10(f2/f1)*
+                              np.log10((f2 + 1j*freq)/(f1 + 1j*freq)))
+        else:
+            poles = self.parameters['poles']
+            return eps_inf + np.sum(delta[:, :, None]/
+                                    (1 + 1j*freq/poles[..., None]), axis=1)
+
+    def expressions(self, index=0):
+        """
+        Return HFSS expressions of Freq, in Hz, for the fitted permittivity
+        and loss tangent of a material.
+
+        Parameters
+        ----------
+        index : int
+            The material, as the row of the data fitted.
+
+        Returns
+        -------
+        permittivity, loss_tangent : str
+        """
+        freq = Expression('Freq')
+        eps1 = Expression(_compact(self.parameters['eps_inf'][index]))
+        eps2 = Expression(0)
+        delta = self.parameters['delta_eps'][index]
+
+        if self.model == 'djordjevic_sarkar':
+            f1, f2 = [_compact(f) for f in self.parameters['corners']]
+            k = delta[0]/np.log10(float(f2)/float(f1))
+            eps1 = eps1 + Expression(_compact(k/(2*np.log(10))))*ln(
+                (Expression(f2)**2 + freq**2)/(Expression(f1)**2 + freq**2))
+            eps2 = Expression(_compact(k/np.log(10)))*(function('atan', freq/f1) -
+                                                       function('atan', freq/f2))
+        else:
+            poles = np.broadcast_to(self.parameters['poles'], self.parameters['delta_eps'].shape)
+            for d, pole in zip(delta, poles[index]):
+                if d == 0:
+                    continue
+                x = freq/_compact(pole)
+                eps1 = eps1 + Expression(_compact(d))/(1 + x**2)
+                eps2 = eps2 + Expression(_compact(d))*x/(1 + x**2)
+
+        return eps1.expr, (eps2/eps1).expr
+
+    def materials(self, names):
+        """
+        Return material definitions for add_materials(), with the fitted
+        permittivity and loss tangent as expressions of Freq.
+
+        Parameters
+        ----------
+        names : list of str
+            The name of each material fitted, in order.
+
+        Returns
+        -------
+        materials : list of dict
+        """
+        if len(names) != len(self):
+            raise ValueError('{0} names given for {1} materials'.format(len(names), len(self)))
+
+        materials = []
+        for index, name in enumerate(names):
+            permittivity, loss_tangent = self.expressions(index)
+            materials.append({'name': name,
+                              'rel_permittivity': permittivity,
+                              'diel_loss_tan': loss_tangent})
+        return materials
+
+def fit_debye(freq, permittivity, loss_tangent, NumCandidates=121):
+    """
+    Fit a single-pole Debye model,
+    eps(f) = eps_inf + delta_eps/(1 + j f/f_pole), to measured data.
+
+    The pole frequency is found by a search over NumCandidates frequencies
+    spaced logarithmically from a hundredth of the lowest measured
+    frequency to a hundred times the highest, then refined around the best
+    one for each material and interpolated, and
+    eps_inf and delta_eps by linear least squares, for all the materials at
+    once.
+
+    Parameters
+    ----------
+    freq : array_like
+        The measured frequencies in Hz.
+    permittivity : array_like
+        The measured real relative permittivity, with one row per material
+        (or a vector for one material), sampled at freq.
+    loss_tangent : array_like
+        The measured loss tangent, shaped like permittivity.
+    NumCandidates : int
+        The number of pole frequencies tried in the first stage of the
+        search, and about half as many in the second.
+
+    Returns
+    -------
+    fit : DispersionFit
+    """
+    freq, eps1, eps2 = _inputs(freq, permittivity, loss_tangent)
+    weights = _weights(eps1, eps2)
+    materials = np.arange(len(eps1))
+
+    logpoles = np.linspace(np.log10(freq.min()) - 2, np.log10(freq.max()) + 2, NumCandidates)
+    step = logpoles[1] - logpoles[0]
+    re, im = _debye_basis(freq, 10**logpoles[:, None, None])
+    coefficients, residuals = _solve(re, im, eps1, eps2, weights)
+    best = logpoles[np.argmin(residuals, axis=0)]
+
+    # Refine each material's pole within one step of its best candidate.
+    logpoles = best[None, :] + np.linspace(-step, step, NumCandidates//4*2 + 1)[:, None]
+    re, im = _debye_basis(freq, 10**logpoles[:, :, None])
+    coefficients, residuals = _solve(re, im, eps1, eps2, weights)
+    choice = np.clip(np.argmin(residuals, axis=0), 1, len(logpoles) - 2)
+
+    # Place the pole at the vertex of the parabola through the residuals
+    # around the best candidate, and solve there.
+    r0, r1, r2 = [residuals[choice + k, materials] for k in (-1, 0, 1)]
+    curvature = r0 - 2*r1 + r2
+    offset = np.where(curvature > 0, 0.5*(r0 - r2)/np.where(curvature > 0, curvature, 1), 0)
+    logpole = logpoles[choice, materials] + np.clip(offset, -1, 1)*(logpoles[1] - logpoles[0])
+    poles = 10**logpole
+    re, im = _debye_basis(freq, poles[:, None])
+    coefficients, residuals = _solve(re, im, eps1, eps2, weights)
+    return DispersionFit('debye',
+                         {'eps_inf': coefficients[:, 0],
+                          'delta_eps': coefficients[:, 1:],
+                          'poles': poles[:, None]},
+                         freq, eps1, eps2)
+
+def fit_multipole_debye(freq, permittivity, loss_tangent, poles=None, PolesPerDecade=1):
+    """
+    Fit a multi-pole Debye model,
+    eps(f) = eps_inf + sum(delta_eps_k/(1 + j f/f_k)), to measured data.
+
+    With the pole frequencies fixed, the model is linear in eps_inf and
+    delta_eps, which are found by least squares for all the materials at
+    once.  Poles fitted with a negative delta_eps, which isn't physical,
+    are dropped and the rest refitted, and dropped poles are left out of
+    the expressions.
+
+    Parameters
+    ----------
+    freq : array_like
+        The measured frequencies in Hz.
+    permittivity : array_like
+        The measured real relative permittivity, with one row per material
+        (or a vector for one material), sampled at freq.
+    loss_tangent : array_like
+        The measured loss tangent, shaped like permittivity.
+    poles : array_like, optional
+        The pole frequencies in Hz.  By default, PolesPerDecade poles per
+        decade spanning the measured frequencies.
+    PolesPerDecade : float
+        The density of the default poles.
+
+    Returns
+    -------
+    fit : DispersionFit
+    """
+    freq, eps1, eps2 = _inputs(freq, permittivity, loss_tangent)
+    if poles is None:
+        low, high = np.log10(freq.min()), np.log10(freq.max())
+        poles = np.logspace(low, high, max(int(np.ceil((high - low)*PolesPerDecade)), 1) + 1)
+    poles = np.asarray(poles, dtype=float)
+
+    weights = _weights(eps1, eps2)
+    re, im = _debye_basis(freq, poles[None, :])
+    active = np.ones((len(eps1), len(poles) + 1), dtype=bool)
+    for iteration in range(len(poles)):
+        coefficients, residuals = _solve(re, im, eps1, eps2, weights, active)
+        negative = (coefficients[:, 1:] < 0) & active[:, 1:]
+        if not negative.any():
+            break
+        # Drop the most negative pole of each material with any.
+        rows = np.flatnonzero(negative.any(axis=1))
+        active[rows, 1 + np.argmin(coefficients[rows, 1:], axis=1)] = False
+    else:
+        coefficients, residuals = _solve(re, im, eps1, eps2, weights, active)
+
+    return DispersionFit('multipole_debye',
+                         {'eps_inf': coefficients[:, 0],
+                          'delta_eps': coefficients[:, 1:]*active[:, 1:],
+                          'poles': poles},
+                         freq, eps1, eps2)
+
+def fit_djordjevic_sarkar(freq, permittivity, loss_tangent,
+                          LowerFrequency=1e3, UpperFrequency=1e13):
+    """
+    Fit the Djordjevic-Sarkar wideband Debye model,
+    eps(f) = eps_inf + delta_eps/log10(f2/f1)*log10((f2 + j f)/(f1 + j f)),
+    to measured data.
+
+    The model has a nearly constant loss tangent between the corner
+    frequencies f1 and f2, as most laminates do.  With the corners fixed,
+    eps_inf and delta_eps are found by least squares for all the materials
+    at once.
+
+    Parameters
+    ----------
+    freq : array_like
+        The measured frequencies in Hz.
+    permittivity : array_like
+        The measured real relative permittivity, with one row per material
+        (or a vector for one material), sampled at freq.
+    loss_tangent : array_like
+        The measured loss tangent, shaped like permittivity.
+    LowerFrequency, UpperFrequency : float
+        The corner frequencies f1 and f2 in Hz.
+
+    Returns
+    -------
+    fit : DispersionFit
+    """
+    freq, eps1, eps2 = _inputs(freq, permittivity, loss_tangent)
+    f1, f2 = float(LowerFrequency), float(UpperFrequency)
+    scale = np.log10(f2/f1)
+    re = np.column_stack([np.ones_like(freq),
+                          0.5*np.log10((f2**2 + freq**2)/(f1**2 + freq**2))/scale])[None]
+    im = np.column_stack([np.zeros_like(freq),
+                          (np.arctan(freq/f1) - np.arctan(freq/f2))/np.log(10)/scale])[None]
+
+    coefficients, residuals = _solve(re, im, eps1, eps2, _weights(eps1, eps2))
+    return DispersionFit('djordjevic_sarkar',
+                         {'eps_inf': coefficients[:, 0],
+                          'delta_eps': coefficients[:, 1:],
+                          'corners': np.array([f1, f2])},
+                         freq, eps1, eps2)
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Support for objects that stand in for an HFSS editor.
+
+An editor proxy wraps an HFSS editor and is passed to hycohanz functions in
+its place.  It intercepts the editor methods it is interested in and
+forwards everything else to the wrapped editor unchanged.
+"""
+
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+class EditorProxy(object):
+    """
+    Base class for HFSS editor proxies.
+
+    Any attribute not defined by the subclass is looked up on the wrapped
+    editor, so a proxy can be used wherever hycohanz expects an oEditor,
+    including as the editor wrapped by another proxy.
+
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor to wrap.
+
+    Attributes
+    ----------
+    oEditor : pywin32 COMObject
+        The wrapped HFSS editor.
+    """
+    def __init__(self, oEditor):
+        self.oEditor = oEditor
+
+    def __getattr__(self, name):
+        if name == 'oEditor':
+            raise AttributeError(name)
+
+        return getattr(self.oEditor, name)
+
+def get_array_value(array, key, default=None):
+    """
+    Return the value following "key:=" in an HFSS named array such as
+    ["NAME:Selections", "Selections:=", "Box1,Box2"].
+
+    Parameters
+    ----------
+    array : list
+        The HFSS named array.
+    key : str
+        The key, without the trailing ":=".
+    default : object
+        The value returned if the key is absent.
+
+    Returns
+    -------
+    value : object
+        The value following the key.
+    """
+    try:
+        return array[array.index(key + ":=") + 1]
+    except ValueError:
+        return default
+
+def split_selections(selections):
+    """
+    Split a comma-separated HFSS selection string into a list of part names.
+    """
+    if not selections:
+        return []
+
+    return [part.strip() for part in selections.split(',') if part.strip()]
+
+def get_partlist(array, key="Selections"):
+    """
+    Return the list of part names given under key in an HFSS named array.
+    """
+    return split_selections(get_array_value(array, key, ""))
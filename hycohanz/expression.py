@@ -2,94 +2,894 @@
 """
 The HFSS expression generator.
 
+Expressions are held as immutable trees of nodes, and rendered to HFSS
+expression strings only when the string is needed, with only the
+parentheses that operator precedence requires.  Operations on numeric
+constants are folded as the tree is built.
+
+Expressions can also be evaluated locally, with compile() or evaluate(),
+over numbers or NumPy arrays of variable values.
+
+>>> x = Expression('x')
+>>> (x + 1 + 2).expr
+'x + 3'
+>>> ((x - 1)*(x + 1)/2).expr
+'(x - 1)*(x + 1)/2'
+>>> (-(x**2) - x*(-3)).expr
+'-x^2 - x*(-3)'
+>>> print((sqrt(x**2 + 1) + '2mm').evaluate({'x': '0.75'}))
+1.252
+
 """
 
 from __future__ import division, print_function, unicode_literals, absolute_import
 
+import math
+import numbers
+import operator
+import re
 import warnings
 
+import numpy as np
+
 warnings.simplefilter('default')
 
+# Operator precedence.  Leaves whose text isn't known to be atomic get
+# OPAQUE, and so are always parenthesized.
+OPAQUE = 0
+ADD = 1
+MUL = 2
+NEG = 3
+POW = 4
+ATOM = 5
+
+BINARY_OPERATORS = {'+': (ADD, ' + ', operator.add),
+                    '-': (ADD, ' - ', operator.sub),
+                    '*': (MUL, '*', operator.mul),
+                    '/': (MUL, '/', operator.truediv),
+                    '^': (POW, '^', operator.pow)}
+
+# Operators for which a op (b op' c) == a op b op' c when op' has the same
+# precedence as op.
+ASSOCIATIVE = frozenset(['+', '*'])
+
+_NUMBER = re.compile(r'^[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?$')
+_QUANTITY = re.compile(r'^([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*([A-Za-z]+)$')
+_NAME = re.compile(r'^\$?[A-Za-z_]\w*$')
+_INTEGER = re.compile(r'^[-+]?\d+$')
+
+# The tokens of an HFSS expression: a number with optional units, a
+# variable or function name, or an operator.  Anything else is an error.
+_TOKEN = re.compile(r'\s*(?:(?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)(?P<units>[A-Za-z_]\w*)?'
+                    r'|(?P<name>\$?[A-Za-z_]\w*)'
+                    r'|(?P<op>[-+*/^(),])'
+                    r'|(?P<error>\S))')
+
+# Scale factors of HFSS units to SI (and angles to radians), used when
+# evaluating.
+UNITS = {'mil': 2.54e-5,
+         'uin': 2.54e-8,
+         'in': 0.0254,
+         'ft': 0.3048,
+         'meter': 1.0,
+         'deg': math.pi/180,
+         'rad': 1.0,
+         'ohm': 1.0,
+         'dB': 1.0}
+for _prefix, _scale in (('', 1.0), ('f', 1e-15), ('p', 1e-12), ('n', 1e-9),
+                        ('u', 1e-6), ('m', 1e-3), ('c', 1e-2), ('k', 1e3),
+                        ('M', 1e6), ('G', 1e9), ('T', 1e12)):
+    for _unit in ('m', 's', 'Hz', 'F', 'H', 'S', 'V', 'A', 'W', 'Ohm'):
+        UNITS.setdefault(_prefix + _unit, _scale)
+# HFSS also accepts units in the wrong case, e.g. 'ghz', where that isn't
+# ambiguous.
+UNITS_NOCASE = {}
+for _unit, _scale in sorted(UNITS.items()):
+    if _unit.lower() not in UNITS:
+        UNITS_NOCASE.setdefault(_unit.lower(), _scale)
+
+# Functions that can be evaluated, with the NumPy functions used.
+FUNCTIONS = {'abs': np.abs,
+             'sqrt': np.sqrt,
+             'exp': np.exp,
+             'ln': np.log,
+             'log': np.log10,
+             'sin': np.sin,
+             'cos': np.cos,
+             'tan': np.tan,
+             'asin': np.arcsin,
+             'acos': np.arccos,
+             'atan': np.arctan,
+             'atan2': np.arctan2,
+             'sinh': np.sinh,
+             'cosh': np.cosh,
+             'tanh': np.tanh,
+             'pow': np.power,
+             'min': np.minimum,
+             'max': np.maximum,
+             'sgn': np.sign}
+
+class _Leaf(object):
+    """
+    A number, variable, or opaque piece of expression text.
+    """
+    __slots__ = ('text', 'value', 'prec')
+
+    def __init__(self, text, value=None, prec=ATOM):
+        self.text = text
+        self.value = value
+        self.prec = prec
+
+class _Neg(object):
+    """
+    The negation of an expression.
+    """
+    __slots__ = ('operand',)
+    prec = NEG
+    value = None
+
+    def __init__(self, operand):
+        self.operand = operand
+
+class _Binary(object):
+    """
+    A binary operation on two expressions.
+    """
+    __slots__ = ('op', 'left', 'right', 'prec')
+    value = None
+
+    def __init__(self, op, left, right):
+        self.op = op
+        self.left = left
+        self.right = right
+        self.prec = BINARY_OPERATORS[op][0]
+
+class _Call(object):
+    """
+    A function applied to expressions.
+    """
+    __slots__ = ('name', 'args')
+    prec = ATOM
+    value = None
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+def _number(value):
+    """
+    Return a leaf for a number.
+    """
+    if isinstance(value, float):
+        text = repr(float(value))
+    else:
+        text = '{0}'.format(value)
+    return _Leaf(text, value, NEG if value < 0 else ATOM)
+
+def _text(text):
+    """
+    Return a leaf for a piece of expression text.
+    """
+    text = text.strip()
+    if _NUMBER.match(text):
+        value = int(text) if _INTEGER.match(text) else float(text)
+        return _Leaf(text, value, NEG if text.startswith('-') else ATOM)
+    elif _NAME.match(text) or (_QUANTITY.match(text) and text[0] not in '-+'):
+        return _Leaf(text)
+    else:
+        try:
+            return _Parser(text).parse()
+        except ExpressionSyntaxError:
+            return _Leaf(text, None, OPAQUE)
+
+def _node(value):
+    """
+    Return the node for an Expression, number, or string.
+    """
+    if isinstance(value, Expression):
+        if value._node is None:
+            value._node = _text(value._expr)
+        return value._node
+    elif isinstance(value, numbers.Real) and not isinstance(value, bool):
+        return _Leaf('{0}'.format(value), value, NEG if value < 0 else ATOM)
+    else:
+        return _text('{0}'.format(value))
+
+def _fold(op, a, b):
+    """
+    Return op applied to the numbers a and b, or None if it can't be
+    computed exactly enough to fold.
+    """
+    if op == '^' and abs(b) > 64:
+        return None
+    try:
+        result = BINARY_OPERATORS[op][2](a, b)
+    except (ArithmeticError, ValueError):
+        return None
+    if isinstance(result, complex):
+        return None
+    if (isinstance(result, float) and result.is_integer() and
+            isinstance(a, numbers.Integral) and isinstance(b, numbers.Integral)):
+        result = int(result)
+    return result
+
+def _offset(base, value):
+    """
+    Return base + value, as a subtraction if value is negative.
+    """
+    if value == 0:
+        return base
+    elif value < 0:
+        return _Binary('-', base, _number(-value))
+    else:
+        return _Binary('+', base, _number(value))
+
+def _binary(op, left, right):
+    """
+    Return the node for left op right, folding numeric constants.
+    """
+    a, b = left.value, right.value
+    if a is not None and b is not None:
+        result = _fold(op, a, b)
+        if result is not None:
+            return _number(result)
+
+    if b is not None:
+        if (op in '+-' and b == 0) or (op in '*/^' and b == 1):
+            return left
+        if op in '+-':
+            if op == '-':
+                b = -b
+            # (x + c1) + c2 = x + (c1 + c2)
+            if (isinstance(left, _Binary) and left.op in '+-' and
+                    left.right.value is not None):
+                c = left.right.value if left.op == '+' else -left.right.value
+                return _offset(left.left, c + b)
+            return _offset(left, b)
+        if op == '*' and isinstance(left, _Binary) and left.op == '*':
+            # (x*c1)*c2 = x*(c1*c2)
+            c = left.right.value
+            if c is not None:
+                return _binary('*', left.left, _number(c*b))
+    elif a is not None:
+        if (op == '+' and a == 0) or (op == '*' and a == 1):
+            return right
+
+    if op in '+-' and isinstance(right, _Neg):
+        # x + -y = x - y, x - -y = x + y
+        return _Binary('-' if op == '+' else '+', left, right.operand)
+
+    return _Binary(op, left, right)
+
+def _negate(operand):
+    """
+    Return the node for -operand.
+    """
+    if operand.value is not None:
+        return _number(-operand.value)
+    elif isinstance(operand, _Neg):
+        return operand.operand
+    else:
+        return _Neg(operand)
+
+def _names(node):
+    """
+    Return the set of variable names referenced by a node.
+    """
+    names = set()
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, _Leaf):
+            if item.value is None and _NAME.match(item.text):
+                names.add(item.text)
+        elif isinstance(item, _Neg):
+            stack.append(item.operand)
+        elif isinstance(item, _Binary):
+            stack.append(item.left)
+            stack.append(item.right)
+        else:
+            stack.extend(item.args)
+    return names
+
+def _substitute(node, replacements):
+    """
+    Return a copy of a node with the subtrees whose ids are in
+    replacements replaced by the mapped nodes.  Subtrees not containing a
+    replacement are shared with the original.
+    """
+    if id(node) in replacements:
+        return replacements[id(node)]
+
+    done = {}
+    stack = [(node, False)]
+    while stack:
+        item, ready = stack.pop()
+        if id(item) in replacements:
+            done[id(item)] = replacements[id(item)]
+            continue
+        if isinstance(item, _Leaf):
+            done[id(item)] = item
+            continue
+
+        if isinstance(item, _Neg):
+            children = [item.operand]
+        elif isinstance(item, _Binary):
+            children = [item.left, item.right]
+        else:
+            children = list(item.args)
+
+        if not ready:
+            stack.append((item, True))
+            stack.extend((child, False) for child in children)
+            continue
+
+        new = [done[id(child)] for child in children]
+        if all(a is b for a, b in zip(new, children)):
+            done[id(item)] = item
+        elif isinstance(item, _Neg):
+            done[id(item)] = _Neg(new[0])
+        elif isinstance(item, _Binary):
+            done[id(item)] = _Binary(item.op, new[0], new[1])
+        else:
+            done[id(item)] = _Call(item.name, tuple(new))
+
+    return done[id(node)]
+
+def _render(node):
+    """
+    Return the HFSS expression string for a node.
+
+    The tree is walked with an explicit stack, so that expressions built
+    from long chains of operations don't exhaust the recursion limit, and
+    the pieces are joined once, in linear time.
+    """
+    if isinstance(node, _Leaf):
+        return node.text
+
+    pieces = []
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        if not isinstance(item, (_Leaf, _Neg, _Binary, _Call)):
+            pieces.append(item)
+        elif isinstance(item, _Leaf):
+            pieces.append(item.text)
+        elif isinstance(item, _Call):
+            pieces.append(item.name + '(')
+            stack.append(')')
+            for n, arg in enumerate(reversed(item.args)):
+                if n:
+                    stack.append(', ')
+                stack.append(arg)
+        elif isinstance(item, _Neg):
+            pieces.append('-')
+            if item.operand.prec < NEG:
+                stack.extend([')', item.operand, '('])
+            else:
+                stack.append(item.operand)
+        else:
+            prec = item.prec
+            left, right = item.left, item.right
+
+            if right.prec < prec or right.prec == NEG or (
+                    right.prec == prec and item.op not in ASSOCIATIVE):
+                stack.extend([')', right, '('])
+            else:
+                stack.append(right)
+
+            stack.append(BINARY_OPERATORS[item.op][1])
+
+            if left.prec < prec or (left.prec == prec and item.op == '^'):
+                stack.extend([')', left, '('])
+            else:
+                stack.append(left)
+
+    return ''.join(pieces)
+
+def _quantity(text):
+    """
+    Return the SI value of a number with HFSS units, e.g. '2.5mm'.
+    """
+    match = _QUANTITY.match(text)
+    if match is None:
+        return None
+    number, unit = match.groups()
+    scale = UNITS.get(unit) or UNITS_NOCASE.get(unit.lower())
+    if scale is None:
+        raise ValueError('Unknown units in ' + text)
+    return float(number)*scale
+
+# Compiled variable value strings, which are evaluated many times over.
+_COMPILED = {}
+_COMPILED_SIZE = 4096
+
+def _compiled_text(text):
+    try:
+        return _COMPILED[text]
+    except KeyError:
+        if len(_COMPILED) >= _COMPILED_SIZE:
+            _COMPILED.clear()
+        evaluate = _COMPILED[text] = Expression(text).compile()
+        return evaluate
+
+def _lookup(variables, name, active):
+    """
+    Return the value of a variable for evaluation.  Values given as strings
+    or Expressions are evaluated in turn.
+    """
+    try:
+        value = variables[name]
+    except KeyError:
+        raise KeyError('Undefined variable ' + name)
+    except TypeError:
+        if variables is None:
+            raise KeyError('Undefined variable ' + name)
+        raise
+
+    if isinstance(value, (Expression, str, bytes)):
+        if name in active:
+            raise ValueError('Circular definition of variable ' + name)
+        if isinstance(value, Expression):
+            evaluate = value.compile()
+        else:
+            evaluate = _compiled_text(value)
+        return evaluate(variables, active + (name,))
+    elif isinstance(value, (list, tuple, np.ndarray)):
+        return np.asarray(value, dtype=float)
+    else:
+        return value
+
+def _compile(node):
+    """
+    Return a Python function evaluating a node, with NumPy for functions.
+
+    The function is generated as one statement per operation, so that the
+    long chains of operations that don't fit Python's expression nesting
+    limits still compile.
+    """
+    namespace = {'_lookup': _lookup}
+    variables = {}
+    lines = []
+    values = {}
+
+    stack = [(node, False)]
+    while stack:
+        item, ready = stack.pop()
+        if id(item) in values:
+            continue
+
+        if isinstance(item, _Leaf):
+            if item.value is not None:
+                values[id(item)] = repr(float(item.value))
+            elif _NAME.match(item.text):
+                if item.text not in variables:
+                    variables[item.text] = 'v{0}'.format(len(variables))
+                    lines.append('    {0} = _lookup(variables, {1!r}, _active)'.format(
+                        variables[item.text], item.text))
+                values[id(item)] = variables[item.text]
+            else:
+                value = _quantity(item.text)
+                if value is None:
+                    raise ValueError("Can't evaluate " + repr(item.text))
+                values[id(item)] = repr(value)
+            continue
+
+        if isinstance(item, _Neg):
+            children = [item.operand]
+        elif isinstance(item, _Binary):
+            children = [item.left, item.right]
+        else:
+            children = list(item.args)
+
+        if not ready:
+            stack.append((item, True))
+            stack.extend((child, False) for child in reversed(children))
+            continue
+
+        args = [values[id(child)] for child in children]
+        if isinstance(item, _Neg):
+            source = '-' + args[0]
+        elif isinstance(item, _Binary):
+            op = '**' if item.op == '^' else item.op
+            source = args[0] + ' ' + op + ' ' + args[1]
+        else:
+            try:
+                namespace['_' + item.name] = FUNCTIONS[item.name]
+            except KeyError:
+                raise ValueError("Can't evaluate function " + item.name)
+            source = '_' + item.name + '(' + ', '.join(args) + ')'
+
+        values[id(item)] = 't{0}'.format(len(lines))
+        lines.append('    {0} = {1}'.format(values[id(item)], source))
+
+    source = ('def evaluate(variables=None, _active=()):\n' +
+              ''.join(line + '\n' for line in lines) +
+              '    return ' + values[id(node)] + '\n')
+    exec(compile(source, '<expression>', 'exec'), namespace)
+    return namespace['evaluate']
+
+class ExpressionSyntaxError(ValueError):
+    """
+    An HFSS expression that can't be parsed.
+
+    Attributes
+    ----------
+    text : str
+        The expression.
+    position : int
+        The index in text of the error.
+    """
+    def __init__(self, message, text, position):
+        super(ExpressionSyntaxError, self).__init__(
+            '{0} at position {1}\n  {2}\n  {3}^'.format(message, position, text,
+                                                     ' '*position))
+        self.text = text
+        self.position = position
+
+class _Parser(object):
+    """
+    A precedence-climbing parser of HFSS expressions into nodes.
+    """
+    __slots__ = ('text', 'tokens', 'index')
+
+    def __init__(self, text):
+        self.text = text
+        self.tokens = tokens = []
+        append = tokens.append
+        for match in _TOKEN.finditer(text):
+            kind = match.lastgroup
+            value = match.group(kind)
+            if kind == 'op':
+                append((value, None, match.start(kind)))
+            elif kind == 'units':
+                start = match.start('number')
+                append(('leaf', _Leaf(text[start:match.end()]), start))
+            elif kind == 'number':
+                value = int(value) if value.isdigit() else float(value)
+                append(('leaf', _Leaf(match.group(kind), value), match.start(kind)))
+            else:
+                append((kind, value, match.start(kind)))
+        append(('end', None, len(text)))
+        self.index = 0
+
+    def error(self, message, token=None):
+        kind, value, position = token or self.tokens[self.index]
+        if kind == 'error':
+            message = 'Unsupported character ' + repr(value)
+        elif kind == 'end':
+            message = 'Unexpected end of expression'
+        raise ExpressionSyntaxError(message, self.text, position)
+
+    def describe(self, token):
+        kind, value, position = token
+        if kind == 'leaf':
+            return repr(value.text)
+        elif kind == 'name':
+            return repr(value)
+        else:
+            return repr(kind)
+
+    def expect(self, kind):
+        token = self.tokens[self.index]
+        if token[0] != kind:
+            self.error('Expected {0!r}, got {1}'.format(kind, self.describe(token)))
+        self.index += 1
+
+    def parse(self):
+        try:
+            node = self.binary(ADD)
+        except RuntimeError:
+            raise ExpressionSyntaxError('Expression nested too deeply', self.text, 0)
+        if self.tokens[self.index][0] != 'end':
+            self.error('Unexpected ' + self.describe(self.tokens[self.index]))
+        return node
+
+    def binary(self, minprec):
+        left = self.unary()
+        while True:
+            op = self.tokens[self.index][0]
+            if op not in '+-*/' or BINARY_OPERATORS[op][0] < minprec:
+                return left
+            self.index += 1
+            left = _binary(op, left, self.binary(BINARY_OPERATORS[op][0] + 1))
+
+    def unary(self):
+        op = self.tokens[self.index][0]
+        if op == '-':
+            self.index += 1
+            return _negate(self.unary())
+        elif op == '+':
+            self.index += 1
+            return self.unary()
+        else:
+            return self.power()
+
+    def power(self):
+        base = self.primary()
+        if self.tokens[self.index][0] == '^':
+            self.index += 1
+            return _binary('^', base, self.unary())
+        return base
+
+    def primary(self):
+        token = kind, value, position = self.tokens[self.index]
+        self.index += 1
+        if kind == 'leaf':
+            return value
+        elif kind == 'name':
+            if self.tokens[self.index][0] != '(':
+                return _Leaf(value)
+            self.index += 1
+            args = []
+            if self.tokens[self.index][0] != ')':
+                args.append(self.binary(ADD))
+                while self.tokens[self.index][0] == ',':
+                    self.index += 1
+                    args.append(self.binary(ADD))
+            self.expect(')')
+            return _Call(value, tuple(args))
+        elif kind == '(':
+            node = self.binary(ADD)
+            self.expect(')')
+            return node
+        else:
+            self.error('Expected an operand, got ' + self.describe(token), token)
+
+def parse_expression(text):
+    """
+    Parse an HFSS expression string, such as a project variable's value,
+    into an Expression.
+
+    Numbers with units, variables, $project variables, function calls,
+    parentheses, and the operators + - * / ^ are supported.  Operations on
+    numeric constants are folded.
+
+    Parameters
+    ----------
+    text : str
+        The expression.
+
+    Returns
+    -------
+    expression : Expression
+
+    Raises
+    ------
+    ExpressionSyntaxError
+        A ValueError giving the position of unsupported syntax.
+
+    Examples
+    --------
+    >>> parse_expression('$w/2 + sin(theta*1deg)^2').expr
+    '$w/2 + sin(theta*1deg)^2'
+    """
+    return Expression._from_node(_Parser('{0}'.format(text)).parse())
+
+def function(name, *args):
+    """
+    Return the Expression applying an HFSS function, such as 'sin' or
+    'atan2', to the given arguments.
+    """
+    return Expression._from_node(_Call(name, tuple(_node(arg) for arg in args)))
+
+def sin(x):
+    return function('sin', x)
+
+def cos(x):
+    return function('cos', x)
+
+def tan(x):
+    return function('tan', x)
+
+def sqrt(x):
+    return function('sqrt', x)
+
+def exp(x):
+    return function('exp', x)
+
+def ln(x):
+    return function('ln', x)
+
 class Expression(object):
     """
     An HFSS expression.
-    
-    This object enables manipulation of HFSS expressions using Python 
-    arithmetic operators, which is much more convenient than manipulating 
-    their string representation.
-    
+
+    This object enables manipulation of HFSS expressions using Python
+    arithmetic operators, which is much more convenient than manipulating
+    their string representation.  The operators +, -, *, /, ** (rendered
+    as ^), and unary - are supported, with Expressions, numbers, or
+    strings on either side, as are abs() and the functions in this module,
+    such as sin() and sqrt().
+
+    Expressions are immutable trees.  A string is kept as written, and
+    parsed only when the expression is operated on or evaluated.  The
+    string representation of an expression built by operations is rendered
+    when first needed, with only the parentheses that operator precedence
+    requires, and operations on numeric constants are folded.
+
     Parameters
     ----------
-    expr : str
-        Initialize the expression using its string representation.
-    
+    expr : str, number, or Expression
+        Initialize the expression using its string representation, or a
+        number, or another Expression.
+
     Attributes
     ----------
     expr : str
-        The string representation of the expression object.
-    
+        The string representation of the expression object.  Assigning a
+        string replaces the expression.
+
     Raises
     ------
     NotImplementedError
-        For operations involving floor division (Python 2 '/' or 
-        Python 3 '//') 
-    
+        For operations involving floor division (Python 2 '/' or
+        Python 3 '//')
+
     """
+    __slots__ = ('_node', '_expr', '_function')
+
     def __init__(self, expr):
-        if isinstance(expr, Expression):
-            self.expr = expr.expr
+        if type(expr) is float or type(expr) is int:
+            # Fast path for the numeric arguments of the modeler functions,
+            # whose node is only made if the expression is operated on.
+            self._node = None
+            self._expr = str(expr)
+        elif isinstance(expr, Expression):
+            self._node = expr._node
+            self._expr = expr._expr
+        elif isinstance(expr, numbers.Real) and not isinstance(expr, bool):
+            self._node = _node(expr)
+            self._expr = None
         else:
-            self.expr = str(expr)
-        
+            # Strings are kept as written, and only parsed if the expression
+            # is operated on or evaluated.
+            self._node = None
+            self._expr = '{0}'.format(expr)
+        self._function = None
+
+    @classmethod
+    def _from_node(cls, node):
+        self = cls.__new__(cls)
+        self._node = node
+        self._expr = None
+        self._function = None
+        return self
+
+    @property
+    def expr(self):
+        if self._expr is None:
+            self._expr = _render(_node(self))
+        return self._expr
+
+    @expr.setter
+    def expr(self, value):
+        self._node = None
+        self._expr = '{0}'.format(value)
+        self._function = None
+
+    def compile(self):
+        """
+        Compile the expression to a Python function for local evaluation.
+
+        Returns
+        -------
+        evaluate : function
+            Called with a mapping of variable names to values, returns the
+            value of the expression.  Values can be numbers, NumPy arrays,
+            which are broadcast together, or strings or Expressions, which
+            are themselves evaluated.  Numbers with units are converted
+            to SI units, and angles to radians.
+
+        Raises
+        ------
+        ValueError
+            If the expression contains text or functions that can't be
+            evaluated.
+
+        Examples
+        --------
+        >>> f = (Expression('w')*Expression('l')).compile()
+        >>> f({'w': np.array([1, 2, 3]), 'l': '2mm'})
+        array([0.002, 0.004, 0.006])
+        """
+        if self._function is None:
+            self._function = _compile(_node(self))
+        return self._function
+
+    def evaluate(self, variables=None):
+        """
+        Evaluate the expression locally.  See compile().
+        """
+        return self.compile()(variables)
+
+    def variables(self):
+        """
+        Return the names of the variables the expression references.
+
+        Returns
+        -------
+        names : frozenset of str
+
+        Examples
+        --------
+        >>> sorted(parse_expression('$pitch*2 + sin(theta) + 1mm').variables())
+        ['$pitch', 'theta']
+        """
+        return frozenset(_names(_node(self)))
+
+    def __str__(self):
+        return self.expr
+
+    def __repr__(self):
+        return 'Expression({0!r})'.format(self.expr)
+
     def __add__(self, y):
         """
         Overloads the addition (+) operator.
         """
-        if isinstance(y, Expression):
-            return Expression('(' + self.expr + ') + ' + str(y.expr))
-        else:
-            return Expression('(' + self.expr + ') + ' + str(y))
-        
+        return Expression._from_node(_binary('+', _node(self), _node(y)))
+
+    def __radd__(self, y):
+        return Expression._from_node(_binary('+', _node(y), _node(self)))
+
     def __sub__(self, y):
         """
         Overloads the subtraction (-) operator.
         """
-        if isinstance(y, Expression):
-            return Expression('(' + self.expr + ') - ' + str(y.expr))
-        else:
-            return Expression('(' + self.expr + ') - ' + str(y))
-        
+        return Expression._from_node(_binary('-', _node(self), _node(y)))
+
+    def __rsub__(self, y):
+        return Expression._from_node(_binary('-', _node(y), _node(self)))
+
     def __mul__(self, y):
         """
         Overloads the multiplication (*) operator.
         """
-        if isinstance(y, Expression):
-            return Expression('(' + self.expr + ') * ' + str(y.expr))
-        else:
-            return Expression('(' + self.expr + ') * ' + str(y))
-        
+        return Expression._from_node(_binary('*', _node(self), _node(y)))
+
+    def __rmul__(self, y):
+        return Expression._from_node(_binary('*', _node(y), _node(self)))
+
     def __truediv__(self, y):
         """
         Overloads the Python 3 division (/) operator.
         """
-        if isinstance(y, Expression):
-            return Expression('(' + self.expr + ') / ' + str(y.expr))
-        else:
-            return Expression('(' + self.expr + ') / ' + str(y))
-            
+        return Expression._from_node(_binary('/', _node(self), _node(y)))
+
+    def __rtruediv__(self, y):
+        return Expression._from_node(_binary('/', _node(y), _node(self)))
+
     def __div__(self, y):
         """
         Overloads the Python 3 floor division (//) operator.
         """
-        raise NotImplementedError(""""Classic" division is not implemented by 
+        raise NotImplementedError(""""Classic" division is not implemented by
 design.  Please use from __future__ import division in the calling code.""")
-        
+
+    __rdiv__ = __floordiv__ = __rfloordiv__ = __div__
+
+    def __pow__(self, y):
+        """
+        Overloads the power (**) operator.
+        """
+        return Expression._from_node(_binary('^', _node(self), _node(y)))
+
+    def __rpow__(self, y):
+        return Expression._from_node(_binary('^', _node(y), _node(self)))
+
     def __neg__(self):
         """
         Overloads the negation (-) operator.
         """
-        return Expression('-(' + self.expr + ')')
+        return Expression._from_node(_negate(_node(self)))
+
+    def __pos__(self):
+        return self
+
+    def __abs__(self):
+        return function('abs', self)
 
 if __name__ == "__main__":
     import doctest
-    doctest.testmod()
\ No newline at end of file
+    doctest.testmod()
@@ -0,0 +1,1190 @@
+# -*- coding: utf-8 -*-
+"""
+An in-process fake of the HFSS COM interface, for running and benchmarking
+hycohanz code without HFSS.
+
+The fake implements the parts of the desktop, project, design, 3D Modeler
+editor, BoundarySetup, MeshSetup, AnalysisSetup, and FieldsReporter
+modules, and definition manager interfaces that hycohanz uses.  It keeps a simple store
+of objects, assigns object names and face, edge, and vertex IDs
+deterministically, tracks the geometry of boxes so that position lookups
+work, and can simulate the latency of each COM call.
+
+As with COM, method names are looked up case-insensitively.  Errors that
+HFSS would report are raised as FakeComError.
+
+Example Usage
+-------------
+>>> import hycohanz as hfss
+>>> fake = hfss.FakeHfss(latency=(0.002, 0.5))
+>>> [oAnsoftApp, oDesktop] = hfss.setup_interface(fake=fake)
+>>> oProject = hfss.new_project(oDesktop)
+>>> oDesign = hfss.insert_design(oProject, "HFSSDesign1", "DrivenModal")
+>>> oEditor = hfss.set_active_editor(oDesign, "3D Modeler")
+>>> box = hfss.create_box(oEditor, 0, 0, 0, 1, 1, 1)
+>>> hfss.get_face_by_position(oEditor, box, 0.5, 0.5, 1)
+7
+>>> fake.ncalls, fake.calls['Editor.GetFaceByPosition']
+(5, 1)
+
+Setting the HYCOHANZ_FAKE environment variable makes setup_interface()
+return the fake; see FakeHfss.from_environment() for the latency settings.
+
+"""
+
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import collections
+import fnmatch
+import io
+import itertools
+import math
+import os
+import random
+import re
+import time
+import timeit
+
+from hycohanz.editorproxy import (get_array_value,
+                                  get_partlist)
+
+class FakeComError(Exception):
+    """
+    An error that HFSS would report through COM.
+    """
+    pass
+
+_NUMBER = re.compile(r'^\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*[A-Za-z_]*\s*$')
+
+# Name and solution type of each design in a .hfss project file.
+HFSS_MODEL = re.compile(r"\$begin 'HFSSModel'\s+.*?Name='([^']*)'.*?SolutionType='([^']*)'",
+                        re.DOTALL)
+
+def _number(value):
+    """
+    Return the numeric value of an HFSS expression, ignoring units, or 0.0
+    if it isn't a plain number.
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    match = _NUMBER.match('{0}'.format(value))
+    if match is None:
+        return 0.0
+    else:
+        return float(match.group(1))
+
+def _vector(array, keys):
+    return [_number(get_array_value(array, key)) for key in keys]
+
+def _array_name(array):
+    """
+    Return the name given by the "NAME:..." first element of an HFSS array.
+    """
+    head = array[0]
+    if head[:5].upper() != "NAME:":
+        raise FakeComError('Expected a named array, got ' + repr(head))
+    return head[5:]
+
+def _unique_name(name, taken, hints=None):
+    """
+    Return name, numbered HFSS-style if it is already taken.
+
+    hints, if given, remembers the last number given to each requested name,
+    so that creating many parts with the same name takes linear time.  It must
+    be cleared whenever a name is freed.
+    """
+    if name not in taken:
+        return name
+
+    match = re.match(r'^(.*?)(\d+)$', name)
+    if match is None:
+        base, number, separator = name, 0, '_'
+    else:
+        base, number, separator = match.group(1), int(match.group(2)), ''
+
+    key = (base, separator, number)
+    if hints is not None:
+        number = hints.get(key, number)
+
+    while True:
+        number += 1
+        candidate = '{0}{1}{2}'.format(base, separator, number)
+        if candidate not in taken:
+            if hints is not None:
+                hints[key] = number
+            return candidate
+
+class FakeComObject(object):
+    """
+    The COM-facing side of a fake HFSS object.
+
+    Attribute lookups are case-insensitive, count as COM calls, and incur
+    the simulated latency.
+    """
+    def __init__(self, hfss, impl):
+        self._hfss = hfss
+        self._impl = impl
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        method = self._impl.lookup(name)
+
+        def call(*args):
+            return self._hfss.call(self._impl, method, args)
+
+        return call
+
+    def __repr__(self):
+        return '<Fake HFSS {0} {1}>'.format(self._impl.kind, self._impl.name)
+
+class FakeDispatch(FakeComObject):
+    """
+    A FakeComObject that behaves like the CDispatch wrappers of pywin32: a
+    new one is returned by each call, and they are unhashable, but compare
+    equal when they refer to the same object.
+    """
+    __hash__ = None
+
+    def __eq__(self, other):
+        return isinstance(other, FakeComObject) and self._impl is other._impl
+
+    def __ne__(self, other):
+        return not self == other
+
+class _Fake(object):
+    """
+    Base class for the implementations of fake HFSS objects.  COM methods
+    are the public CamelCase methods.
+    """
+    kind = 'Object'
+    _methods = {}
+
+    def __init__(self, hfss, name=''):
+        self.hfss = hfss
+        self.name = name
+        self.com = FakeComObject(hfss, self)
+
+    @classmethod
+    def lookup(cls, name):
+        methods = _Fake._methods.get(cls)
+        if methods is None:
+            methods = dict((attr.lower(), attr) for attr in dir(cls)
+                           if attr[:1].isupper())
+            _Fake._methods[cls] = methods
+
+        try:
+            return methods[name.lower()]
+        except KeyError:
+            raise AttributeError('{0}.{1}'.format(cls.kind, name))
+
+class _VariableServer(_Fake):
+    """
+    Variables of a project or design.
+    """
+    def __init__(self, hfss, name=''):
+        super(_VariableServer, self).__init__(hfss, name)
+        self.variables = collections.OrderedDict()
+
+    def _server(self, name):
+        return self
+
+    def _change(self, tabarray):
+        for item in tabarray[1:]:
+            if not isinstance(item, (list, tuple)) or not item:
+                continue
+
+            group = item[0]
+            if group == "NAME:NewProps":
+                for prop in item[1:]:
+                    name = _array_name(prop)
+                    server = self._server(name)
+                    if name in server.variables:
+                        raise FakeComError('Variable already exists: ' + name)
+                    server.variables[name] = get_array_value(prop, "Value", "")
+            elif group == "NAME:ChangedProps":
+                for prop in item[1:]:
+                    name = _array_name(prop)
+                    server = self._server(name)
+                    if name not in server.variables:
+                        raise FakeComError('No such variable: ' + name)
+                    server.variables[name] = get_array_value(prop, "Value", "")
+            elif group == "NAME:DeletedProps":
+                for name in item[1:]:
+                    self._server(name).variables.pop(name, None)
+
+    def ChangeProperty(self, alltabsarray):
+        for tabarray in alltabsarray[1:]:
+            self._change(tabarray)
+
+    def GetVariables(self):
+        return tuple(self.variables)
+
+    def GetVariableValue(self, name):
+        server = self._server(name)
+        try:
+            return server.variables[name]
+        except KeyError:
+            raise FakeComError('No such variable: ' + name)
+
+    def SetVariableValue(self, name, value):
+        self._server(name).variables[name] = value
+
+class _App(_Fake):
+    kind = 'App'
+
+    def GetAppDesktop(self):
+        return self.hfss.desktop
+
+class _Desktop(_Fake):
+    kind = 'Desktop'
+
+    def __init__(self, hfss):
+        super(_Desktop, self).__init__(hfss, 'Desktop')
+        self.projects = collections.OrderedDict()
+        self.active = None
+
+    def _add(self, name):
+        project = _Project(self.hfss, self, _unique_name(name, self.projects))
+        self.projects[project.name] = project
+        self.active = project
+        return project.com
+
+    def NewProject(self):
+        return self._add('Project1')
+
+    def OpenProject(self, filename):
+        name = os.path.splitext(os.path.basename(filename))[0]
+        if name in self.projects:
+            raise FakeComError('Project is already open: ' + name)
+
+        com = self._add(name)
+
+        # Recreate the (empty) designs listed in the project file
+        if os.path.exists(filename):
+            with io.open(filename, encoding='latin-1') as f:
+                for designname, solutiontype in HFSS_MODEL.findall(f.read()):
+                    com.InsertDesign("HFSS", designname, solutiontype, "")
+
+        return com
+
+    def GetActiveProject(self):
+        if self.active is None:
+            return None
+        return self.active.com
+
+    def SetActiveProject(self, name):
+        try:
+            self.active = self.projects[name]
+        except KeyError:
+            raise FakeComError('No such project: ' + name)
+        return self.active.com
+
+    def GetProjects(self):
+        return tuple(project.com for project in self.projects.values())
+
+    def GetProjectList(self):
+        return tuple(self.projects)
+
+    def CloseProject(self, name):
+        project = self.projects.pop(name, None)
+        if project is None:
+            raise FakeComError('No such project: ' + name)
+        if self.active is project:
+            self.active = None
+
+    def QuitApplication(self):
+        self.projects.clear()
+        self.active = None
+
+    def RestoreWindow(self):
+        pass
+
+    def GetVersion(self):
+        return 'fake'
+
+class _Project(_VariableServer):
+    kind = 'Project'
+
+    def __init__(self, hfss, desktop, name):
+        super(_Project, self).__init__(hfss, name)
+        self.desktop = desktop
+        self.designs = collections.OrderedDict()
+        self.active = None
+        self.definitions = _DefinitionManager(hfss)
+        self.path = None
+
+    def _design(self, name):
+        try:
+            return self.designs[name]
+        except KeyError:
+            raise FakeComError('No such design: ' + name)
+
+    def GetName(self):
+        return self.name
+
+    def InsertDesign(self, designtype, name, solutiontype, extra):
+        name = _unique_name(name or 'HFSSDesign1', self.designs)
+        design = _Design(self.hfss, self, name, solutiontype)
+        self.designs[name] = design
+        self.active = design
+        return design.com
+
+    def GetActiveDesign(self):
+        if self.active is None:
+            return None
+        return self.active.com
+
+    def SetActiveDesign(self, name):
+        self.active = self._design(name)
+        return self.active.com
+
+    def GetDesign(self, name):
+        return self._design(name).com
+
+    def DeleteDesign(self, name):
+        design = self.designs.pop(name, None)
+        if design is None:
+            raise FakeComError('No such design: ' + name)
+        if self.active is design:
+            self.active = None
+
+    def GetTopDesignList(self):
+        return tuple(self.designs)
+
+    def GetDefinitionManager(self):
+        return self.definitions.com
+
+    def Save(self):
+        pass
+
+    def SaveAs(self, filename, overwrite):
+        self.path = filename
+        self.desktop.projects.pop(self.name, None)
+        self.name = os.path.splitext(os.path.basename(filename))[0]
+        self.desktop.projects[self.name] = self
+
+class _Design(_VariableServer):
+    kind = 'Design'
+
+    def __init__(self, hfss, project, name, solutiontype):
+        super(_Design, self).__init__(hfss, name)
+        self.project = project
+        self.solutiontype = solutiontype
+        self.editor = _Editor(hfss, self)
+        self.modules = {}
+        self.solved = []
+
+    def _server(self, name):
+        if name.startswith('$'):
+            return self.project
+        else:
+            return self
+
+    def GetName(self):
+        return self.name
+
+    def GetSolutionType(self):
+        return self.solutiontype
+
+    def SetActiveEditor(self, editorname):
+        if editorname != "3D Modeler":
+            raise FakeComError('No such editor: ' + editorname)
+        return self.editor.com
+
+    def GetModule(self, modulename):
+        module = self.modules.get(modulename)
+        if module is None:
+            try:
+                cls = MODULES[modulename]
+            except KeyError:
+                raise FakeComError('No such module: ' + modulename)
+            module = self.modules[modulename] = cls(self.hfss, self)
+        return module.com
+
+    def Solve(self, setupnames):
+        setups = self.modules.get("AnalysisSetup")
+        for name in setupnames:
+            if setups is None or name not in setups.setups:
+                raise FakeComError('No such setup: ' + name)
+            self.solved.append(name)
+        return 0
+
+class _Body(object):
+    """
+    An object in the fake 3D Modeler.
+    """
+    def __init__(self, name, kind, bbox, material, solveinside):
+        self.name = name
+        self.kind = kind
+        self.bbox = bbox
+        self.material = material
+        self.solveinside = solveinside
+        self.id = None
+        self.faces = []
+        self.edges = []
+        self.vertices = []
+
+    def copy(self, name):
+        return _Body(name, self.kind, self.bbox, self.material, self.solveinside)
+
+# The number of faces, edges, and vertices of each kind of object.
+TOPOLOGY = {"Box": (6, 12, 8),
+            "Cylinder": (3, 2, 0),
+            "Cone": (3, 2, 0),
+            "Sphere": (1, 0, 0),
+            "Torus": (1, 0, 0),
+            "Rectangle": (1, 4, 4),
+            "Circle": (1, 1, 0),
+            "Polyline": (0, 1, 2),
+            "EquationCurve": (0, 1, 2),
+            "Region": (6, 12, 8)}
+
+# Box vertices are the corners of the bounding box, numbered as in
+# itertools.product((0, 1), repeat=3); faces and edges list their corners.
+BOX_CORNERS = list(itertools.product((0, 1), repeat=3))
+BOX_FACES = [(axis, side) for axis in (2, 1, 0) for side in (0, 1)]
+BOX_EDGES = [(a, b) for a in range(8) for b in range(a + 1, 8)
+             if sum(x != y for x, y in zip(BOX_CORNERS[a], BOX_CORNERS[b])) == 1]
+
+class _Editor(_Fake):
+    kind = 'Editor'
+
+    def __init__(self, hfss, design):
+        super(_Editor, self).__init__(hfss, '3D Modeler')
+        self.design = design
+        self.bodies = collections.OrderedDict()
+        self.numbering = {}
+        self.owners = {}
+        self.next_id = 5
+        self.clipboard = []
+        self.selections = ()
+
+    # Object store
+
+    def _ids(self, count):
+        ids = list(range(self.next_id, self.next_id + count))
+        self.next_id += count
+        return ids
+
+    def _topology(self, body, counts=None):
+        """
+        Assign new IDs to the faces, edges, and vertices of body.
+        """
+        for entity in body.faces + body.edges + body.vertices:
+            self.owners.pop(entity, None)
+
+        nfaces, nedges, nvertices = counts or TOPOLOGY.get(body.kind, (1, 1, 1))
+        body.faces = self._ids(nfaces)
+        body.edges = self._ids(nedges)
+        body.vertices = self._ids(nvertices)
+        for entity in body.faces + body.edges + body.vertices:
+            self.owners[entity] = body
+
+    def _add(self, body):
+        body.name = _unique_name(body.name, self.bodies, self.numbering)
+        body.id = self._ids(1)[0]
+        self._topology(body)
+        self.bodies[body.name] = body
+        return body.name
+
+    def _remove(self, partlist):
+        self.numbering.clear()
+        for name in partlist:
+            body = self._body(name)
+            del self.bodies[name]
+            for entity in body.faces + body.edges + body.vertices:
+                self.owners.pop(entity, None)
+
+    def _body(self, name):
+        try:
+            return self.bodies[name]
+        except KeyError:
+            raise FakeComError('No such object: ' + name)
+
+    def _owner(self, entity):
+        try:
+            return self.owners[int(entity)]
+        except KeyError:
+            raise FakeComError('No such face, edge, or vertex: {0}'.format(entity))
+
+    def _selection(self, selectionsarray, key="Selections"):
+        return [self._body(name) for name in get_partlist(selectionsarray, key)]
+
+    def _grow(self, body, others):
+        """
+        Add new faces, edges, and vertices to body for the topology it
+        gains from others in a boolean operation.
+        """
+        counts = [len(body.faces), len(body.edges), len(body.vertices)]
+        for other in others:
+            counts[0] += len(other.faces)
+            counts[1] += len(other.edges)
+            counts[2] += len(other.vertices)
+        self._topology(body, counts)
+        body.bbox = None
+
+    # Creation
+
+    def _create(self, kind, attributesarray, bbox=None):
+        material = get_array_value(attributesarray, "MaterialValue", '"vacuum"')
+        body = _Body(get_array_value(attributesarray, "Name", kind + '1'),
+                     kind,
+                     bbox,
+                     material.strip('"'),
+                     get_array_value(attributesarray, "SolveInside", True))
+        return self._add(body)
+
+    def CreateBox(self, parametersarray, attributesarray):
+        x, y, z = _vector(parametersarray, ("XPosition", "YPosition", "ZPosition"))
+        dx, dy, dz = _vector(parametersarray, ("XSize", "YSize", "ZSize"))
+        bbox = (min(x, x + dx), min(y, y + dy), min(z, z + dz),
+                max(x, x + dx), max(y, y + dy), max(z, z + dz))
+        return self._create("Box", attributesarray, bbox)
+
+    def CreateRectangle(self, parametersarray, attributesarray):
+        x, y, z = _vector(parametersarray, ("XStart", "YStart", "ZStart"))
+        width, height = _vector(parametersarray, ("Width", "Height"))
+        axis = "XYZ".index(get_array_value(parametersarray, "WhichAxis", "Z"))
+        start = [x, y, z]
+        stop = list(start)
+        stop[(axis + 1) % 3] += width
+        stop[(axis + 2) % 3] += height
+        bbox = tuple(min(a, b) for a, b in zip(start, stop)) + \
+               tuple(max(a, b) for a, b in zip(start, stop))
+        return self._create("Rectangle", attributesarray, bbox)
+
+    def CreateCylinder(self, parametersarray, attributesarray):
+        return self._create("Cylinder", attributesarray)
+
+    def CreateCone(self, parametersarray, attributesarray):
+        return self._create("Cone", attributesarray)
+
+    def CreateSphere(self, parametersarray, attributesarray):
+        return self._create("Sphere", attributesarray)
+
+    def CreateTorus(self, parametersarray, attributesarray):
+        return self._create("Torus", attributesarray)
+
+    def CreateCircle(self, parametersarray, attributesarray):
+        return self._create("Circle", attributesarray)
+
+    def CreateRegion(self, parametersarray, attributesarray):
+        return self._create("Region", attributesarray)
+
+    def CreateEquationCurve(self, parametersarray, attributesarray):
+        return self._create("EquationCurve", attributesarray)
+
+    def CreatePolyline(self, parametersarray, segmentsarray, attributesarray=None):
+        if attributesarray is None:
+            attributesarray = segmentsarray
+
+        npoints = 0
+        for item in parametersarray:
+            if isinstance(item, (list, tuple)) and item and item[0] == "NAME:PolylinePoints":
+                npoints = sum(len(point) if isinstance(point[0], (list, tuple)) else 1
+                              for point in item[1:])
+
+        name = self._create("Polyline", attributesarray)
+        closed = get_array_value(parametersarray, "IsPolylineClosed", False)
+        covered = get_array_value(parametersarray, "IsPolylineCovered", False)
+        nedges = max(npoints - 1, 1)
+        self._topology(self.bodies[name],
+                       (1 if closed and covered else 0, nedges, nedges if closed else nedges + 1))
+        return name
+
+    def Import(self, importparametersarray):
+        sourcefile = get_array_value(importparametersarray, "SourceFile", "Import1")
+        name = os.path.splitext(os.path.basename(sourcefile))[0]
+        name = self._add(_Body(name, "Imported", None, "vacuum", True))
+        self.selections = (name,)
+
+    # Queries
+
+    def GetMatchedObjectName(self, name_filter):
+        return tuple(name for name in self.bodies
+                     if fnmatch.fnmatchcase(name, name_filter))
+
+    def GetNumObjects(self):
+        return len(self.bodies)
+
+    def GetObjectName(self, index):
+        try:
+            return list(self.bodies)[index]
+        except IndexError:
+            raise FakeComError('No object with index {0}'.format(index))
+
+    def GetObjectIDByName(self, name):
+        return self._body(name).id
+
+    def GetObjectNameByFaceID(self, faceid):
+        return self._owner(faceid).name
+
+    def GetObjectsInGroup(self, group):
+        return tuple(self.bodies)
+
+    def GetSelections(self):
+        return self.selections
+
+    def GetFaceIDs(self, body_name):
+        return tuple(str(face) for face in self._body(body_name).faces)
+
+    def GetEdgeIDsFromObject(self, body_name):
+        return tuple(str(edge) for edge in self._body(body_name).edges)
+
+    def GetVertexIDsFromObject(self, body_name):
+        return tuple(str(vertex) for vertex in self._body(body_name).vertices)
+
+    def _box(self, entity):
+        """
+        Return the owner of entity, and the owner's bounding box if it is a
+        box of known geometry.
+        """
+        body = self._owner(entity)
+        if body.kind in ("Box", "Region") and body.bbox is not None and len(body.faces) == 6:
+            return body, body.bbox
+        else:
+            return body, None
+
+    def _corner(self, bbox, corner):
+        return [bbox[3*c + axis] for axis, c in enumerate(BOX_CORNERS[corner])]
+
+    def GetEdgeIDsFromFace(self, faceid):
+        body, bbox = self._box(faceid)
+        if bbox is None:
+            return tuple(str(edge) for edge in body.edges)
+
+        axis, side = BOX_FACES[body.faces.index(int(faceid))]
+        return tuple(str(body.edges[n]) for n, (a, b) in enumerate(BOX_EDGES)
+                     if BOX_CORNERS[a][axis] == BOX_CORNERS[b][axis] == side)
+
+    def GetVertexIDsFromEdge(self, edgeid):
+        body, bbox = self._box(edgeid)
+        if bbox is None:
+            return tuple(str(vertex) for vertex in body.vertices[:2])
+
+        a, b = BOX_EDGES[body.edges.index(int(edgeid))]
+        return (str(body.vertices[a]), str(body.vertices[b]))
+
+    def GetVertexPosition(self, vertexid):
+        body, bbox = self._box(vertexid)
+        if bbox is None:
+            return ('0', '0', '0')
+
+        corner = body.vertices.index(int(vertexid))
+        return tuple(repr(v) for v in self._corner(bbox, corner))
+
+    def _face_geometry(self, body, bbox, faceid):
+        axis, side = BOX_FACES[body.faces.index(int(faceid))]
+        center = [(bbox[n] + bbox[n + 3])/2 for n in range(3)]
+        center[axis] = bbox[axis + 3*side]
+        sizes = [bbox[n + 3] - bbox[n] for n in range(3)]
+        sizes[axis] = 1.0
+        return center, sizes[0]*sizes[1]*sizes[2]
+
+    def GetFaceCenter(self, faceid):
+        body, bbox = self._box(faceid)
+        if bbox is None:
+            return ('0', '0', '0')
+        return tuple(repr(v) for v in self._face_geometry(body, bbox, faceid)[0])
+
+    def GetFaceArea(self, faceid):
+        body, bbox = self._box(faceid)
+        if bbox is None:
+            return 0.0
+        return self._face_geometry(body, bbox, faceid)[1]
+
+    def _position(self, positionparameters):
+        body = self._body(get_array_value(positionparameters, "BodyName"))
+        point = _vector(positionparameters, ("Xposition", "YPosition", "ZPosition"))
+        return body, point
+
+    def GetFaceByPosition(self, positionparameters):
+        body, point = self._position(positionparameters)
+        if body.bbox is None or not body.faces:
+            if body.faces:
+                return body.faces[0]
+            raise FakeComError('No face of {0} at {1}'.format(body.name, point))
+
+        bbox = body.bbox
+        tol = 1e-9*max(1.0, max(abs(v) for v in bbox))
+        inside = all(bbox[n] - tol <= point[n] <= bbox[n + 3] + tol for n in range(3))
+        if inside:
+            if body.kind == "Rectangle":
+                return body.faces[0]
+            for faceid, (axis, side) in zip(body.faces, BOX_FACES):
+                if abs(point[axis] - bbox[axis + 3*side]) <= tol:
+                    return faceid
+
+        raise FakeComError('No face of {0} at {1}'.format(body.name, point))
+
+    def GetEdgeByPosition(self, positionparameters):
+        body, point = self._position(positionparameters)
+        if body.bbox is None or body.kind != "Box":
+            if body.edges:
+                return body.edges[0]
+            raise FakeComError('No edge of {0} at {1}'.format(body.name, point))
+
+        bbox = body.bbox
+        tol = 1e-9*max(1.0, max(abs(v) for v in bbox))
+        for edgeid, (a, b) in zip(body.edges, BOX_EDGES):
+            start, stop = self._corner(bbox, a), self._corner(bbox, b)
+            if all(min(s, e) - tol <= p <= max(s, e) + tol
+                   for s, e, p in zip(start, stop, point)):
+                return edgeid
+
+        raise FakeComError('No edge of {0} at {1}'.format(body.name, point))
+
+    # Operations
+
+    def AssignMaterial(self, selectionsarray, attributesarray):
+        material = get_array_value(attributesarray, "MaterialName")
+        solveinside = get_array_value(attributesarray, "SolveInside", True)
+        for body in self._selection(selectionsarray):
+            body.material = material
+            body.solveinside = solveinside
+
+    def Move(self, selectionsarray, moveparametersarray):
+        dx, dy, dz = _vector(moveparametersarray, ("TranslateVectorX",
+                                                   "TranslateVectorY",
+                                                   "TranslateVectorZ"))
+        for body in self._selection(selectionsarray):
+            if body.bbox is not None:
+                x0, y0, z0, x1, y1, z1 = body.bbox
+                body.bbox = (x0 + dx, y0 + dy, z0 + dz, x1 + dx, y1 + dy, z1 + dz)
+
+    def Scale(self, selectionsarray, scaleparametersarray):
+        sx, sy, sz = _vector(scaleparametersarray, ("ScaleX", "ScaleY", "ScaleZ"))
+        for body in self._selection(selectionsarray):
+            if body.bbox is not None:
+                x0, y0, z0, x1, y1, z1 = body.bbox
+                body.bbox = (min(x0*sx, x1*sx), min(y0*sy, y1*sy), min(z0*sz, z1*sz),
+                             max(x0*sx, x1*sx), max(y0*sy, y1*sy), max(z0*sz, z1*sz))
+
+    def Rotate(self, selectionsarray, rotateparametersarray):
+        for body in self._selection(selectionsarray):
+            body.bbox = None
+
+    def Mirror(self, selectionsarray, mirrorparametersarray):
+        for body in self._selection(selectionsarray):
+            body.bbox = None
+
+    def _reshape(self, selectionsarray, *args):
+        for body in self._selection(selectionsarray):
+            self._topology(body, (len(body.faces) + 1, len(body.edges), len(body.vertices)))
+            body.bbox = None
+
+    Fillet = _reshape
+    Chamfer = _reshape
+    UncoverFaces = _reshape
+    CoverLines = _reshape
+    CoverSurfaces = _reshape
+    SweepAlongVector = _reshape
+    SweepAroundAxis = _reshape
+    SweepAlongPath = _reshape
+    ThickenSheet = _reshape
+    Split = _reshape
+    SeparateBody = _reshape
+
+    def _clones(self, bodies, nclones, offset=None):
+        names = []
+        for k in range(1, nclones):
+            for body in bodies:
+                clone = body.copy('{0}_{1}'.format(body.name, k))
+                if clone.bbox is not None and offset is not None:
+                    clone.bbox = tuple(v + k*offset[n % 3]
+                                       for n, v in enumerate(clone.bbox))
+                names.append(self._add(clone))
+        return tuple(names)
+
+    def DuplicateAlongLine(self, selectionsarray, duplicateparametersarray, optionsarray=None):
+        offset = _vector(duplicateparametersarray, ("XComponent", "YComponent", "ZComponent"))
+        nclones = int(_number(get_array_value(duplicateparametersarray, "NumClones", 2)))
+        return self._clones(self._selection(selectionsarray), nclones, offset)
+
+    def DuplicateAroundAxis(self, selectionsarray, duplicateparametersarray, optionsarray=None):
+        nclones = int(_number(get_array_value(duplicateparametersarray, "NumClones", 2)))
+        names = self._clones(self._selection(selectionsarray), nclones)
+        for name in names:
+            self.bodies[name].bbox = None
+        return names
+
+    def DuplicateMirror(self, selectionsarray, duplicateparametersarray, optionsarray=None):
+        names = self._clones(self._selection(selectionsarray), 2)
+        for name in names:
+            self.bodies[name].bbox = None
+        return names
+
+    def Copy(self, selectionsarray):
+        self.clipboard = [body.copy(body.name) for body in self._selection(selectionsarray)]
+
+    def Cut(self, selectionsarray):
+        self.Copy(selectionsarray)
+        self._remove(get_partlist(selectionsarray))
+
+    def Paste(self):
+        return tuple(self._add(body.copy(body.name)) for body in self.clipboard)
+
+    def Delete(self, selectionsarray):
+        self._remove(get_partlist(selectionsarray))
+
+    def RenamePart(self, renameparamsarray):
+        oldname = get_array_value(renameparamsarray, "Old Name")
+        newname = get_array_value(renameparamsarray, "New Name")
+        body = self._body(oldname)
+        if newname in self.bodies:
+            raise FakeComError('Name already in use: ' + newname)
+
+        bodies = collections.OrderedDict()
+        for name, other in self.bodies.items():
+            bodies[newname if name == oldname else name] = other
+        self.bodies = bodies
+        self.numbering.clear()
+        body.name = newname
+        return newname
+
+    def Unite(self, selectionsarray, uniteparametersarray):
+        bodies = self._selection(selectionsarray)
+        self._grow(bodies[0], bodies[1:])
+        if not get_array_value(uniteparametersarray, "KeepOriginals", False):
+            self._remove([body.name for body in bodies[1:]])
+
+    def Intersect(self, selectionsarray, intersectparametersarray):
+        bodies = self._selection(selectionsarray)
+        self._grow(bodies[0], [])
+        if not get_array_value(intersectparametersarray, "KeepOriginals", False):
+            self._remove([body.name for body in bodies[1:]])
+
+    def Subtract(self, selectionsarray, subtractparametersarray):
+        tools = self._selection(selectionsarray, "Tool Parts")
+        for blank in self._selection(selectionsarray, "Blank Parts"):
+            self._grow(blank, tools)
+        if not get_array_value(subtractparametersarray, "KeepOriginals", False):
+            self._remove([tool.name for tool in tools])
+
+    def Imprint(self, selectionsarray, imprintparametersarray):
+        self.Subtract(selectionsarray, imprintparametersarray)
+
+    def Connect(self, selectionsarray):
+        bodies = self._selection(selectionsarray)
+        self._grow(bodies[0], bodies[1:])
+        self._remove([body.name for body in bodies[1:]])
+
+class _Module(_Fake):
+    def __init__(self, hfss, design):
+        super(_Module, self).__init__(hfss, self.kind)
+        self.design = design
+
+def _assign(boundarytype):
+    def assign(self, parametersarray):
+        name = _array_name(parametersarray)
+        if name in self.boundaries:
+            raise FakeComError('Boundary already exists: ' + name)
+        self.boundaries[name] = (boundarytype, parametersarray)
+    return assign
+
+class _BoundarySetup(_Module):
+    kind = 'BoundarySetup'
+
+    def __init__(self, hfss, design):
+        super(_BoundarySetup, self).__init__(hfss, design)
+        self.boundaries = collections.OrderedDict()
+
+    AssignPerfectE = _assign('Perfect E')
+    AssignPerfectH = _assign('Perfect H')
+    AssignRadiation = _assign('Radiation')
+    AssignWavePort = _assign('Wave Port')
+    AssignLumpedPort = _assign('Lumped Port')
+    AssignFiniteCond = _assign('Finite Conductivity')
+    AssignImpedance = _assign('Impedance')
+    AssignMaster = _assign('Master')
+    AssignSlave = _assign('Slave')
+
+    def GetBoundaries(self):
+        return tuple(self.boundaries)
+
+    def GetNumBoundaries(self):
+        return len(self.boundaries)
+
+    def GetBoundaryAssignment(self, name):
+        try:
+            boundarytype, parametersarray = self.boundaries[name]
+        except KeyError:
+            raise FakeComError('No such boundary: ' + name)
+        return tuple(str(face) for face in get_array_value(parametersarray, "Faces", []))
+
+    def DeleteBoundaries(self, names):
+        for name in names:
+            self.boundaries.pop(name, None)
+
+class _AnalysisSetup(_Module):
+    kind = 'AnalysisSetup'
+
+    def __init__(self, hfss, design):
+        super(_AnalysisSetup, self).__init__(hfss, design)
+        self.setups = collections.OrderedDict()
+
+    def InsertSetup(self, setuptype, parametersarray):
+        name = _array_name(parametersarray)
+        if name in self.setups:
+            raise FakeComError('Setup already exists: ' + name)
+        self.setups[name] = (setuptype, parametersarray, collections.OrderedDict())
+
+    def EditSetup(self, name, parametersarray):
+        setuptype, oldarray, sweeps = self._setup(name)
+        del self.setups[name]
+        self.setups[_array_name(parametersarray)] = (setuptype, parametersarray, sweeps)
+
+    def _setup(self, name):
+        try:
+            return self.setups[name]
+        except KeyError:
+            raise FakeComError('No such setup: ' + name)
+
+    def InsertFrequencySweep(self, setupname, parametersarray):
+        sweeps = self._setup(setupname)[2]
+        name = _array_name(parametersarray)
+        if name in sweeps:
+            raise FakeComError('Sweep already exists: ' + name)
+        sweeps[name] = parametersarray
+
+    def GetSetups(self):
+        return tuple(self.setups)
+
+    def GetSweeps(self, setupname):
+        return tuple(self._setup(setupname)[2])
+
+    def DeleteSetups(self, names):
+        for name in names:
+            self.setups.pop(name, None)
+
+class _FieldsReporter(_Module):
+    kind = 'FieldsReporter'
+
+    def __init__(self, hfss, design):
+        super(_FieldsReporter, self).__init__(hfss, design)
+        self.stack = []
+
+    def _pop(self):
+        try:
+            return self.stack.pop()
+        except IndexError:
+            raise FakeComError('The calculator stack is empty')
+
+    def EnterQty(self, quantity):
+        self.stack.append(quantity)
+
+    def EnterVol(self, volume):
+        self.stack.append('Vol(' + volume + ')')
+
+    def EnterSurf(self, surface):
+        self.stack.append('Surf(' + surface + ')')
+
+    def EnterScalar(self, value):
+        self.stack.append(repr(value))
+
+    def CalcOp(self, operation):
+        top = self._pop()
+        self.stack.append(operation + '(' + top + ')')
+
+    def CalcStack(self, command):
+        if command.lower() == 'clear':
+            self.stack = []
+
+    def ClcEval(self, solutionname, variablesarray):
+        self._pop()
+        self.stack.append('0')
+
+    def GetTopEntryValue(self, solutionname, variablesarray):
+        if not self.stack:
+            raise FakeComError('The calculator stack is empty')
+        return ('0',)
+
+class _MeshSetup(_Module):
+    kind = 'MeshSetup'
+
+    def __init__(self, hfss, design):
+        super(_MeshSetup, self).__init__(hfss, design)
+        self.operations = collections.OrderedDict()
+
+    def _add_operation(self, parametersarray):
+        name = _array_name(parametersarray)
+        if name in self.operations:
+            raise FakeComError('Mesh operation already exists: ' + name)
+        self.operations[name] = parametersarray
+
+    AssignLengthOp = AssignSkinDepthOp = AssignTrueSurfOp = _add_operation
+
+MODULES = {"BoundarySetup": _BoundarySetup,
+           "AnalysisSetup": _AnalysisSetup,
+           "FieldsReporter": _FieldsReporter,
+           "MeshSetup": _MeshSetup}
+
+# Materials in a new project's definition manager.
+DEFAULT_MATERIALS = ("vacuum",
+                     "air",
+                     "pec",
+                     "copper",
+                     "aluminum",
+                     "gold",
+                     "FR4_epoxy",
+                     "Rogers RO4003 (tm)")
+
+class _DefinitionManager(_Fake):
+    kind = 'DefinitionManager'
+
+    def __init__(self, hfss):
+        super(_DefinitionManager, self).__init__(hfss, 'Definitions')
+        self.materials = collections.OrderedDict((name.lower(), (name, None))
+                                                 for name in DEFAULT_MATERIALS)
+
+    def DoesMaterialExist(self, name):
+        return name.lower() in self.materials
+
+    def AddMaterial(self, parametersarray):
+        name = _array_name(parametersarray)
+        if name.lower() in self.materials:
+            raise FakeComError('Material already exists: ' + name)
+        self.materials[name.lower()] = (name, parametersarray)
+        return name
+
+    def EditMaterial(self, name, parametersarray):
+        if name.lower() not in self.materials:
+            raise FakeComError('No such material: ' + name)
+        del self.materials[name.lower()]
+        newname = _array_name(parametersarray)
+        self.materials[newname.lower()] = (newname, parametersarray)
+
+    def RemoveMaterial(self, name, *args):
+        if self.materials.pop(name.lower(), None) is None:
+            raise FakeComError('No such material: ' + name)
+
+    def GetProjectMaterialNames(self):
+        return tuple(name for name, parametersarray in self.materials.values())
+
+class FakeHfss(object):
+    """
+    An in-process fake of HFSS.
+
+    Parameters
+    ----------
+    latency : float, tuple, or callable
+        The simulated latency of each COM call, in seconds.  A float gives
+        a constant latency, a (median, sigma) tuple a log-normal
+        distribution, and a callable is called for each sample.  None for
+        no latency.
+    sleep : bool
+        Whether calls actually sleep for their latency.  Otherwise the
+        latency is only added to simulated_time, which keeps benchmarks
+        fast.
+    seed : int
+        Seed for the latency distribution.
+    dispatch : bool
+        Whether to return objects that behave like pywin32's wrappers, a
+        new FakeDispatch each time, rather than the same FakeComObject.
+        Use it to check that code doesn't hash or compare COM objects by
+        identity.
+
+    Attributes
+    ----------
+    app : FakeComObject
+        The fake oAnsoftApp.
+    desktop : FakeComObject
+        The fake oDesktop.
+    calls : collections.Counter
+        The number of calls of each method, keyed by "Kind.Method", for
+        example "Editor.CreateBox".
+    ncalls : int
+        The total number of calls.
+    simulated_time : float
+        The total simulated latency, in seconds.
+    elapsed : float
+        The wall time spent inside the fake, excluding sleeping, in seconds.
+    """
+    def __init__(self, latency=None, sleep=False, seed=0, dispatch=False):
+        self.random = random.Random(seed)
+        self.sleep = sleep
+        self.dispatch = dispatch
+        self.calls = collections.Counter()
+        self.ncalls = 0
+        self.simulated_time = 0.0
+        self.elapsed = 0.0
+
+        if latency is None:
+            self._latency = None
+        elif callable(latency):
+            self._latency = latency
+        elif isinstance(latency, (tuple, list)):
+            mu, sigma = math.log(latency[0]), latency[1]
+            self._latency = lambda: self.random.lognormvariate(mu, sigma)
+        else:
+            self._latency = lambda: latency
+
+        self.app = _App(self, 'AnsoftHfss').com
+        self.desktop = _Desktop(self).com
+
+    @classmethod
+    def from_environment(cls):
+        """
+        Create a FakeHfss configured by environment variables.
+
+        HYCOHANZ_FAKE_LATENCY is either a constant latency in seconds, or
+        "median,sigma" for a log-normal latency.  If HYCOHANZ_FAKE_SLEEP is
+        set to anything other than '' or '0', calls sleep for their latency,
+        and likewise HYCOHANZ_FAKE_DISPATCH for the dispatch option.
+        """
+        setting = os.environ.get('HYCOHANZ_FAKE_LATENCY', '')
+        if not setting:
+            latency = None
+        elif ',' in setting:
+            latency = tuple(float(v) for v in setting.split(','))
+        else:
+            latency = float(setting)
+
+        sleep = os.environ.get('HYCOHANZ_FAKE_SLEEP', '') not in ('', '0')
+        dispatch = os.environ.get('HYCOHANZ_FAKE_DISPATCH', '') not in ('', '0')
+
+        return cls(latency=latency, sleep=sleep, dispatch=dispatch)
+
+    def setup_interface(self):
+        """
+        Return the fake oAnsoftApp and oDesktop, in the manner of
+        hycohanz.setup_interface().
+        """
+        return [self._wrap(self.app), self._wrap(self.desktop)]
+
+    def _wrap(self, result):
+        """
+        Return a new FakeDispatch for each object in a result, in dispatch
+        mode.
+        """
+        if not self.dispatch:
+            return result
+        elif isinstance(result, FakeComObject):
+            return FakeDispatch(self, result._impl)
+        elif isinstance(result, (tuple, list)):
+            return type(result)(self._wrap(item) for item in result)
+        else:
+            return result
+
+    def call(self, impl, method, args):
+        """
+        Call a method of a fake HFSS object, counting it and simulating its
+        latency.
+        """
+        self.calls[impl.kind + '.' + method] += 1
+        self.ncalls += 1
+
+        if self._latency is not None:
+            delay = self._latency()
+            self.simulated_time += delay
+            if self.sleep:
+                time.sleep(delay)
+
+        t0 = timeit.default_timer()
+        try:
+            return self._wrap(getattr(impl, method)(*args))
+        finally:
+            self.elapsed += timeit.default_timer() - t0
@@ -34,17 +34,48 @@ from hycohanz.desktop import (quit_application,
 from hycohanz.project import *
 
 from hycohanz.property import ( add_property,
+                                add_properties,
                                 set_variable,
                                 )
 
 from hycohanz.design import (get_module, 
+                             clear_module_cache,
+                             enable_module_cache,
                              set_active_editor)
 
-from hycohanz.expression import Expression
+from hycohanz.expression import (Expression,
+                                 ExpressionSyntaxError,
+                                 parse_expression)
 from hycohanz.modeler3d import *
+from hycohanz.registry import ObjectRegistry
+from hycohanz.topology import TopologyCache
+from hycohanz.spatial import SpatialIndex
+from hycohanz.dependency import DependencyGraph
+from hycohanz.variablestore import VariableStore
+from hycohanz.snapshot import VariableSnapshot
+from hycohanz.subexpression import SubexpressionHoister
+from hycohanz.booleanplan import BooleanPlan
+from hycohanz.transaction import (ModelerTransaction,
+                                  modeler_transaction)
+from hycohanz.scriptwriter import ScriptWriter
+from hycohanz.fakehfss import (FakeHfss,
+                               FakeComError)
+from hycohanz.instrument import Instrument
+from hycohanz.trace import (TraceRecorder,
+                            TraceReplayer,
+                            TraceMismatch,
+                            TraceComError)
 from hycohanz.material import ( add_material,
+                                add_materials,
+                                clear_material_libraries,
                                 does_material_exist,
+                                get_material_library,
+                                MaterialLibrary,
                                 )
+from hycohanz.dispersion import (DispersionFit,
+                                 fit_debye,
+                                 fit_multipole_debye,
+                                 fit_djordjevic_sarkar)
 
 from hycohanz.analysis_setup import (insert_frequency_sweep, 
                                      insert_analysis_setup)
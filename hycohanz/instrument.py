@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+Instrumentation of the HFSS COM interface.
+
+An Instrument wraps the objects returned by setup_interface(), and
+transparently every project, design, editor, and module obtained through
+them, recording each COM method call with its wall time, the size of its
+arguments, and the hycohanz function that made it.
+
+Example Usage
+-------------
+>>> import hycohanz as hfss
+>>> instrument = hfss.Instrument()
+>>> [oAnsoftApp, oDesktop] = hfss.setup_interface(instrument=instrument)
+>>> oProject = hfss.new_project(oDesktop)
+>>> oDesign = hfss.insert_design(oProject, "HFSSDesign1", "DrivenModal")
+>>> oEditor = hfss.set_active_editor(oDesign, "3D Modeler")
+>>> box = hfss.create_box(oEditor, 0, 0, 0, 1, 1, 1)
+>>> instrument.print_report()  # doctest: +ELLIPSIS
+4 COM calls, ...
+>>> instrument.save_json('calls.json')
+
+"""
+
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import collections
+import io
+import json
+import numbers
+import sys
+import timeit
+
+import numpy as np
+
+from hycohanz.scriptwriter import OBJECT_METHODS
+
+# Types returned by COM that are values rather than COM objects.
+VALUE_TYPES = (str, bytes, numbers.Number, bool, dict, type(None))
+
+CallRecord = collections.namedtuple('CallRecord',
+                                    ['obj', 'method', 'elapsed', 'size', 'caller'])
+
+def _size(value):
+    """
+    Return the number of leaf elements in a (nested) argument array.
+    """
+    if isinstance(value, (list, tuple)):
+        return sum(_size(item) for item in value)
+    else:
+        return 1
+
+def _caller(skip=(__name__,)):
+    """
+    Return the outermost hycohanz function in the chain of hycohanz frames
+    leading to the current COM call, as "module.function".  Frames in the
+    modules named in skip, which wrap the COM objects, are ignored.
+    """
+    caller = '<user>'
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        if module in skip:
+            pass
+        elif module.startswith('hycohanz.'):
+            caller = module[len('hycohanz.'):] + '.' + frame.f_code.co_name
+        else:
+            break
+        frame = frame.f_back
+    return caller
+
+def _percentiles(times):
+    p50, p95, p99 = np.percentile(times, [50, 95, 99])
+    return p50, p95, p99
+
+class InstrumentedObject(object):
+    """
+    Stand in for an HFSS COM object, recording the methods called on it.
+
+    Attributes
+    ----------
+    label : str
+        The kind of object, e.g. "Desktop", "Editor", or a module name.
+    """
+    def __init__(self, instrument, obj, label):
+        self._instrument = instrument
+        self._obj = obj
+        self.label = label
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        attr = getattr(self._obj, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args):
+            return self._instrument.call(self, attr, name, args)
+
+        return call
+
+    def __repr__(self):
+        return '<Instrumented {0} {1!r}>'.format(self.label, self._obj)
+
+class Instrument(object):
+    """
+    Record the COM calls made through the objects it wraps.
+
+    Attributes
+    ----------
+    records : list of CallRecord
+        One record per COM call, giving the object label, method name,
+        wall time in seconds, number of argument elements, and calling
+        hycohanz function.
+    """
+    def __init__(self):
+        self.records = []
+
+    def wrap(self, obj, label='Object'):
+        """
+        Wrap a COM object, such as oDesktop or oDesign, so that calls made
+        through it, and through the objects it returns, are recorded.
+        """
+        if isinstance(obj, InstrumentedObject):
+            return obj
+        return InstrumentedObject(self, obj, label)
+
+    def _wrap_result(self, result, method, args):
+        if isinstance(result, VALUE_TYPES) or isinstance(result, InstrumentedObject):
+            return result
+        elif isinstance(result, (list, tuple)):
+            if any(not isinstance(item, VALUE_TYPES) for item in result):
+                return type(result)(self._wrap_result(item, method, args)
+                                    for item in result)
+            return result
+        elif method == 'GetModule' and args:
+            return self.wrap(result, '{0}'.format(args[0]))
+        elif method == 'GetAppDesktop':
+            return self.wrap(result, 'Desktop')
+        else:
+            return self.wrap(result, OBJECT_METHODS.get(method, 'oObject')[1:])
+
+    def call(self, obj, method, name, args):
+        """
+        Call a method of a wrapped object, recording it.
+        """
+        caller = _caller()
+        t0 = timeit.default_timer()
+        try:
+            result = method(*args)
+        finally:
+            elapsed = timeit.default_timer() - t0
+            self.records.append(CallRecord(obj.label, name, elapsed,
+                                           _size(args), caller))
+
+        return self._wrap_result(result, name, args)
+
+    def clear(self):
+        """
+        Discard the records.
+        """
+        self.records = []
+
+    def _group(self, key):
+        groups = collections.OrderedDict()
+        for record in self.records:
+            groups.setdefault(key(record), []).append(record)
+
+        summary = []
+        for name, records in groups.items():
+            times = np.array([record.elapsed for record in records])
+            p50, p95, p99 = _percentiles(times)
+            summary.append(collections.OrderedDict([
+                ('name', name),
+                ('calls', len(records)),
+                ('total', float(times.sum())),
+                ('p50', float(p50)),
+                ('p95', float(p95)),
+                ('p99', float(p99)),
+                ('size', int(sum(record.size for record in records)))]))
+
+        summary.sort(key=lambda entry: entry['total'], reverse=True)
+        return summary
+
+    def summary(self, slowest=10):
+        """
+        Summarize the recorded calls.
+
+        Parameters
+        ----------
+        slowest : int
+            The number of slowest calls to list.
+
+        Returns
+        -------
+        summary : dict
+            'calls' and 'total' give the number and total wall time of all
+            calls.  'functions' and 'methods' list, per calling hycohanz
+            function and per COM method, the number of calls, total time,
+            p50/p95/p99 latency in seconds, and total argument size, in
+            order of decreasing total time.  'slowest' lists the slowest
+            calls.
+        """
+        order = sorted(range(len(self.records)),
+                       key=lambda n: self.records[n].elapsed, reverse=True)
+
+        return collections.OrderedDict([
+            ('calls', len(self.records)),
+            ('total', sum(record.elapsed for record in self.records)),
+            ('functions', self._group(lambda record: record.caller)),
+            ('methods', self._group(lambda record: record.obj + '.' + record.method)),
+            ('slowest', [collections.OrderedDict([('index', n)] +
+                                                 list(zip(CallRecord._fields,
+                                                          self.records[n])))
+                         for n in order[:slowest]])])
+
+    def report(self, slowest=10):
+        """
+        Return the summary as a text table.
+        """
+        summary = self.summary(slowest)
+
+        lines = ['{0} COM calls, {1:.3f} s'.format(summary['calls'], summary['total'])]
+        header = '{0:<40} {1:>7} {2:>9} {3:>9} {4:>9} {5:>9} {6:>9}'.format(
+            '', 'calls', 'total s', 'p50 ms', 'p95 ms', 'p99 ms', 'size')
+        row = '{name:<40} {calls:>7} {total:>9.3f} {p50:>9.3f} {p95:>9.3f} {p99:>9.3f} {size:>9}'
+
+        for title, key in (('hycohanz function', 'functions'), ('COM method', 'methods')):
+            lines += ['', title + header[len(title):]]
+            for entry in summary[key]:
+                entry = dict(entry, p50=1e3*entry['p50'], p95=1e3*entry['p95'],
+                             p99=1e3*entry['p99'])
+                lines.append(row.format(**entry))
+
+        lines += ['', '{0:<40} {1:>9} {2:<28} {3:>9}'.format(
+            'Slowest calls', 'ms', 'hycohanz function', 'size')]
+        for record in summary['slowest']:
+            lines.append('{0:<40} {1:>9.3f} {2:<28} {3:>9}'.format(
+                '#{index} {obj}.{method}'.format(**record),
+                1e3*record['elapsed'], record['caller'], record['size']))
+
+        return '\n'.join(lines)
+
+    def print_report(self, slowest=10):
+        """
+        Print the summary as a text table.
+        """
+        print(self.report(slowest))
+
+    def save_json(self, filename, slowest=10):
+        """
+        Save the summary to a JSON file.
+        """
+        with io.open(filename, 'w', encoding='utf-8') as f:
+            f.write('{0}'.format(json.dumps(self.summary(slowest), indent=2)))
@@ -7,10 +7,13 @@ At last count there were 2 functions implemented out of 5.
 """
 from __future__ import division, print_function, unicode_literals, absolute_import
 
+import collections
+import csv
+import io
+import json
+import os
 import warnings
 
-from hycohanz.desktop import get_active_project
-
 warnings.simplefilter('default')
 
 
@@ -56,23 +59,22 @@ def add_material(oDesktop,
     >>> import Hyphasis as hfss
     >>> 
     """
-    oProject = get_active_project(oDesktop)
-    if does_material_exist(oProject,material_name):
+    oProject = oDesktop.GetActiveProject()
+    library = get_material_library(oProject)
+    if library.exists(material_name):
         msg = material_name + " already exists in the local library. No material was created"
         warnings.warn(msg)
         return msg
     else:
-        mat_param = ["NAME:"+material_name,
-                    "permittivity:=", rel_permittivity,
-                    "permeability:=", rel_permeability,
-                    "conductivity:=", cond,
-                    "dielectric_loss_tangent:=", diel_loss_tan, 
-                    "magnetic_loss_tangent:=", mag_loss_tan, 
-                    "saturation_mag:=", mag_saturation,
-                    "lande_g_factor:=", lande_g,
-                    "delta_H:=", delta_h]
-        oDefinitionManager = oProject.GetDefinitionManager()
-        return oDefinitionManager.AddMAterial(mat_param)
+        return library.add(material_name,
+                           rel_permittivity=rel_permittivity,
+                           rel_permeability=rel_permeability,
+                           cond=cond,
+                           diel_loss_tan=diel_loss_tan,
+                           mag_loss_tan=mag_loss_tan,
+                           mag_saturation=mag_saturation,
+                           lande_g=lande_g,
+                           delta_h=delta_h)
 
 
 def does_material_exist(oProject,material_name):
@@ -96,3 +98,267 @@ def does_material_exist(oProject,material_name):
     """
     oDefinitionManager = oProject.GetDefinitionManager()
     return oDefinitionManager.DoesMaterialExist(material_name)
+
+# The parameters of add_material(), in order, with their defaults, and the
+# HFSS material properties they set.
+MATERIAL_PROPERTIES = collections.OrderedDict([
+    ("rel_permittivity", (1, "permittivity")),
+    ("rel_permeability", (1, "permeability")),
+    ("cond", (0, "conductivity")),
+    ("diel_loss_tan", (0, "dielectric_loss_tangent")),
+    ("mag_loss_tan", (0, "magnetic_loss_tangent")),
+    ("mag_saturation", (0, "saturation_mag")),
+    ("lande_g", (2, "lande_g_factor")),
+    ("delta_h", (0, "delta_H"))])
+
+# The add_material() parameters by their HFSS property names.
+_PARAMETERS = dict((hfssname, name) for name, (default, hfssname)
+                   in MATERIAL_PROPERTIES.items())
+
+class MaterialLibrary(object):
+    """
+    The materials of a project, with the definition manager looked up once
+    and the names of the materials mirrored locally.
+
+    The names are fetched with one GetProjectMaterialNames call when first
+    needed.  If HFSS doesn't support it, each name is checked with
+    DoesMaterialExist once and the answer remembered.  Materials added
+    through the library are added to the mirror, so later existence checks
+    make no COM calls.  Material names are compared ignoring case, as in
+    HFSS.
+
+    The library assumes materials are only added through hycohanz.  Call
+    invalidate() if they are changed by other means.
+
+    Use get_material_library() to share one library per project.  It is
+    discarded when the project is closed through hycohanz.
+
+    Parameters
+    ----------
+    oProject : pywin32 COMObject
+        The HFSS project.
+    """
+    def __init__(self, oProject):
+        self.project = oProject
+        self._manager = None
+        self._names = None
+        self._complete = False
+
+    @property
+    def manager(self):
+        """
+        The definition manager of the project.
+        """
+        if self._manager is None:
+            self._manager = self.project.GetDefinitionManager()
+        return self._manager
+
+    def sync(self):
+        """
+        Fetch the names of the project's materials now.
+        """
+        try:
+            names = self.manager.GetProjectMaterialNames()
+        except Exception:
+            self._names = {}
+            self._complete = False
+        else:
+            self._names = dict(('{0}'.format(name).lower(), True) for name in names)
+            self._complete = True
+
+    def invalidate(self):
+        """
+        Forget the mirrored names, so that they are fetched when next needed.
+        """
+        self._names = None
+        self._complete = False
+
+    def exists(self, name):
+        """
+        Return whether a material exists in the project.
+        """
+        if self._names is None:
+            self.sync()
+        key = name.lower()
+        try:
+            return self._names[key]
+        except KeyError:
+            if self._complete:
+                return False
+            exists = self._names[key] = bool(self.manager.DoesMaterialExist(name))
+            return exists
+
+    def add(self, name, **kwargs):
+        """
+        Add a material, without checking whether it exists.
+
+        Parameters
+        ----------
+        name : str
+            Name of the material.
+        **kwargs
+            The properties of the material, as the parameters of
+            add_material(), which gives their defaults.
+
+        Returns
+        -------
+        name : str
+            The value returned by AddMaterial.
+        """
+        parametersarray = ["NAME:" + name]
+        for parameter, (default, hfssname) in MATERIAL_PROPERTIES.items():
+            parametersarray += [hfssname + ":=", kwargs.pop(parameter, default)]
+        if kwargs:
+            raise TypeError('Unknown material properties: ' + ', '.join(sorted(kwargs)))
+
+        result = self.manager.AddMaterial(parametersarray)
+        if self._names is not None:
+            self._names[name.lower()] = True
+        return result
+
+# The libraries of the projects used, most recently used first.  pywin32 COM
+# objects are unhashable, and a new one is returned each time a project is
+# fetched, but they compare equal when they refer to the same project, so
+# the projects are compared with ==.
+_libraries = []
+
+def get_material_library(oProject):
+    """
+    Return the MaterialLibrary of a project, creating it on first use.
+
+    Parameters
+    ----------
+    oProject : pywin32 COMObject
+        The HFSS project.
+
+    Returns
+    -------
+    library : MaterialLibrary
+    """
+    for n, library in enumerate(_libraries):
+        if library.project is oProject or library.project == oProject:
+            if n:
+                del _libraries[n]
+                _libraries.insert(0, library)
+            return library
+
+    library = MaterialLibrary(oProject)
+    _libraries.insert(0, library)
+    return library
+
+def clear_material_libraries(oProject=None, ProjectName=None):
+    """
+    Discard the MaterialLibrary of a project, or of all projects if neither
+    oProject nor ProjectName is given.  Call it before closing the project,
+    as the project closing functions of hycohanz do.
+
+    Parameters
+    ----------
+    oProject : pywin32 COMObject, optional
+        The HFSS project.
+    ProjectName : str, optional
+        The name of the project, if oProject isn't given.
+
+    Returns
+    -------
+    None
+    """
+    if oProject is None and ProjectName is None:
+        del _libraries[:]
+        return
+
+    for library in list(_libraries):
+        if oProject is not None:
+            discard = library.project is oProject or library.project == oProject
+        else:
+            try:
+                discard = library.project.GetName() == ProjectName
+            except Exception:
+                # The project has already been closed by other means.
+                discard = True
+        if discard:
+            _libraries.remove(library)
+
+def _read_materials(source):
+    """
+    Return a list of material dicts from a CSV or JSON file, or from a
+    list of dicts or a dict of dicts keyed by name.
+    """
+    if isinstance(source, (str, bytes)):
+        if os.path.splitext(source)[1].lower() == '.json':
+            with io.open(source, encoding='utf-8') as f:
+                source = json.load(f, object_pairs_hook=collections.OrderedDict)
+        else:
+            with io.open(source, encoding='utf-8', newline='') as f:
+                source = list(csv.DictReader(f))
+
+    if hasattr(source, 'items'):
+        return [dict(properties, name=name) for name, properties in source.items()]
+    else:
+        return [dict(properties) for properties in source]
+
+def _material_kwargs(record):
+    kwargs = {}
+    for key, value in record.items():
+        key = key.strip()
+        if key in ("name", "material_name") or value is None or value == '':
+            continue
+        parameter = _PARAMETERS.get(key, key)
+        if isinstance(value, (str, bytes)):
+            try:
+                value = float(value)
+            except ValueError:
+                pass
+        kwargs[parameter] = value
+    return kwargs
+
+def add_materials(oProject, source):
+    """
+    Add many materials to a project, skipping those that exist.
+
+    Existence is checked against the project's MaterialLibrary, so after
+    the names are fetched once, each new material costs one AddMaterial
+    call and each existing one none.
+
+    Parameters
+    ----------
+    oProject : pywin32 COMObject
+        The HFSS project.
+    source : str, list of dict, or dict of dict
+        A CSV file with a header row, or a JSON file holding a list of
+        objects or an object keyed by material name, or the equivalent
+        Python list or dict.  Each material has a 'name' (or
+        'material_name') and any of the parameters of add_material(),
+        such as 'rel_permittivity' and 'diel_loss_tan', or the HFSS
+        property names, such as 'permittivity' and
+        'dielectric_loss_tangent'.  Missing and empty properties take the
+        add_material() defaults.
+
+    Returns
+    -------
+    report : dict
+        'created' and 'skipped' list the names of the materials added and
+        of those that already existed, and 'failed' maps the names of
+        those that couldn't be added, including those with unknown
+        properties, to the error message.
+    """
+    library = get_material_library(oProject)
+    report = {'created': [],
+              'skipped': [],
+              'failed': collections.OrderedDict()}
+
+    for record in _read_materials(source):
+        name = record.get("name") or record.get("material_name")
+        if name is None:
+            raise ValueError('Material without a name: {0!r}'.format(record))
+        if library.exists(name):
+            report['skipped'].append(name)
+            continue
+        try:
+            library.add(name, **_material_kwargs(record))
+        except Exception as e:
+            report['failed'][name] = '{0}'.format(e)
+        else:
+            report['created'].append(name)
+
+    return report
@@ -4,17 +4,26 @@ HFSS functions that use the 3D modeler. Functions in this module correspond
 more or less to the functions described in the HFSS Scripting Guide, 
 Section "3D Modeler Editor Script Commands".
 
-At last count there were 31 functions implemented out of 93.
+At last count there were 41 functions implemented out of 93.
 """
 
 from __future__ import division, print_function, unicode_literals, absolute_import
 
+import collections
+import fnmatch
+import gc
 import warnings
 
+import numpy as np
+
 from hycohanz.expression import Expression as Ex
 
 warnings.simplefilter('default')
 
+# The longest comma-separated selection string sent in one call by the
+# functions that split large selections.
+MAX_SELECTION_LENGTH = 8000
+
 def get_matched_object_name(oEditor, name_filter="*"):
     """
     Returns a list of objects that match the input filter.
@@ -62,6 +71,86 @@ def assign_material(oEditor, partlist, MaterialName="vacuum", SolveInside=True):
     
     oEditor.AssignMaterial(selectionsarray, attributesarray)
 
+def _join_selections(partlist, maxlength):
+    """
+    Join part names into comma-separated selection strings no longer than
+    maxlength, except for single names that are longer.
+    """
+    selections = []
+    chunk = []
+    length = -1
+    for part in partlist:
+        if chunk and length + 1 + len(part) > maxlength:
+            selections.append(','.join(chunk))
+            chunk = []
+            length = -1
+        chunk.append(part)
+        length += 1 + len(part)
+    if chunk:
+        selections.append(','.join(chunk))
+    return selections
+
+def assign_materials(oEditor, mapping=None, rules=None, SolveInside=True,
+                     MaxLength=MAX_SELECTION_LENGTH):
+    """
+    Assign materials to many parts, with one AssignMaterial call per
+    material and SolveInside setting rather than one per part.
+    
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor in which the operation will be performed.
+    mapping : dict, optional
+        Part names mapped to the material name, or to a (MaterialName, 
+        SolveInside) tuple.
+    rules : list of (str, material), optional
+        Wildcard patterns, such as 'Via*', and the material of the parts 
+        matching them, given as in mapping.  The part names are fetched 
+        with one GetMatchedObjectName call and matched locally, the first 
+        matching rule winning.  Parts in mapping are not matched.
+    SolveInside : bool
+        The SolveInside setting of materials given by name alone.
+    MaxLength : int
+        The longest selection string sent in one call.  Larger groups are 
+        split over several calls.
+    
+    Returns
+    -------
+    groups : OrderedDict
+        The (MaterialName, SolveInside) pairs mapped to the list of parts 
+        assigned them, in the order first seen.
+    """
+    assignments = collections.OrderedDict()
+    if mapping:
+        assignments.update(mapping)
+
+    if rules:
+        for part in oEditor.GetMatchedObjectName("*"):
+            if part in assignments:
+                continue
+            for pattern, material in rules:
+                if fnmatch.fnmatchcase(part, pattern):
+                    assignments[part] = material
+                    break
+
+    groups = collections.OrderedDict()
+    for part, material in assignments.items():
+        if isinstance(material, (list, tuple)):
+            key = (material[0], material[1])
+        else:
+            key = (material, SolveInside)
+        groups.setdefault(key, []).append(part)
+
+    for (materialname, solveinside), partlist in groups.items():
+        attributesarray = ["NAME:Attributes", 
+                           "MaterialName:=", materialname, 
+                           "SolveInside:=", solveinside]
+        for selections in _join_selections(partlist, MaxLength):
+            oEditor.AssignMaterial(["NAME:Selections", "Selections:=", selections],
+                                   attributesarray)
+
+    return groups
+
 def create_rectangle(   oEditor, 
                         xs, 
                         ys, 
@@ -437,7 +526,405 @@ def create_box( oEditor,
                     "MaterialValue:=", MaterialValue,
                     "SolveInside:=", SolveInside]
 
-    return oEditor.CreateBox(BoxParameters, Attributes)    
+    return oEditor.CreateBox(BoxParameters, Attributes)
+
+def create_cylinder(oEditor, xc, yc, zc, radius, height,
+                    WhichAxis='Z',
+                    NumSides=0,
+                    Name='Cylinder1',
+                    Flags='',
+                    Color=(132, 132, 193),
+                    Transparency=0,
+                    PartCoordinateSystem='Global',
+                    UDMId='',
+                    MaterialValue='"vacuum"',
+                    SolveInside=True):
+    """
+    Create a cylinder primitive.
+
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor in which the operation will be performed.
+    xc : float or hycohanz Expression object
+    yc : float or hycohanz Expression object
+    zc : float or hycohanz Expression object
+        The x, y, and z coordinates of the center of the cylinder base.
+    radius : float or hycohanz Expression object
+        The radius of the cylinder.
+    height : float or hycohanz Expression object
+        The height of the cylinder.
+    WhichAxis : str
+        The axis of the cylinder.  Can be 'X', 'Y', or 'Z'.
+    NumSides : int
+        If 0, the cylinder is a true cylinder.  Otherwise, it is a prism
+        with NumSides sides.
+    Name : str
+        The requested name of the object.  If this is not available, HFSS
+        will assign a different name, which is returned by this function.
+    Flags : str
+        Flags associated with this object.  See HFSS help for details.
+    Color : tuple of length=3
+        RGB components of the cylinder
+    Transparency : float between 0 and 1
+        Fractional transparency.  0 is opaque and 1 is transparent.
+    PartCoordinateSystem : str
+        The name of the coordinate system in which the object is drawn.
+    MaterialValue : str
+        Name of the material to assign to the object.  Name must be surrounded
+        by double quotes.
+    SolveInside : bool
+        Whether to mesh the interior of the object and solve for the fields
+        inside.
+
+    Returns
+    -------
+    str
+        The actual name of the created object.
+    """
+    cylinderparams = ["NAME:CylinderParameters",
+                      "XCenter:=", Ex(xc).expr,
+                      "YCenter:=", Ex(yc).expr,
+                      "ZCenter:=", Ex(zc).expr,
+                      "Radius:=", Ex(radius).expr,
+                      "Height:=", Ex(height).expr,
+                      "WhichAxis:=", str(WhichAxis),
+                      "NumSides:=", str(NumSides)]
+
+    attributesarray = ["NAME:Attributes",
+                       "Name:=", Name,
+                       "Flags:=", Flags,
+                       "Color:=", "({r} {g} {b})".format(r=Color[0], g=Color[1], b=Color[2]),
+                       "Transparency:=", Transparency,
+                       "PartCoordinateSystem:=", PartCoordinateSystem,
+                       "UDMId:=", UDMId,
+                       "MaterialValue:=", MaterialValue,
+                       "SolveInside:=", SolveInside]
+
+    return oEditor.CreateCylinder(cylinderparams, attributesarray)
+
+def _format_column(values, count):
+    """
+    Format a scalar, or a sequence of length count, of numbers, strings, or
+    Expression objects as a list of HFSS expression strings.
+    """
+    if np.ndim(values) == 0:
+        return [Ex(values).expr] * count
+
+    values = np.asarray(values)
+
+    if len(values) != count:
+        raise ValueError('expected {0} values, got {1}'.format(count, len(values)))
+
+    if values.dtype.kind in 'iuf':
+        return list(map(str, values.tolist()))
+    else:
+        return [Ex(v).expr for v in values.tolist()]
+
+def _format_colors(Colors, count):
+    """
+    Format a single RGB triple, or an N x 3 array of them, as HFSS color
+    strings.
+    """
+    colors = np.asarray(Colors)
+    if colors.ndim == 1:
+        return ["({0} {1} {2})".format(*colors.tolist())] * count
+
+    return ["({0} {1} {2})".format(*rgb) for rgb in colors.tolist()]
+
+def _constant_step_runs(points, keys, MinRun):
+    """
+    Split the objects into runs of consecutive objects with identical keys
+    whose positions advance by a constant, nonzero step.
+
+    Returns a list of (start, stop, step) tuples.  step is None for runs
+    shorter than MinRun, which must be created one at a time.
+    """
+    count = len(keys)
+    if count < MinRun:
+        return [(0, count, None)]
+
+    steps = np.diff(points, axis=0)
+    samestep = np.zeros(count, dtype=bool)
+    samestep[1:-1] = np.all(np.isclose(steps[1:], steps[:-1],
+                                       rtol=1e-9, atol=1e-12), axis=1)
+    nonzero = np.any(steps != 0, axis=1).tolist()
+    samestep = samestep.tolist()
+
+    runs = []
+    pending = 0
+    start = 0
+    while start < count:
+        stop = start + 1
+        if stop < count and keys[stop] == keys[start] and nonzero[start]:
+            stop += 1
+            while stop < count and keys[stop] == keys[start] and samestep[stop - 1]:
+                stop += 1
+
+        if stop - start >= MinRun:
+            if pending < start:
+                runs.append((pending, start, None))
+            runs.append((start, stop, steps[start]))
+            pending = stop
+            start = stop
+        else:
+            start += 1
+
+    if pending < count:
+        runs.append((pending, count, None))
+
+    return runs
+
+def _create_many(oEditor, method, parametersname, pointkeys, points,
+                 shapeparams, Name, Names, Colors, MaterialValues, Attributes,
+                 Duplicate, MinRun):
+    """
+    Create many primitives of one kind, duplicating a seed object along a
+    line wherever a run of identical objects is evenly spaced.
+
+    pointkeys names the three position parameters given by the N x 3 array 
+    points, shapeparams is a list of (key, values) pairs for the remaining 
+    primitive parameters, and Attributes holds the attributes shared by 
+    every object.
+    """
+    points = np.asarray(points)
+    if points.ndim != 2 or points.shape[1] != 3:
+        raise ValueError('positions must have shape (N, 3)')
+
+    count = points.shape[0]
+
+    keys = list(pointkeys) + [key for key, values in shapeparams]
+    columns = [_format_column(points[:, k], count) for k in range(3)]
+    columns += [_format_column(values, count) for key, values in shapeparams]
+
+    colors = _format_colors(Colors, count)
+    materials = _format_column(MaterialValues, count)
+
+    if Names is None:
+        names = [Name] * count
+    else:
+        names = [str(name) for name in Names]
+        if len(names) != count:
+            raise ValueError('expected {0} names, got {1}'.format(count, len(names)))
+
+    if Duplicate and Names is None and points.dtype.kind in 'iuf':
+        shapekeys = list(zip(colors, materials, *columns[3:]))
+        runs = _constant_step_runs(points.astype(float), shapekeys, MinRun)
+    else:
+        runs = [(0, count, None)]
+
+    attributes = ["NAME:Attributes",
+                  "Name:=", None,
+                  "Flags:=", Attributes['Flags'],
+                  "Color:=", None,
+                  "Transparency:=", Attributes['Transparency'],
+                  "PartCoordinateSystem:=", Attributes['PartCoordinateSystem'],
+                  "UDMId:=", Attributes['UDMId'],
+                  "MaterialValue:=", None,
+                  "SolveInside:=", Attributes['SolveInside']]
+
+    create = getattr(oEditor, method)
+
+    def create_one(n):
+        parameters = [parametersname]
+        for key, column in zip(keys, columns):
+            parameters += [key + ":=", column[n]]
+        parameters += Attributes['Extra']
+
+        attributes[2] = names[n]
+        attributes[6] = colors[n]
+        attributes[14] = materials[n]
+
+        return create(parameters, list(attributes))
+
+    partlist = []
+    existing = None
+    for start, stop, step in runs:
+        if step is None:
+            created = [create_one(n) for n in range(start, stop)]
+        else:
+            seed = create_one(start)
+            if existing is None:
+                existing = set(get_matched_object_name(oEditor))
+            existing.add(seed)
+            x, y, z = step.tolist()
+            duplicate = lambda selection: duplicate_along_line(oEditor, selection, x, y, z,
+                                                               NumClones=stop - start)
+            created = [seed] + _duplicate_part(oEditor, duplicate, seed, stop - start, existing)
+        if existing is not None:
+            existing.update(created)
+        partlist += created
+
+    return partlist
+
+def create_boxes(oEditor, positions, sizes,
+                 Name='Box1',
+                 Names=None,
+                 Flags='',
+                 Colors=(132, 132, 193),
+                 Transparency=0,
+                 PartCoordinateSystem='Global',
+                 UDMId='',
+                 MaterialValues='"vacuum"',
+                 SolveInside=True,
+                 Duplicate=True,
+                 MinRun=3):
+    """
+    Draw many 3D boxes.
+
+    When Names is not given, each run of consecutive boxes that have the
+    same size, color, and material and are evenly spaced is drawn as a
+    single box followed by one DuplicateAlongLine() call, so that a row of
+    N boxes costs two COM calls instead of N.
+
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor in which the operation will be performed.
+    positions : array_like, shape (N, 3)
+        The x, y, and z coordinates of the base point of each box.  Elements
+        can be numeric, strings, or Expression objects.  Only numeric
+        positions are considered for duplication.
+    sizes : array_like, shape (3,) or (N, 3)
+        x-, y-, and z-dimensions of the boxes.
+    Name : str
+        The requested name of the boxes when Names is not given.  HFSS will
+        number the objects as needed.
+    Names : list of str
+        The requested name of each box.  Giving Names disables duplication.
+    Colors : tuple of length=3 or array_like, shape (N, 3)
+        RGB components of the boxes.
+    MaterialValues : str or list of str
+        Name of the material of the boxes.  Names must be surrounded
+        by double quotes.
+    Duplicate : bool
+        Whether evenly-spaced runs of identical boxes may be duplicated.
+    MinRun : int
+        The shortest run of boxes that is drawn by duplication.
+
+    See create_box() for the remaining parameters.
+
+    Returns
+    -------
+    partlist : list of str
+        The actual names of the created boxes, in the order of positions.
+    """
+    sizes = np.asarray(sizes)
+    if sizes.ndim == 1:
+        xsize, ysize, zsize = sizes.tolist()
+    else:
+        xsize, ysize, zsize = sizes[:, 0], sizes[:, 1], sizes[:, 2]
+
+    shapeparams = [("XSize", xsize),
+                   ("YSize", ysize),
+                   ("ZSize", zsize)]
+
+    attributes = {'Flags': Flags,
+                  'Transparency': Transparency,
+                  'PartCoordinateSystem': PartCoordinateSystem,
+                  'UDMId': UDMId,
+                  'SolveInside': SolveInside,
+                  'Extra': []}
+
+    return _create_many(oEditor, "CreateBox", "NAME:BoxParameters",
+                        ("XPosition", "YPosition", "ZPosition"), positions, shapeparams, Name, Names, Colors,
+                        MaterialValues, attributes, Duplicate, MinRun)
+
+def create_cylinders(oEditor, centers, radii, heights,
+                     WhichAxis='Z',
+                     NumSides=0,
+                     Name='Cylinder1',
+                     Names=None,
+                     Flags='',
+                     Colors=(132, 132, 193),
+                     Transparency=0,
+                     PartCoordinateSystem='Global',
+                     UDMId='',
+                     MaterialValues='"vacuum"',
+                     SolveInside=True,
+                     Duplicate=True,
+                     MinRun=3):
+    """
+    Draw many cylinders.  Evenly-spaced runs of identical cylinders are
+    drawn by duplication as in create_boxes().
+
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor in which the operation will be performed.
+    centers : array_like, shape (N, 3)
+        The x, y, and z coordinates of the center of each cylinder base.
+    radii : float or array_like, shape (N,)
+        The radii of the cylinders.
+    heights : float or array_like, shape (N,)
+        The heights of the cylinders.
+
+    See create_cylinder() and create_boxes() for the remaining parameters.
+
+    Returns
+    -------
+    partlist : list of str
+        The actual names of the created cylinders, in the order of centers.
+    """
+    shapeparams = [("Radius", radii),
+                   ("Height", heights)]
+
+    attributes = {'Flags': Flags,
+                  'Transparency': Transparency,
+                  'PartCoordinateSystem': PartCoordinateSystem,
+                  'UDMId': UDMId,
+                  'SolveInside': SolveInside,
+                  'Extra': ["WhichAxis:=", str(WhichAxis),
+                            "NumSides:=", str(NumSides)]}
+
+    return _create_many(oEditor, "CreateCylinder", "NAME:CylinderParameters",
+                        ("XCenter", "YCenter", "ZCenter"), centers, shapeparams, Name, Names, Colors,
+                        MaterialValues, attributes, Duplicate, MinRun)
+
+def create_spheres(oEditor, centers, radii,
+                   Name='Sphere1',
+                   Names=None,
+                   Flags='',
+                   Colors=(132, 132, 193),
+                   Transparency=0,
+                   PartCoordinateSystem='Global',
+                   UDMId='',
+                   MaterialValues='"vacuum"',
+                   SolveInside=True,
+                   Duplicate=True,
+                   MinRun=3):
+    """
+    Draw many spheres.  Evenly-spaced runs of identical spheres are drawn
+    by duplication as in create_boxes().
+
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor in which the operation will be performed.
+    centers : array_like, shape (N, 3)
+        The x, y, and z coordinates of the center of each sphere.
+    radii : float or array_like, shape (N,)
+        The radii of the spheres.
+
+    See create_sphere() and create_boxes() for the remaining parameters.
+
+    Returns
+    -------
+    partlist : list of str
+        The actual names of the created spheres, in the order of centers.
+    """
+    shapeparams = [("Radius", radii)]
+
+    attributes = {'Flags': Flags,
+                  'Transparency': Transparency,
+                  'PartCoordinateSystem': PartCoordinateSystem,
+                  'UDMId': UDMId,
+                  'SolveInside': SolveInside,
+                  'Extra': []}
+
+    return _create_many(oEditor, "CreateSphere", "NAME:SphereParameters",
+                        ("XCenter", "YCenter", "ZCenter"), centers, shapeparams, Name, Names, Colors,
+                        MaterialValues, attributes, Duplicate, MinRun)
 
 def create_polyline(oEditor, x, y, z, Name="Polyline1", 
                                 Flags="", 
@@ -625,6 +1112,116 @@ def create_polyline(oEditor, x, y, z, Name="Polyline1",
 
     return polyname
 
+def create_polyline_array(oEditor, points, Name="Polyline1",
+                                           Units="meter",
+                                           Precision=15,
+                                           Flags="",
+                                           Color="(132 132 193)",
+                                           Transparency=0,
+                                           PartCoordinateSystem="Global",
+                                           UDMId="",
+                                           MaterialValue='"vacuum"',
+                                           SolveInside=True,
+                                           IsPolylineCovered=True,
+                                           IsPolylineClosed=True,
+                                           SegmentType="Line",
+                                           NoOfPoints=2):
+    """
+    Draw a polyline from an N x 3 array of numeric vertex coordinates.
+
+    This is a fast path for create_polyline() intended for polylines with
+    many thousands of vertices.  All coordinates are formatted in a single
+    pass, and closing the polyline doesn't copy the input array.
+
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor in which to perform the operation
+    points : array_like, shape (N, 3)
+        The x, y, and z locations of the polyline vertices.
+    Name : str
+        Requested name of the polyline
+    Units : str
+        Length units appended to every coordinate, for example "mm".
+    Precision : int
+        Number of significant digits used to format the coordinates.
+    IsPolylineClosed : bool
+        Whether the polyline should be closed.  If True, a segment from the
+        last vertex back to the first is added.
+
+    See create_polyline() for the remaining parameters.
+
+    Returns
+    -------
+    polyname : str
+        Actual name of the polyline
+
+    Example Usage
+    -------------
+    >>> import numpy as np
+    >>> import hycohanz as hfss
+    >>> [oAnsoftApp, oDesktop] = hfss.setup_interface()
+    >>> oProject = hfss.new_project(oDesktop)
+    >>> oDesign = hfss.insert_design(oProject, "HFSSDesign1", "DrivenModal")
+    >>> oEditor = hfss.set_active_editor(oDesign, "3D Modeler")
+    >>> t = np.linspace(0, 2*np.pi, 10000, endpoint=False)
+    >>> outline = np.column_stack([np.cos(t), np.sin(t), np.zeros_like(t)])
+    >>> circ = hfss.create_polyline_array(oEditor, outline, Units="mm")
+    """
+    points = np.asarray(points, dtype=float)
+    if points.ndim != 2 or points.shape[1] != 3:
+        raise ValueError('points must have shape (N, 3)')
+
+    fmt = '%.{0}g{1}'.format(int(Precision), Units)
+
+    # The point and segment arrays hold millions of small lists that can't 
+    # form reference cycles, so don't let the cyclic garbage collector 
+    # repeatedly traverse them while they are being built.
+    gcenabled = gc.isenabled()
+    gc.disable()
+    try:
+        xv = [fmt % v for v in points[:, 0].tolist()]
+        yv = [fmt % v for v in points[:, 1].tolist()]
+        zv = [fmt % v for v in points[:, 2].tolist()]
+
+        if IsPolylineClosed:
+            # Close the polyline by repeating the formatted first vertex.
+            xv.append(xv[0])
+            yv.append(yv[0])
+            zv.append(zv[0])
+
+        polylinepoints = ["NAME:PolylinePoints"]
+        polylinepoints += [[["NAME:PLPoint", "X:=", xpt, "Y:=", ypt, "Z:=", zpt]]
+                           for xpt, ypt, zpt in zip(xv, yv, zv)]
+
+        polylinesegments = ["NAME:PolylineSegments"]
+        polylinesegments += [["NAME:PLSegment",
+                              "SegmentType:=", SegmentType,
+                              "StartIndex:=", n,
+                              "NoOfPoints:=", NoOfPoints]
+                             for n in range(len(xv) - 1)]
+    finally:
+        if gcenabled:
+            gc.enable()
+
+    polylineparams = ["NAME:PolylineParameters",
+                      "IsPolylineCovered:=", IsPolylineCovered,
+                      "IsPolylineClosed:=", IsPolylineClosed,
+                      polylinepoints,
+                      polylinesegments]
+
+    polylineattribs = ["NAME:Attributes",
+                       "Name:=", Name,
+                       "Flags:=", Flags,
+                       "Color:=", Color,
+                       "Transparency:=", Transparency,
+                       "PartCoordinateSystem:=", PartCoordinateSystem,
+                       "UDMId:=", UDMId,
+                       "MaterialValue:=", MaterialValue,
+                       "SolveInside:=",  SolveInside]
+
+    return oEditor.CreatePolyline(polylineparams, polylineattribs)
+
 def get_selections(oEditor):
     """
     Get a list of the currently-selected objects in the design.  
@@ -727,6 +1324,358 @@ def paste(oEditor):
     pastelist = oEditor.Paste()
     return pastelist
 
+def duplicate_along_line(oEditor, partlist, x, y, z,
+                         NumClones=2,
+                         CreateNewObjects=True,
+                         DuplicateAssignments=False,
+                         NewPartsModelFlag="Model"):
+    """
+    Duplicate specified parts along a line.
+    
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor in which the operation will be performed.
+    partlist : list
+        List of part name strings to be duplicated.
+    x : float or hycohanz Expression object
+        x component of the displacement between clones.
+    y : float or hycohanz Expression object
+        y component of the displacement between clones.
+    z : float or hycohanz Expression object
+        z component of the displacement between clones.
+    NumClones : int
+        Total number of objects along the line, including the originals.
+    CreateNewObjects : bool
+        Whether the clones are new objects rather than additional lumps of 
+        the original parts.
+    DuplicateAssignments : bool
+        Whether boundaries and excitations are duplicated with the parts.
+        
+    Returns
+    -------
+    newpartlist : list of str
+        Names of the created parts.  Older versions of HFSS return nothing, 
+        in which case this list is empty.
+    """
+    selectionsarray = ["NAME:Selections", 
+                       "Selections:=", ','.join(partlist), 
+                       "NewPartsModelFlag:=", NewPartsModelFlag]
+    
+    duplicateparametersarray = ["NAME:DuplicateToAlongLineParameters", 
+                                "CreateNewObjects:=", CreateNewObjects, 
+                                "XComponent:=", Ex(x).expr, 
+                                "YComponent:=", Ex(y).expr, 
+                                "ZComponent:=", Ex(z).expr, 
+                                "NumClones:=", str(NumClones)]
+    
+    optionsarray = ["NAME:Options", 
+                    "DuplicateAssignments:=", DuplicateAssignments]
+    
+    newpartlist = oEditor.DuplicateAlongLine(selectionsarray, 
+                                             duplicateparametersarray, 
+                                             optionsarray)
+    
+    if newpartlist is None:
+        return []
+    else:
+        return list(newpartlist)
+
+def duplicate_around_axis(oEditor, partlist, axis, angle,
+                          NumClones=2,
+                          CreateNewObjects=True,
+                          DuplicateAssignments=False,
+                          NewPartsModelFlag="Model"):
+    """
+    Duplicate specified parts around an axis.
+
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor in which the operation will be performed.
+    partlist : list
+        List of part name strings to be duplicated.
+    axis : str
+        Rotation axis.  One of 'X', 'Y', or 'Z'.
+    angle : str or hycohanz Expression object
+        Angle between clones, including units, e.g. "15deg".
+    NumClones : int
+        Total number of objects around the axis, including the originals.
+    CreateNewObjects : bool
+        Whether the clones are new objects rather than additional lumps of
+        the original parts.
+    DuplicateAssignments : bool
+        Whether boundaries and excitations are duplicated with the parts.
+
+    Returns
+    -------
+    newpartlist : list of str
+        Names of the created parts.  Older versions of HFSS return nothing,
+        in which case this list is empty.
+    """
+    selectionsarray = ["NAME:Selections",
+                       "Selections:=", ','.join(partlist),
+                       "NewPartsModelFlag:=", NewPartsModelFlag]
+
+    duplicateparametersarray = ["NAME:DuplicateAroundAxisParameters",
+                                "CreateNewObjects:=", CreateNewObjects,
+                                "WhichAxis:=", axis,
+                                "AngleStr:=", Ex(angle).expr,
+                                "NumClones:=", str(NumClones)]
+
+    optionsarray = ["NAME:Options",
+                    "DuplicateAssignments:=", DuplicateAssignments]
+
+    newpartlist = oEditor.DuplicateAroundAxis(selectionsarray,
+                                              duplicateparametersarray,
+                                              optionsarray)
+
+    if newpartlist is None:
+        return []
+    else:
+        return list(newpartlist)
+
+def _duplicate_part(oEditor, duplicate, part, NumClones, existing):
+    """
+    Duplicate a single part with duplicate(partlist), returning the names
+    of its NumClones - 1 clones in order.
+
+    The names HFSS returns are used.  Older versions of HFSS return
+    nothing, in which case the clones are the objects that GetMatchedObjectName
+    lists and that aren't in existing, the set of names in the model
+    before the call, which is then updated.
+    """
+    newpartlist = duplicate([part])
+    if len(newpartlist) != NumClones - 1:
+        newpartlist = [name for name in get_matched_object_name(oEditor)
+                       if name not in existing]
+        if len(newpartlist) != NumClones - 1:
+            raise RuntimeError('expected {0} clones of {1}, found {2}'.format(
+                NumClones - 1, part, len(newpartlist)))
+    existing.update(newpartlist)
+    return newpartlist
+
+def _clone_number(name):
+    """
+    Return the (source, number) HFSS names a clone after, <source>_<number>,
+    or None if name isn't of that form.
+    """
+    source, separator, number = name.rpartition('_')
+    if source and number.isdigit():
+        return source, int(number)
+    return None
+
+def _duplicate_parts(oEditor, duplicate, partlist, NumClones, existing):
+    """
+    Duplicate the parts with one duplicate(partlist) call, returning the
+    names of the NumClones - 1 clones of each part in order.
+
+    HFSS names each clone after its source, <source>_<number>, numbering
+    the clones of a source in order, so the clones are matched to their
+    sources by name.  The names HFSS returns are used, or, from older
+    versions of HFSS that return nothing, the objects GetMatchedObjectName
+    lists that aren't in existing, the set of names in the model before the
+    call, which is updated.  If the clones can't be matched to the parts,
+    they are deleted, and the parts are duplicated one call per part.
+    """
+    newpartlist = list(duplicate(partlist))
+    if len(newpartlist) != len(partlist)*(NumClones - 1):
+        newpartlist = [name for name in get_matched_object_name(oEditor)
+                       if name not in existing]
+    existing.update(newpartlist)
+
+    clones = dict((part, []) for part in partlist)
+    for name in newpartlist:
+        numbered = _clone_number(name)
+        if numbered is not None and numbered[0] in clones:
+            clones[numbered[0]].append((numbered[1], name))
+
+    if (len(newpartlist) == len(partlist)*(NumClones - 1) and
+            all(len(partclones) == NumClones - 1 for partclones in clones.values())):
+        return [[name for number, name in sorted(clones[part])] for part in partlist]
+
+    if newpartlist:
+        delete(oEditor, newpartlist)
+        existing.difference_update(newpartlist)
+    return [_duplicate_part(oEditor, duplicate, part, NumClones, existing)
+            for part in partlist]
+
+def _remove_elements(oEditor, elements, Remove):
+    """
+    Delete the array elements selected by Remove, given either as a list of
+    index tuples or as a boolean array, and drop them from elements.
+    """
+    if Remove is None:
+        return elements
+
+    mask = np.asarray(Remove)
+    if mask.dtype == bool:
+        removed = [tuple(index) for index in np.argwhere(mask).tolist()]
+    else:
+        removed = [tuple(np.atleast_1d(index).tolist()) for index in Remove]
+
+    partlist = []
+    for index in removed:
+        partlist += elements.pop(index)
+
+    if partlist:
+        delete(oEditor, partlist)
+
+    return elements
+
+def _array_result(parts, elements):
+    if isinstance(parts, (list, tuple)):
+        return elements
+    else:
+        return dict((index, names[0]) for index, names in elements.items())
+
+def create_array(oEditor, parts, counts, pitch,
+                 Remove=None,
+                 DuplicateAssignments=False):
+    """
+    Build a rectangular array of the given parts using DuplicateAlongLine().
+    Along each array dimension, the array built so far is duplicated with
+    one call, so an N x M array takes two calls, plus one
+    GetMatchedObjectName() call for the names of the model before the
+    array is built.  The clones are matched to their sources by the names
+    HFSS gives them, <source>_<number>.  Should that fail, the clones are
+    deleted and each part is duplicated with a call of its own.
+
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor in which the operation will be performed.
+    parts : str or list of str
+        The part, or parts, forming the array element at index (0, 0).
+    counts : int or sequence of int
+        Number of elements along each array dimension, e.g. (N, M).
+    pitch : sequence
+        Displacement between elements along each array dimension.  Each
+        entry is either a float or Expression giving the pitch along the
+        x, y, or z axis in turn, or a sequence of three giving the
+        displacement vector.
+    Remove : list of tuples or array_like of bool
+        Elements to delete after the array is built, for thinned arrays.
+        Either a list of index tuples or a boolean array of shape counts
+        that is True for the elements to remove.  All removed elements are
+        deleted in one Delete() call.
+    DuplicateAssignments : bool
+        Whether boundaries and excitations are duplicated with the parts.
+
+    Returns
+    -------
+    elements : dict
+        Maps each index tuple, e.g. (i, j), to the name of the element, or
+        to the list of part names if parts is a list.
+
+    Examples
+    --------
+    >>> import hycohanz as hfss
+    >>> [oAnsoftApp, oDesktop] = hfss.setup_interface()
+    >>> oProject = hfss.new_project(oDesktop)
+    >>> oDesign = hfss.insert_design(oProject, "HFSSDesign1", "DrivenModal")
+    >>> oEditor = hfss.set_active_editor(oDesign, "3D Modeler")
+    >>> patch = hfss.create_rectangle(oEditor, 0, 0, 0, 1, 1, Name='Patch')
+    >>> elements = hfss.create_array(oEditor, patch, (8, 8), (2, 2))
+    >>> elements[(7, 7)]
+    'Patch_7_7'
+    """
+    if isinstance(parts, (list, tuple)):
+        partlist = list(parts)
+    else:
+        partlist = [parts]
+
+    counts = [int(n) for n in np.atleast_1d(counts)]
+
+    vectors = []
+    for axis, step in enumerate(pitch):
+        if np.ndim(step) == 0:
+            vector = [0, 0, 0]
+            vector[axis] = step
+        else:
+            vector = list(step)
+        vectors.append(vector)
+
+    if len(vectors) != len(counts):
+        raise ValueError('pitch must have one entry per array dimension')
+
+    existing = None
+    elements = [((), partlist)]
+    for NumClones, (x, y, z) in zip(counts, vectors):
+        selection = [name for index, names in elements for name in names]
+
+        if NumClones > 1:
+            if existing is None:
+                existing = set(get_matched_object_name(oEditor))
+            duplicate = lambda parts: duplicate_along_line(oEditor, parts, x, y, z,
+                                                           NumClones=NumClones,
+                                                           DuplicateAssignments=DuplicateAssignments)
+            clones = iter(_duplicate_parts(oEditor, duplicate, selection, NumClones,
+                                           existing))
+        else:
+            clones = iter([])
+
+        grown = [(index + (0,), names) for index, names in elements]
+        for index, names in elements:
+            partclones = [next(clones) for name in names]
+            for k in range(1, NumClones):
+                grown.append((index + (k,), [c[k - 1] for c in partclones]))
+        elements = grown
+
+    elements = _remove_elements(oEditor, dict(elements), Remove)
+
+    return _array_result(parts, elements)
+
+def create_circular_array(oEditor, parts, count, axis, angle,
+                          Remove=None,
+                          DuplicateAssignments=False):
+    """
+    Build a circular array of the given parts using one
+    DuplicateAroundAxis() call.
+
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor in which the operation will be performed.
+    parts : str or list of str
+        The part, or parts, forming the array element at index (0,).
+    count : int
+        Number of elements around the axis.
+    axis : str
+        Rotation axis.  One of 'X', 'Y', or 'Z'.
+    angle : str or hycohanz Expression object
+        Angle between elements, including units, e.g. "15deg".
+
+    See create_array() for Remove and DuplicateAssignments.
+
+    Returns
+    -------
+    elements : dict
+        Maps each index tuple (i,) to the name of the element, or to the
+        list of part names if parts is a list.
+    """
+    if isinstance(parts, (list, tuple)):
+        partlist = list(parts)
+    else:
+        partlist = [parts]
+
+    if count > 1:
+        duplicate = lambda parts: duplicate_around_axis(oEditor, parts, axis, angle,
+                                                        NumClones=count,
+                                                        DuplicateAssignments=DuplicateAssignments)
+        existing = set(get_matched_object_name(oEditor))
+        clones = _duplicate_parts(oEditor, duplicate, partlist, count, existing)
+    else:
+        clones = []
+
+    elements = {(0,): partlist}
+    for k in range(1, count):
+        elements[(k,)] = [partclones[k - 1] for partclones in clones]
+
+    elements = _remove_elements(oEditor, elements, Remove)
+
+    return _array_result(parts, elements)
+
 def imprint(oEditor, blanklist, toollist, KeepOriginals=False):
     """
     Imprint an object onto another object.
@@ -1340,3 +2289,129 @@ def get_face_ids(oEditor, body_name):
     face_id_list = list(oEditor.GetFaceIDs(body_name))
     return map(int,face_id_list)
 
+def get_face_area(oEditor, faceid):
+    """
+    Get the area of a given face.
+    
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor in which the operation will be performed.
+    faceid : int
+        The face ID of the given face.
+        
+    Returns
+    -------
+    area : float
+        The area of the face in model units.
+    """
+    return float(oEditor.GetFaceArea(faceid))
+
+def get_face_center(oEditor, faceid):
+    """
+    Get the center of a given planar face.
+    
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor in which the operation will be performed.
+    faceid : int
+        The face ID of the given face.
+        
+    Returns
+    -------
+    position : list of float
+        The x, y, and z coordinates of the face center in model units.
+    """
+    return [float(v) for v in oEditor.GetFaceCenter(faceid)]
+
+def get_edge_ids_from_object(oEditor, body_name):
+    """
+    Get the edge id list of a given body name.
+    
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor in which the operation will be performed.
+    body_name : str
+        Name of the body whose edge id list will be returned
+        
+    Returns
+    -------
+    edge_id_list : list of int
+        list with edge Id numbers of body_name
+    """
+    return [int(edgeid) for edgeid in oEditor.GetEdgeIDsFromObject(body_name)]
+
+def get_edge_ids_from_face(oEditor, faceid):
+    """
+    Get the ids of the edges bounding a given face.
+    
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor in which the operation will be performed.
+    faceid : int
+        The face ID of the given face.
+        
+    Returns
+    -------
+    edge_id_list : list of int
+        list with the edge Id numbers of the face
+    """
+    return [int(edgeid) for edgeid in oEditor.GetEdgeIDsFromFace(faceid)]
+
+def get_vertex_ids_from_object(oEditor, body_name):
+    """
+    Get the vertex id list of a given body name.
+    
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor in which the operation will be performed.
+    body_name : str
+        Name of the body whose vertex id list will be returned
+        
+    Returns
+    -------
+    vertex_id_list : list of int
+        list with vertex Id numbers of body_name
+    """
+    return [int(vertexid) for vertexid in oEditor.GetVertexIDsFromObject(body_name)]
+
+def get_vertex_ids_from_edge(oEditor, edgeid):
+    """
+    Get the ids of the end vertices of a given edge.
+    
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor in which the operation will be performed.
+    edgeid : int
+        The edge ID of the given edge.
+        
+    Returns
+    -------
+    vertex_id_list : list of int
+        list with the vertex Id numbers of the edge.  Closed edges such 
+        as circles have fewer than two vertices.
+    """
+    return [int(vertexid) for vertexid in oEditor.GetVertexIDsFromEdge(edgeid)]
+
+def get_vertex_position(oEditor, vertexid):
+    """
+    Get the position of a given vertex.
+    
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor in which the operation will be performed.
+    vertexid : int
+        The vertex ID of the given vertex.
+        
+    Returns
+    -------
+    position : list of float
+        The x, y, and z coordinates of the vertex in model units.
+    """
+    return [float(v) for v in oEditor.GetVertexPosition(vertexid)]
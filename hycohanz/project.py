@@ -8,6 +8,9 @@ At last count there were 3 functions implemented out of 17.
 """
 from __future__ import division, print_function, unicode_literals, absolute_import
 
+from hycohanz.design import (clear_module_cache,
+                             _remember_project)
+
 def get_project_name(oProject):
     """
     Get the name of the specified project.
@@ -43,6 +46,7 @@ def set_active_design(oProject, designname):
         
     """
     oEditor = oProject.SetActiveDesign(designname)
+    _remember_project(oEditor, oProject)
     
     return oEditor
     
@@ -71,6 +75,7 @@ def insert_design(oProject, designname, solutiontype):
         
     """
     oDesign = oProject.InsertDesign("HFSS", designname, solutiontype, "")
+    _remember_project(oDesign, oProject)
     
     return oDesign
 
@@ -92,8 +97,28 @@ def get_design(oProject, design_name):
         
     """
     oDesign = oProject.GetDesign(design_name)
+    _remember_project(oDesign, oProject)
     return oDesign
 
+def delete_design(oProject, design_name):
+    """
+    Delete a design, and discard its cached module handles.
+    
+    Parameters
+    ----------
+    oProject : pywin32 COMObject
+        The HFSS project in which the operation will be performed.
+    design_name : str
+        Name of the design to delete.
+        
+    Returns
+    -------
+    None
+        
+    """
+    clear_module_cache(oProject=oProject, DesignName=design_name)
+    oProject.DeleteDesign(design_name)
+
 def get_top_design_list(oProject):
     """
     Returns a list of the names of the top-level designs.
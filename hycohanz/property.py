@@ -8,7 +8,10 @@ At last count there were 1 functions implemented out of 7.
 """
 from __future__ import division, print_function, unicode_literals, absolute_import
 
+import collections
+
 from hycohanz.expression import Expression
+from hycohanz.snapshot import invalidate_snapshots
 
 def add_property(oDesign, name, value):
     """
@@ -38,6 +41,118 @@ def add_property(oDesign, name, value):
     proptabarray = ["NAME:LocalVariableTab", propserversarray, newpropsarray]
           
     oDesign.ChangeProperty(["NAME:AllTabs", proptabarray])
+    invalidate_snapshots(oDesign, [(name, newpropsarray[1][-1])])
+
+def _newprops(items):
+    return ["NAME:NewProps"] + [["NAME:" + name,
+                                 "PropType:=", "VariableProp",
+                                 "UserDef:=", True,
+                                 "Value:=", value] for name, value in items]
+
+def _add_chunk(server, tab, propservers, chunk, failures):
+    """
+    Add variables to a design or project with one ChangeProperty call,
+    bisecting the chunk on failure to find and record the variables that
+    can't be added.
+    """
+    try:
+        server.ChangeProperty(["NAME:AllTabs",
+                               [tab, ["NAME:PropServers", propservers],
+                                _newprops(chunk)]])
+    except Exception as e:
+        if len(chunk) == 1:
+            failures[chunk[0][0]] = '{0}'.format(e)
+            return
+
+        # Some of the chunk may have been added before the failure.
+        added = set(server.GetVariables())
+        chunk = [item for item in chunk if item[0] not in added]
+        if len(chunk) == 1:
+            failures[chunk[0][0]] = '{0}'.format(e)
+        elif chunk:
+            half = len(chunk)//2
+            _add_chunk(server, tab, propservers, chunk[:half], failures)
+            _add_chunk(server, tab, propservers, chunk[half:], failures)
+
+def add_properties(oDesign, mapping, oProject=None, ChunkSize=500):
+    """
+    Add many variables, with one ChangeProperty call per ChunkSize
+    variables rather than one per variable.
+    
+    Names beginning with '$' are added to the project, and the others to
+    the design.  The project variables are added first, since design
+    variables may reference them but not the reverse, and each group is
+    added in order, so a value may reference the variables before it.
+
+    If a chunk fails, the variables not added are split in two and
+    retried, until the variables that can't be added are found, so that
+    they don't prevent the others being added.
+    Variables that already exist are not sent.
+    
+    Parameters
+    ----------
+    oDesign : pywin32 COMObject
+        The HFSS design to which the design variables are added.
+    mapping : dict or list of (str, value)
+        The names of the variables mapped to their values, which may be
+        Expressions, numbers, or strings.  Use an OrderedDict or a list of
+        pairs if the values reference each other.
+    oProject : pywin32 COMObject, optional
+        The project of the design, required to add project variables.
+    ChunkSize : int
+        The largest number of variables added by one ChangeProperty call.
+        
+    Returns
+    -------
+    failures : OrderedDict
+        The names of the variables that couldn't be added, mapped to the
+        error message.  Empty if all were added.
+
+    Raises
+    ------
+    ValueError
+        If project variables are given without oProject.
+    
+    """
+    if hasattr(mapping, 'items'):
+        mapping = mapping.items()
+
+    local = []
+    project = []
+    for name, value in mapping:
+        item = (name, Expression(value).expr)
+        if name.startswith('$'):
+            project.append(item)
+        else:
+            local.append(item)
+
+    if project and oProject is None:
+        raise ValueError('oProject is required to add project variables')
+
+    failures = collections.OrderedDict()
+    for server, tab, propservers, items in [
+            (oProject, "NAME:ProjectVariableTab", "ProjectVariables", project),
+            (oDesign, "NAME:LocalVariableTab", "LocalVariables", local)]:
+        if not items:
+            continue
+
+        existing = set(server.GetVariables())
+        new = []
+        for name, value in items:
+            if name in existing:
+                failures[name] = 'Variable already exists: ' + name
+            else:
+                new.append((name, value))
+                existing.add(name)
+        try:
+            for start in range(0, len(new), ChunkSize):
+                _add_chunk(server, tab, propservers, new[start:start + ChunkSize], failures)
+        except Exception:
+            invalidate_snapshots(server)
+            raise
+        invalidate_snapshots(server, [item for item in new if item[0] not in failures])
+
+    return failures
 
 def set_variable(oProject, name, value):
     """
@@ -61,10 +176,12 @@ def set_variable(oProject, name, value):
     
     """
     if '$' in name: 
-		oProject.SetVariableValue(name,Expression(value).expr)
+        oProject.SetVariableValue(name,Expression(value).expr)
+        invalidate_snapshots(oProject, [(name, Expression(value).expr)])
     else:
-		oDesign = oProject.GetActiveDesign()
-		oDesign.SetVariableValue(name,Expression(value).expr)
+        oDesign = oProject.GetActiveDesign()
+        oDesign.SetVariableValue(name,Expression(value).expr)
+        invalidate_snapshots(oDesign, [(name, Expression(value).expr)])
 
 def get_variables(oProject,oDesign=''):
     """
@@ -81,13 +198,13 @@ def get_variables(oProject,oDesign=''):
     Returns
     -------
     variable_list: list of str
-	list of non-indexed project/design variables
+        list of non-indexed project/design variables
     
     """
     if oDesign=='':
         variable_list = list(oProject.GetVariables())
     else:
         variable_list = list(oDesign.GetVariables())
-    return map(str,variable_list)
+    return [str(name) for name in variable_list]
 
 
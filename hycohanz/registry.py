@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""
+A client-side registry of the objects in an HFSS 3D Modeler editor.
+
+Example Usage
+-------------
+>>> import hycohanz as hfss
+>>> [oAnsoftApp, oDesktop] = hfss.setup_interface()
+>>> oProject = hfss.new_project(oDesktop)
+>>> oDesign = hfss.insert_design(oProject, "HFSSDesign1", "DrivenModal")
+>>> oEditor = hfss.ObjectRegistry(hfss.set_active_editor(oDesign))
+>>> box = hfss.create_box(oEditor, 0, 0, 0, 1, 1, 1)
+>>> hfss.get_matched_object_name(oEditor, "Box*")
+['Box1']
+
+"""
+
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import collections
+import fnmatch
+
+from hycohanz.editorproxy import (EditorProxy,
+                                  get_array_value,
+                                  get_partlist)
+
+# Editor methods that create a single named object and return its name.
+CREATE_METHODS = frozenset(["CreateBox",
+                            "CreateCylinder",
+                            "CreateCone",
+                            "CreateSphere",
+                            "CreateTorus",
+                            "CreateHelix",
+                            "CreateSpiral",
+                            "CreateBondwire",
+                            "CreateRectangle",
+                            "CreateCircle",
+                            "CreateEllipse",
+                            "CreateRegularPolygon",
+                            "CreateRegularPolyhedron",
+                            "CreatePolyline",
+                            "CreateEquationCurve",
+                            "CreateEquationSurface",
+                            "CreateUserDefinedPart",
+                            "CreateRegion"])
+
+# Editor methods whose effect on the object names can't be predicted.
+DRIFT_METHODS = frozenset(["Import",
+                           "SeparateBody",
+                           "Split",
+                           "Undo",
+                           "Redo"])
+
+class ObjectRegistry(EditorProxy):
+    """
+    Wrap an HFSS editor and keep a local record of its objects.
+
+    Objects created, duplicated, pasted, renamed, united, subtracted,
+    imprinted, connected, or deleted through the registry are recorded as
+    the operations are sent to HFSS.  Name, index, ID, and wildcard queries
+    made through the registry (for example by get_matched_object_name(),
+    get_object_name(), and get_object_id_by_name()) are then answered
+    locally.
+
+    Operations whose outcome can't be predicted, such as import_model(),
+    separate_body(), and split(), mark the registry as stale, and the next
+    query resynchronizes it with a single GetMatchedObjectName("*") call.
+    Objects changed behind the registry's back are only noticed after
+    refresh() or check().
+
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor to wrap.
+
+    Attributes
+    ----------
+    saved : int
+        The number of queries answered without a COM call.
+    forwarded : int
+        The number of queries that had to be sent to HFSS.
+    refreshes : int
+        The number of times the registry was resynchronized.
+    stale : bool
+        Whether the registry will be resynchronized on the next query.
+    """
+    def __init__(self, oEditor):
+        super(ObjectRegistry, self).__init__(oEditor)
+        self._objects = collections.OrderedDict()
+        self._order = None
+        self.saved = 0
+        self.forwarded = 0
+        self.refreshes = 0
+        self.stale = True
+
+    def __getattr__(self, name):
+        method = super(ObjectRegistry, self).__getattr__(name)
+
+        if name in CREATE_METHODS:
+            def create(*args):
+                part = method(*args)
+                self._add([part])
+                return part
+            return create
+        elif name in DRIFT_METHODS:
+            def drift(*args):
+                self.stale = True
+                return method(*args)
+            return drift
+        else:
+            return method
+
+    def __contains__(self, name):
+        return self.exists(name)
+
+    def _sync(self):
+        if self.stale:
+            self.refresh()
+
+    def _add(self, partlist):
+        for part in partlist:
+            self._objects[part] = self._objects.get(part)
+        self._order = None
+
+    def _remove(self, partlist):
+        for part in partlist:
+            self._objects.pop(part, None)
+        self._order = None
+
+    def refresh(self):
+        """
+        Resynchronize the registry with the editor.  Known object IDs are
+        kept for objects that still exist.
+        """
+        names = self.oEditor.GetMatchedObjectName("*")
+
+        objects = collections.OrderedDict()
+        for name in names:
+            objects[name] = self._objects.get(name)
+
+        self._objects = objects
+        self._order = None
+        self.stale = False
+        self.refreshes += 1
+
+    def check(self):
+        """
+        Compare the number of objects in the editor with the registry, and
+        resynchronize if they differ.
+
+        Returns
+        -------
+        drifted : bool
+            Whether the registry had to be resynchronized.
+        """
+        self._sync()
+        if self.oEditor.GetNumObjects() != len(self._objects):
+            self.refresh()
+            return True
+        else:
+            return False
+
+    def exists(self, name):
+        """
+        Return whether an object with the given name exists.
+        """
+        self._sync()
+        self.saved += 1
+        return name in self._objects
+
+    # Queries
+
+    def GetMatchedObjectName(self, name_filter):
+        self._sync()
+        self.saved += 1
+        if name_filter == "*":
+            return tuple(self._objects)
+        else:
+            return tuple(name for name in self._objects
+                         if fnmatch.fnmatchcase(name, name_filter))
+
+    def GetNumObjects(self):
+        self._sync()
+        self.saved += 1
+        return len(self._objects)
+
+    def GetObjectName(self, index):
+        self._sync()
+        if self._order is None:
+            self._order = list(self._objects)
+        self.saved += 1
+        return self._order[index]
+
+    def GetObjectIDByName(self, name):
+        self._sync()
+        objid = self._objects.get(name)
+        if objid is None:
+            objid = self.oEditor.GetObjectIDByName(name)
+            self.forwarded += 1
+            if name in self._objects:
+                self._objects[name] = objid
+        else:
+            self.saved += 1
+
+        return objid
+
+    # Operations that change object names
+
+    def Paste(self):
+        pastelist = self.oEditor.Paste()
+        if pastelist is None:
+            self.stale = True
+        else:
+            self._add(pastelist)
+        return pastelist
+
+    def _duplicate(self, method, args):
+        newpartlist = method(*args)
+        if newpartlist:
+            self._add(newpartlist)
+        else:
+            self.stale = True
+        return newpartlist
+
+    def DuplicateAlongLine(self, *args):
+        return self._duplicate(self.oEditor.DuplicateAlongLine, args)
+
+    def DuplicateAroundAxis(self, *args):
+        return self._duplicate(self.oEditor.DuplicateAroundAxis, args)
+
+    def DuplicateMirror(self, *args):
+        return self._duplicate(self.oEditor.DuplicateMirror, args)
+
+    def RenamePart(self, renameparamsarray):
+        result = self.oEditor.RenamePart(renameparamsarray)
+
+        oldname = get_array_value(renameparamsarray, "Old Name")
+        newname = get_array_value(renameparamsarray, "New Name")
+        if oldname in self._objects:
+            objects = collections.OrderedDict()
+            for name, objid in self._objects.items():
+                objects[newname if name == oldname else name] = objid
+            self._objects = objects
+            self._order = None
+        else:
+            self.stale = True
+
+        return result
+
+    def Unite(self, selectionsarray, uniteparametersarray):
+        result = self.oEditor.Unite(selectionsarray, uniteparametersarray)
+        if not get_array_value(uniteparametersarray, "KeepOriginals", False):
+            self._remove(get_partlist(selectionsarray)[1:])
+        return result
+
+    def Subtract(self, selectionsarray, subtractparametersarray):
+        result = self.oEditor.Subtract(selectionsarray, subtractparametersarray)
+        if not get_array_value(subtractparametersarray, "KeepOriginals", False):
+            self._remove(get_partlist(selectionsarray, "Tool Parts"))
+        return result
+
+    def Imprint(self, selectionsarray, imprintparametersarray):
+        result = self.oEditor.Imprint(selectionsarray, imprintparametersarray)
+        if not get_array_value(imprintparametersarray, "KeepOriginals", False):
+            self._remove(get_partlist(selectionsarray, "Tool Parts"))
+        return result
+
+    def Connect(self, selectionsarray):
+        result = self.oEditor.Connect(selectionsarray)
+        self._remove(get_partlist(selectionsarray)[1:])
+        return result
+
+    def Delete(self, selectionsarray):
+        result = self.oEditor.Delete(selectionsarray)
+        self._remove(get_partlist(selectionsarray))
+        return result
+
+    def Cut(self, selectionsarray):
+        result = self.oEditor.Cut(selectionsarray)
+        self._remove(get_partlist(selectionsarray))
+        return result
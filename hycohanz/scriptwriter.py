@@ -0,0 +1,407 @@
+# -*- coding: utf-8 -*-
+"""
+An offline backend that writes an HFSS IronPython script instead of talking
+to HFSS over COM.
+
+The objects returned by ScriptWriter.setup_interface() stand in for the
+oAnsoftApp and oDesktop COM objects, and every object obtained from them
+stands in for the corresponding project, design, editor, or module.  Each
+method call is written to the script as the equivalent IronPython
+statement, and can then be run by HFSS in batch mode, e.g.::
+
+    ansysedt -ng -BatchExtract model.py
+
+Values returned by HFSS (object names, face IDs, lists of names) are not
+known until the script runs, so they are returned as symbols.  A symbol can
+be passed to other hycohanz functions, joined into selection strings, and
+formatted into names, and is written to the script as the variable holding
+the value.  Symbols can't be compared, used in arithmetic, or iterated
+(except for lists of known length, such as the names returned by paste()
+or duplicate_along_line()).
+
+Example Usage
+-------------
+>>> import hycohanz as hfss
+>>> script = hfss.ScriptWriter()
+>>> [oAnsoftApp, oDesktop] = script.setup_interface()
+>>> oProject = hfss.new_project(oDesktop)
+>>> oDesign = hfss.insert_design(oProject, "HFSSDesign1", "DrivenModal")
+>>> oEditor = hfss.set_active_editor(oDesign, "3D Modeler")
+>>> box = hfss.create_box(oEditor, 0, 0, 0, 1, 1, 1)
+>>> hole = hfss.create_cylinder(oEditor, 0.5, 0.5, 0, 0.2, 1)
+>>> hfss.subtract(oEditor, [box], [hole])
+<ScriptString v1>
+>>> script.save('model.py')
+
+"""
+
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import io
+import numbers
+import re
+
+from hycohanz.editorproxy import (get_array_value,
+                                  get_partlist)
+
+HEADER = """# -*- coding: utf-8 -*-
+# Script written by hycohanz
+import ScriptEnv
+ScriptEnv.Initialize("Ansoft.ElectronicsDesktop")
+oDesktop.RestoreWindow()
+"""
+
+# Methods returning COM objects, with the variable name used for them.
+OBJECT_METHODS = {"NewProject": "oProject",
+                  "OpenProject": "oProject",
+                  "GetActiveProject": "oProject",
+                  "SetActiveProject": "oProject",
+                  "InsertDesign": "oDesign",
+                  "GetActiveDesign": "oDesign",
+                  "SetActiveDesign": "oDesign",
+                  "GetDesign": "oDesign",
+                  "SetActiveEditor": "oEditor",
+                  "GetActiveEditor": "oEditor",
+                  "GetEditor": "oEditor",
+                  "GetModule": "oModule",
+                  "GetDefinitionManager": "oDefinitionManager",
+                  "GetChildObject": "oObject"}
+
+# Methods returning the same object every time they are called with the
+# same arguments, which are therefore only written once.
+CACHED_METHODS = frozenset(["SetActiveEditor",
+                            "GetActiveEditor",
+                            "GetEditor",
+                            "GetModule",
+                            "GetDefinitionManager"])
+
+# Methods returning lists, and whether their elements are numbers.
+LIST_METHODS = {"GetMatchedObjectName": False,
+                "GetSelections": False,
+                "GetObjectsInGroup": False,
+                "GetProjects": False,
+                "GetProjectList": False,
+                "GetTopDesignList": False,
+                "GetVariables": False,
+                "GetProperties": False,
+                "GetChildNames": False,
+                "GetSetups": False,
+                "GetSweeps": False,
+                "GetFaceIDs": True,
+                "GetEdgeIDsFromObject": True,
+                "GetEdgeIDsFromFace": True,
+                "GetVertexIDsFromObject": True,
+                "GetVertexIDsFromEdge": True,
+                "GetVertexPosition": True,
+                "GetFaceCenter": True,
+                "GetTopEntryValue": True,
+                "Paste": False,
+                "DuplicateAlongLine": False,
+                "DuplicateAroundAxis": False,
+                "DuplicateMirror": False}
+
+# Methods returning numbers.
+NUMBER_METHODS = frozenset(["GetFaceByPosition",
+                            "GetEdgeByPosition",
+                            "GetObjectIDByName",
+                            "GetNumObjects",
+                            "GetFaceArea"])
+
+_TOKEN = re.compile('\x00([^\x00]+)\x00')
+
+def _token(name):
+    return '\x00' + name + '\x00'
+
+class ScriptString(str):
+    """
+    A string returned by HFSS, known only when the script runs.
+
+    Attributes
+    ----------
+    name : str
+        The script expression holding the value.
+    """
+    def __new__(cls, name):
+        self = super(ScriptString, cls).__new__(cls, _token(name))
+        self.name = name
+        return self
+
+    def __repr__(self):
+        return '<ScriptString {0}>'.format(self.name)
+
+class ScriptNumber(object):
+    """
+    A number returned by HFSS, such as a face ID, known only when the script
+    runs.
+
+    Attributes
+    ----------
+    name : str
+        The script expression holding the value.
+    """
+    def __init__(self, name):
+        self.name = name
+
+    def __str__(self):
+        return _token(self.name)
+
+    def __repr__(self):
+        return '<ScriptNumber {0}>'.format(self.name)
+
+class ScriptList(object):
+    """
+    A list returned by HFSS, known only when the script runs.
+
+    Elements can be indexed.  The list can only be iterated if its length
+    can be predicted from the call that returned it.
+
+    Attributes
+    ----------
+    name : str
+        The script variable holding the value.
+    length : int or None
+        The length of the list, if known.
+    """
+    def __init__(self, name, numeric=False, length=None):
+        self.name = name
+        self.numeric = numeric
+        self.length = length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[n] for n in range(*index.indices(len(self)))]
+
+        if self.length is not None:
+            index = range(self.length)[index]
+        elif index < 0:
+            raise ValueError('The length of ' + self.name + ' is not known '
+                             'until the script runs')
+
+        name = '{0}[{1}]'.format(self.name, index)
+        if self.numeric:
+            return ScriptNumber(name)
+        else:
+            return ScriptString(name)
+
+    def __len__(self):
+        if self.length is None:
+            raise ValueError('The length of ' + self.name + ' is not known '
+                             'until the script runs')
+        return self.length
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __str__(self):
+        return _token(self.name)
+
+    def __repr__(self):
+        return '<ScriptList {0}>'.format(self.name)
+
+def _quote(value):
+    return '"' + (value.replace('\\', '\\\\')
+                       .replace('"', '\\"')
+                       .replace('\n', '\\n')) + '"'
+
+def _render_string(value):
+    if '\x00' not in value:
+        return _quote(value)
+
+    parts = _TOKEN.split(value)
+    if len(parts) == 3 and parts[0] == parts[2] == '':
+        return parts[1]
+
+    terms = []
+    for n, part in enumerate(parts):
+        if n % 2:
+            terms.append('str(' + part + ')')
+        elif part:
+            terms.append(_quote(part))
+
+    if len(terms) <= 3:
+        return ' + '.join(terms) or '""'
+    else:
+        # A flat join avoids deeply nested concatenation expressions, which
+        # the IronPython parser handles poorly for long selections.
+        return '"".join([' + ', '.join(terms) + '])'
+
+def render(value):
+    """
+    Return the IronPython source for a value passed to an HFSS method.
+    """
+    if isinstance(value, str):
+        return _render_string(value)
+    elif isinstance(value, list):
+        return '[' + ', '.join([render(item) for item in value]) + ']'
+    elif isinstance(value, (ScriptObject, ScriptNumber, ScriptList)):
+        return value.name
+    elif isinstance(value, bool):
+        return repr(value)
+    elif value is None:
+        return 'None'
+    elif isinstance(value, numbers.Integral):
+        return str(int(value))
+    elif isinstance(value, numbers.Real):
+        return repr(float(value))
+    elif isinstance(value, tuple):
+        return render(list(value))
+    elif isinstance(value, bytes):
+        return _render_string(value.decode('utf-8'))
+    else:
+        return _render_string('{0}'.format(value))
+
+class ScriptObject(object):
+    """
+    Stand in for an HFSS COM object, writing the methods called on it to
+    the script.
+
+    Attributes
+    ----------
+    name : str
+        The script variable holding the object.
+    """
+    def __init__(self, writer, name):
+        self._writer = writer
+        self.name = name
+
+    def __getattr__(self, method):
+        if method.startswith('_'):
+            raise AttributeError(method)
+
+        def call(*args):
+            return self._writer.call(self, method, args)
+
+        return call
+
+class ScriptWriter(object):
+    """
+    Write HFSS API calls to an IronPython script.
+
+    Parameters
+    ----------
+    filename : str
+        If given, the script is written to this file as it is generated,
+        and close() must be called when done.  Otherwise the script is kept
+        in memory; see getvalue() and save().
+
+    Attributes
+    ----------
+    calls : int
+        The number of HFSS API calls written.
+    """
+    def __init__(self, filename=None):
+        self.calls = 0
+        self._counts = {}
+        self._cache = {}
+        self._clipboard = None
+        self._lines = []
+        if filename is None:
+            self._file = None
+        else:
+            self._file = io.open(filename, 'w', encoding='utf-8')
+        self._write(HEADER)
+        self.desktop = ScriptObject(self, 'oDesktop')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, typ, val, traceback):
+        self.close()
+
+    def _write(self, text):
+        if self._file is None:
+            self._lines.append(text)
+        else:
+            self._file.write(text)
+
+    def _variable(self, base):
+        count = self._counts.get(base, 0) + 1
+        self._counts[base] = count
+        if count == 1 and base != 'v':
+            return base
+        else:
+            return base + str(count)
+
+    def _length(self, method, args):
+        """
+        Predict the length of the list returned by method, if possible.
+        """
+        if method == 'Paste':
+            return self._clipboard
+        elif method in ('DuplicateAlongLine', 'DuplicateAroundAxis'):
+            nclones = int(get_array_value(args[1], "NumClones"))
+            return (nclones - 1)*len(get_partlist(args[0]))
+        elif method == 'DuplicateMirror':
+            return len(get_partlist(args[0]))
+        else:
+            return None
+
+    def setup_interface(self):
+        """
+        Return stand-ins for the oAnsoftApp and oDesktop COM objects, in the
+        manner of hycohanz.setup_interface().
+        """
+        return [ScriptObject(self, 'oAnsoftApp'), self.desktop]
+
+    def call(self, obj, method, args):
+        """
+        Write a method call on obj to the script, and return its symbolic
+        result.
+        """
+        if method == 'GetAppDesktop':
+            return self.desktop
+
+        source = '{0}.{1}({2})'.format(obj.name, method,
+                                       ', '.join(render(arg) for arg in args))
+
+        if method in CACHED_METHODS:
+            key = (obj.name, source)
+            if key in self._cache:
+                return self._cache[key]
+
+        if method == 'Copy':
+            self._clipboard = len(get_partlist(args[0]))
+
+        if method in OBJECT_METHODS:
+            result = ScriptObject(self, self._variable(OBJECT_METHODS[method]))
+        elif method in LIST_METHODS:
+            result = ScriptList(self._variable('v'), LIST_METHODS[method],
+                                self._length(method, args))
+        elif method in NUMBER_METHODS:
+            result = ScriptNumber(self._variable('v'))
+        elif method.startswith('Get') or method.startswith('Create'):
+            result = ScriptString(self._variable('v'))
+        else:
+            result = None
+
+        if result is None:
+            self._write(source + '\n')
+        else:
+            self._write(result.name + ' = ' + source + '\n')
+
+        if method in CACHED_METHODS:
+            self._cache[key] = result
+
+        self.calls += 1
+        return result
+
+    def getvalue(self):
+        """
+        Return the script written so far, if kept in memory.
+        """
+        return ''.join(self._lines)
+
+    def save(self, filename):
+        """
+        Save the script kept in memory to a file.
+        """
+        with io.open(filename, 'w', encoding='utf-8') as f:
+            f.write(self.getvalue())
+
+    def close(self):
+        """
+        Close the script file, if any.
+        """
+        if self._file is not None:
+            self._file.close()
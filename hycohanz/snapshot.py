@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+"""
+A local snapshot of the values of the project and design variables.
+
+Example Usage
+-------------
+>>> import hycohanz as hfss
+>>> [oAnsoftApp, oDesktop] = hfss.setup_interface()
+>>> oProject = hfss.new_project(oDesktop)
+>>> oDesign = hfss.insert_design(oProject, "HFSSDesign1", "DrivenModal")
+>>> hfss.add_properties(oDesign, [("w", "1mm"), ("l", "w*2")])
+OrderedDict()
+>>> before = hfss.VariableSnapshot(oDesign, oProject)
+>>> before['l'], before.evaluate('l')
+('w*2', 0.002)
+>>> after = before.copy()
+>>> hfss.set_variable(oProject, "w", "1.5mm")
+>>> before['w'], after['w']
+('1.5mm', '1mm')
+>>> after.variation()
+"w='1mm' l='w*2'"
+>>> before.diff(after)['changed']
+[('w', '1mm', '1.5mm')]
+
+"""
+
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import weakref
+
+import numpy as np
+
+from hycohanz.expression import Expression
+
+# The valid snapshots, which writes of variables through hycohanz update or
+# invalidate.
+_snapshots = weakref.WeakSet()
+
+def invalidate_snapshots(server=None, changes=None):
+    """
+    Update the variable snapshots of a design or project after its
+    variables are written, or invalidate them if the values written aren't
+    known.
+
+    Parameters
+    ----------
+    server : pywin32 COMObject
+        The design or project written, or None for all snapshots.
+    changes : list of (str, str), optional
+        The names of the variables written and their values, as HFSS
+        expression strings.  The snapshots are invalidated if not given.
+    """
+    for snapshot in list(_snapshots):
+        if server is None or snapshot.design == server or snapshot.project == server:
+            if changes is None:
+                snapshot.invalidate()
+            else:
+                snapshot._apply(changes)
+
+class VariableSnapshot(object):
+    """
+    The names, values, and evaluated values of the variables of a design and
+    its project, fetched once and then served locally.
+
+    HFSS has no call returning the values of several variables, so the
+    snapshot fetches the names with one GetVariables call per design or
+    project, and each value with one GetVariableValue call.  Values are
+    evaluated locally, with Expression.evaluate(), rather than by HFSS.
+    They are stored as columns: a tuple of names, and NumPy arrays of the
+    values, evaluated values, and whether each is a project variable.
+
+    The variables are fetched when first needed.  Writes of variables
+    through hycohanz, such as add_property(), set_variable(), or a
+    VariableStore, to the design or project are applied to the snapshot
+    locally, or invalidate it if their outcome isn't known, so that the
+    variables are fetched again when next needed.  The values written are
+    queued, and the columns rebuilt once when the snapshot is next read, so
+    that defining many variables one at a time takes linear time.  A copy() is never
+    updated, so keep one to compare with later.
+
+    Parameters
+    ----------
+    oDesign : pywin32 COMObject
+        The HFSS design.
+    oProject : pywin32 COMObject, optional
+        The project of the design, to include its $project variables.
+
+    Attributes
+    ----------
+    valid : bool
+        False if the snapshot will fetch the variables when next needed.
+    """
+    def __init__(self, oDesign, oProject=None):
+        self.design = oDesign
+        self.project = oProject
+        self.valid = False
+        self._names = ()
+        self._index = {}
+        self._values = np.zeros(0, dtype=np.str_)
+        self._is_project = np.zeros(0, dtype=bool)
+        self._evaluated = None
+        self._pending = []
+
+    def __repr__(self):
+        if self.valid:
+            self._flush()
+        return '<VariableSnapshot of {0} variables{1}>'.format(
+            len(self._names), '' if self.valid else ', invalid')
+
+    def refresh(self):
+        """
+        Fetch the variables from HFSS now.
+        """
+        names = []
+        values = []
+        is_project = []
+        for server, project in [(self.project, True), (self.design, False)]:
+            if server is None:
+                continue
+            for name in server.GetVariables():
+                names.append('{0}'.format(name))
+                values.append('{0}'.format(server.GetVariableValue(name)))
+                is_project.append(project)
+
+        self._pending = []
+        self._set(tuple(names), np.array(values, dtype=np.str_),
+                  np.array(is_project, dtype=bool))
+        _snapshots.add(self)
+
+    def _set(self, names, values, is_project, evaluated=None):
+        self._names = names
+        self._index = dict((name, n) for n, name in enumerate(names))
+        self._values = values
+        self._is_project = is_project
+        self._evaluated = evaluated
+        self.valid = True
+
+    def _apply(self, changes):
+        """
+        Queue the values written to variables, to be applied when the
+        snapshot is next read.
+        """
+        self._pending.extend(changes)
+
+    def _flush(self):
+        """
+        Apply the queued values to the columns, without fetching them.
+        """
+        if not self._pending:
+            return
+
+        names = list(self._names)
+        values = self._values.tolist()
+        is_project = self._is_project.tolist()
+        index = dict(self._index)
+        for name, value in self._pending:
+            n = index.get(name)
+            if n is None:
+                index[name] = len(names)
+                names.append(name)
+                values.append(value)
+                is_project.append(name.startswith('$'))
+            else:
+                values[n] = value
+        self._pending = []
+        # The columns are replaced, not changed, as copies share them.
+        self._set(tuple(names), np.array(values, dtype=np.str_),
+                  np.array(is_project, dtype=bool))
+
+    def _ensure(self):
+        if not self.valid:
+            self.refresh()
+        elif self._pending:
+            self._flush()
+
+    def invalidate(self):
+        """
+        Discard the variables, so that they are fetched when next needed.
+        """
+        self.valid = False
+        self._pending = []
+        _snapshots.discard(self)
+
+    def copy(self):
+        """
+        Return a copy of the snapshot, which is never updated or
+        invalidated.
+        """
+        self._ensure()
+        snapshot = VariableSnapshot(self.design, self.project)
+        snapshot._set(self._names, self._values, self._is_project, self._evaluated)
+        return snapshot
+
+    # Columns
+
+    @property
+    def names(self):
+        """
+        The names of the variables: the project variables then the design
+        variables, as fetched, then any added since.
+        """
+        self._ensure()
+        return self._names
+
+    @property
+    def values(self):
+        """
+        The values of the variables, as HFSS expression strings.
+        """
+        self._ensure()
+        return self._values
+
+    @property
+    def is_project(self):
+        """
+        Whether each variable is a project variable.
+        """
+        self._ensure()
+        return self._is_project
+
+    @property
+    def evaluated(self):
+        """
+        The values of the variables in SI units (and angles in radians),
+        NaN for those that can't be evaluated locally.
+        """
+        self._ensure()
+        if self._evaluated is None:
+            variables = self.as_dict()
+            evaluated = np.empty(len(self._names))
+            for n, value in enumerate(self._values):
+                try:
+                    evaluated[n] = Expression('{0}'.format(value)).evaluate(variables)
+                except (KeyError, ValueError, TypeError):
+                    evaluated[n] = np.nan
+            self._evaluated = evaluated
+        return self._evaluated
+
+    # Lookups
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __contains__(self, name):
+        self._ensure()
+        return name in self._index
+
+    def __getitem__(self, name):
+        self._ensure()
+        return '{0}'.format(self._values[self._index[name]])
+
+    def get(self, name, default=None):
+        """
+        Return the value of a variable, or default if it doesn't exist.
+        """
+        self._ensure()
+        n = self._index.get(name)
+        return default if n is None else '{0}'.format(self._values[n])
+
+    def evaluate(self, name):
+        """
+        Return the evaluated value of a variable.
+        """
+        self._ensure()
+        return float(self.evaluated[self._index[name]])
+
+    def as_dict(self):
+        """
+        Return a dict of the variables' names and values.
+        """
+        self._ensure()
+        return dict(zip(self._names, ['{0}'.format(value) for value in self._values]))
+
+    def variation(self):
+        """
+        Return the values as an HFSS variation string, such as
+        "w='1mm' l='2mm'", identifying a solve.
+        """
+        self._ensure()
+        return ' '.join("{0}='{1}'".format(name, value)
+                        for name, value in zip(self._names, self._values))
+
+    def diff(self, other):
+        """
+        Compare the snapshot with an earlier one.
+
+        When both have the same variables, as between the variations of an
+        optimization, the values are compared as arrays.
+
+        Parameters
+        ----------
+        other : VariableSnapshot
+            The earlier snapshot.
+
+        Returns
+        -------
+        diff : dict
+            'added' and 'removed' list the names of the variables only in
+            this and only in the other snapshot, and 'changed' the names,
+            earlier values, and values of the variables in both whose values
+            differ, as (name, old, new) tuples.
+        """
+        self._ensure()
+        other._ensure()
+
+        if self._names == other._names:
+            changed = np.flatnonzero(self._values != other._values)
+            return {'added': [],
+                    'removed': [],
+                    'changed': [(self._names[n],
+                                 '{0}'.format(other._values[n]),
+                                 '{0}'.format(self._values[n])) for n in changed]}
+
+        changed = []
+        for name in self._names:
+            n = other._index.get(name)
+            if n is not None and other._values[n] != self._values[self._index[name]]:
+                changed.append((name, other[name], self[name]))
+        return {'added': [name for name in self._names if name not in other._index],
+                'removed': [name for name in other._names if name not in self._index],
+                'changed': changed}
@@ -0,0 +1,511 @@
+# -*- coding: utf-8 -*-
+"""
+Local face and edge picking by position for the HFSS 3D Modeler editor.
+
+Example Usage
+-------------
+>>> import numpy as np
+>>> import hycohanz as hfss
+>>> [oAnsoftApp, oDesktop] = hfss.setup_interface()
+>>> oProject = hfss.new_project(oDesktop)
+>>> oDesign = hfss.insert_design(oProject, "HFSSDesign1", "DrivenModal")
+>>> oEditor = hfss.SpatialIndex(hfss.set_active_editor(oDesign))
+>>> box = hfss.create_box(oEditor, 0, 0, 0, 1, 1, 1)
+>>> probes = np.array([[0.5, 0.5, 0], [0.5, 0.5, 1], [0, 0.5, 0.5]])
+>>> faceids = oEditor.get_faces_by_position(box, probes)
+
+"""
+
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import numpy as np
+
+from hycohanz.editorproxy import get_array_value
+from hycohanz.fakehfss import FakeComError
+from hycohanz.topology import TopologyCache
+from hycohanz.modeler3d import (get_face_ids,
+                                get_face_area,
+                                get_face_center,
+                                get_edge_ids_from_face,
+                                get_vertex_ids_from_edge,
+                                get_vertex_position)
+
+try:
+    from pywintypes import com_error
+except ImportError:
+    # pywin32 is only available on Windows.
+    COM_ERRORS = (FakeComError,)
+else:
+    COM_ERRORS = (com_error, FakeComError)
+
+# Maximum number of probe/primitive pairs tested at once.
+CHUNK_SIZE = 1 << 20
+
+def _boundary_loops(edgeids, edgevertices):
+    """
+    Chain the edges of a face into closed loops of vertex ids.  Returns
+    None if the edges don't form simple closed loops of two-vertex edges.
+    """
+    neighbors = {}
+    for edgeid in edgeids:
+        vertices = edgevertices[edgeid]
+        if len(vertices) != 2 or vertices[0] == vertices[1]:
+            return None
+        for a, b in (vertices, vertices[::-1]):
+            neighbors.setdefault(a, []).append(b)
+
+    if any(len(adjacent) != 2 for adjacent in neighbors.values()):
+        return None
+
+    loops = []
+    unvisited = set(neighbors)
+    while unvisited:
+        start = unvisited.pop()
+        loop = [start]
+        previous, current = start, neighbors[start][0]
+        while current != start:
+            loop.append(current)
+            unvisited.discard(current)
+            a, b = neighbors[current]
+            previous, current = current, (b if a == previous else a)
+        loops.append(loop)
+
+    return loops
+
+class _PlanarFace(object):
+    """
+    A planar face bounded by straight edges, stored as polygon loops in a
+    local 2D coordinate system.
+    """
+    def __init__(self, faceid, origin, normal, basis, starts, ends, lower, upper):
+        self.faceid = faceid
+        self.origin = origin
+        self.normal = normal
+        self.basis = basis
+        self.starts = starts
+        self.ends = ends
+        self.lower = lower
+        self.upper = upper
+
+    def classify(self, points, tolerance):
+        """
+        Return boolean arrays (interior, boundary) for the given points.
+        """
+        offsets = points - self.origin
+        inplane = np.abs(offsets.dot(self.normal)) <= tolerance
+        q = offsets.dot(self.basis.T)
+
+        a = self.starts[np.newaxis, :, :]
+        b = self.ends[np.newaxis, :, :]
+        p = q[:, np.newaxis, :]
+
+        # Even-odd crossing test along +u.
+        straddles = (a[..., 1] > p[..., 1]) != (b[..., 1] > p[..., 1])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ucross = a[..., 0] + ((p[..., 1] - a[..., 1]) *
+                                  (b[..., 0] - a[..., 0]) /
+                                  (b[..., 1] - a[..., 1]))
+        inside = np.sum(straddles & (p[..., 0] < ucross), axis=1) % 2 == 1
+
+        # Distance to the nearest boundary segment.
+        d = b - a
+        length2 = np.sum(d*d, axis=-1)
+        t = np.clip(np.sum((p - a)*d, axis=-1) / length2, 0, 1)
+        nearest = a + t[..., np.newaxis]*d
+        distance = np.sqrt(np.min(np.sum((p - nearest)**2, axis=-1), axis=1))
+        boundary = distance <= tolerance
+
+        return inplane & inside & ~boundary, inplane & boundary
+
+class _FaceCenters(object):
+    """
+    The centers of the planar faces of a body, which resolve probes placed
+    at a face center, the usual way of picking a face, without fetching
+    the rest of the body's topology.
+
+    The center of a face that isn't convex, such as an annulus or an L, can
+    lie off the face, so a center is only used once it is checked to lie
+    on its face.
+    """
+    def __init__(self, oEditor, body_name):
+        self.faceids = []
+        centers = []
+        for faceid in get_face_ids(oEditor, body_name):
+            try:
+                centers.append(get_face_center(oEditor, faceid))
+            except COM_ERRORS:
+                # Not a planar face
+                continue
+            self.faceids.append(faceid)
+        self.centers = np.array(centers, dtype=float).reshape(-1, 3)
+        self.onface = {}
+
+    def center(self, faceid):
+        return self.centers[self.faceids.index(faceid)]
+
+    def pick_faces(self, points, tolerance):
+        """
+        Return the face id of the one face center within tolerance of each
+        point, or -1 where there is none or more than one.
+        """
+        count = len(points)
+        faceids = np.full(count, -1, dtype=int)
+
+        if not self.faceids:
+            return faceids
+
+        ids = np.array(self.faceids)
+        step = max(1, CHUNK_SIZE // len(self.faceids))
+        for start in range(0, count, step):
+            p = points[start:start + step, np.newaxis, :]
+            near = np.sum((p - self.centers)**2, axis=-1) <= tolerance*tolerance
+            rows = np.flatnonzero(np.sum(near, axis=1) == 1)
+            faceids[start + rows] = ids[np.argmax(near[rows], axis=1)]
+
+        return faceids
+
+class _BodyGeometry(object):
+    """
+    The planar faces and straight edges of a body that can be picked
+    locally, with their bounding boxes.
+    """
+    def __init__(self, oEditor, body_name, tolerance):
+        faceedges = [(faceid, get_edge_ids_from_face(oEditor, faceid))
+                     for faceid in get_face_ids(oEditor, body_name)]
+
+        edgevertices = {}
+        positions = {}
+        for faceid, edgeids in faceedges:
+            for edgeid in edgeids:
+                if edgeid not in edgevertices:
+                    edgevertices[edgeid] = get_vertex_ids_from_edge(oEditor, edgeid)
+                    for vertexid in edgevertices[edgeid]:
+                        if vertexid not in positions:
+                            positions[vertexid] = np.array(get_vertex_position(oEditor, vertexid))
+
+        self.faces = []
+        straightedges = set()
+        for faceid, edgeids in faceedges:
+            face = self._planar_face(oEditor, faceid, edgeids, edgevertices,
+                                     positions, tolerance)
+            if face is not None:
+                self.faces.append(face)
+                straightedges.update(edgeids)
+
+        if self.faces:
+            self.facelower = np.array([face.lower for face in self.faces]) - tolerance
+            self.faceupper = np.array([face.upper for face in self.faces]) + tolerance
+
+        # Edges of a face whose polygon area matches its true area are
+        # straight.
+        self.edgeids = sorted(straightedges)
+        self.edgestarts = np.array([positions[edgevertices[e][0]] for e in self.edgeids]).reshape(-1, 3)
+        self.edgeends = np.array([positions[edgevertices[e][1]] for e in self.edgeids]).reshape(-1, 3)
+
+    @staticmethod
+    def _planar_face(oEditor, faceid, edgeids, edgevertices, positions, tolerance):
+        if any(edgeid not in edgevertices for edgeid in edgeids):
+            return None
+
+        loops = _boundary_loops(edgeids, edgevertices)
+        if not loops:
+            return None
+
+        vertices = np.array([positions[v] for loop in loops for v in loop])
+        origin = vertices.mean(axis=0)
+        u, s, vt = np.linalg.svd(vertices - origin)
+        if len(s) < 2 or s[1] <= tolerance or (len(s) > 2 and s[2] > tolerance):
+            return None
+
+        basis = vt[:2]
+        normal = vt[2]
+
+        starts = []
+        ends = []
+        areas = []
+        for loop in loops:
+            q = (np.array([positions[v] for v in loop]) - origin).dot(basis.T)
+            r = np.roll(q, -1, axis=0)
+            starts.append(q)
+            ends.append(r)
+            areas.append(0.5*abs(np.sum(q[:, 0]*r[:, 1] - r[:, 0]*q[:, 1])))
+
+        # Under the even-odd rule the largest loop is the outer boundary and
+        # the others are holes.  Curved boundaries show up as an area
+        # mismatch.
+        polygonarea = 2*max(areas) - sum(areas)
+        area = get_face_area(oEditor, faceid)
+        if abs(polygonarea - area) > max(1e-6*area, tolerance*tolerance):
+            return None
+
+        return _PlanarFace(faceid, origin, normal, basis,
+                           np.concatenate(starts), np.concatenate(ends),
+                           vertices.min(axis=0), vertices.max(axis=0))
+
+    def pick_faces(self, points, tolerance):
+        """
+        Return the face id under each point, or -1 where the point can't be
+        resolved locally.
+        """
+        count = len(points)
+        faceids = np.full(count, -1, dtype=int)
+        hits = np.zeros(count, dtype=int)
+        ambiguous = np.zeros(count, dtype=bool)
+
+        if not self.faces:
+            return faceids
+
+        step = max(1, CHUNK_SIZE // len(self.faces))
+        for start in range(0, count, step):
+            chunk = points[start:start + step]
+            candidates = np.all((chunk[:, np.newaxis, :] >= self.facelower) &
+                                (chunk[:, np.newaxis, :] <= self.faceupper), axis=2)
+
+            for k in np.flatnonzero(candidates.any(axis=0)):
+                face = self.faces[k]
+                index = start + np.flatnonzero(candidates[:, k])
+                interior, boundary = face.classify(points[index], tolerance)
+                faceids[index[interior]] = face.faceid
+                hits[index[interior]] += 1
+                ambiguous[index[boundary]] = True
+
+        faceids[(hits != 1) | ambiguous] = -1
+
+        return faceids
+
+    def pick_edges(self, points, tolerance):
+        """
+        Return the edge id under each point, or -1 where the point can't be
+        resolved locally.
+        """
+        count = len(points)
+        edgeids = np.full(count, -1, dtype=int)
+
+        if not self.edgeids:
+            return edgeids
+
+        a = self.edgestarts[np.newaxis, :, :]
+        d = (self.edgeends - self.edgestarts)[np.newaxis, :, :]
+        length2 = np.sum(d*d, axis=-1)
+        ids = np.array(self.edgeids)
+
+        step = max(1, CHUNK_SIZE // len(self.edgeids))
+        for start in range(0, count, step):
+            p = points[start:start + step, np.newaxis, :]
+            t = np.clip(np.sum((p - a)*d, axis=-1) / length2, 0, 1)
+            distance = np.sqrt(np.sum((p - a - t[..., np.newaxis]*d)**2, axis=-1))
+            endpoint = np.minimum(np.sqrt(np.sum((p - a)**2, axis=-1)),
+                                  np.sqrt(np.sum((p - a - d)**2, axis=-1)))
+
+            near = distance <= tolerance
+            resolved = (np.sum(near, axis=1) == 1) & ~np.any(near & (endpoint <= tolerance), axis=1)
+            rows = np.flatnonzero(resolved)
+            edgeids[start + rows] = ids[np.argmax(near[rows], axis=1)]
+
+        return edgeids
+
+class SpatialIndex(TopologyCache):
+    """
+    Wrap an HFSS editor and resolve face and edge picking by position
+    locally.
+
+    The first face query on a body fetches its face ids and the centers of
+    its planar faces, one call per face, which resolve the probes placed at
+    a face center.  The center of a face that isn't convex can lie off the
+    face, so the first probe at each face center is checked, with the full
+    index if it has been built, or else with one GetFaceByPosition call.
+    The first edge query, or face query not at a face center, fetches the edges of each face, the vertices of each edge, their
+    positions, and the face areas, and indexes every planar face bounded by
+    straight edges by its bounding box.  Subsequent GetFaceByPosition and
+    GetEdgeByPosition calls (and hence get_face_by_position() and
+    get_edge_by_position()) on that body are answered with NumPy, as are
+    arrays of probe points passed to get_faces_by_position() and
+    get_edges_by_position().  The number of COM calls is then proportional
+    to the number of bodies rather than the number of probes.
+
+    A probe falls back to the COM call when it lies within tolerance of a
+    face boundary or an edge end, when it isn't on any indexed face or edge
+    (for example on a curved face), or when its position isn't a plain
+    number in model units.
+
+    The index is a TopologyCache, so a body's index is rebuilt after any
+    operation that can change its topology.
+
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor to wrap.
+    tolerance : float
+        The distance in model units within which a probe is considered to
+        lie on a face or edge.
+
+    Attributes
+    ----------
+    resolved : int
+        The number of probes resolved locally.
+    fallbacks : int
+        The number of probes sent to HFSS.
+    builds : int
+        The number of bodies fully indexed, beyond their face centers.
+    """
+    def __init__(self, oEditor, tolerance=1e-6):
+        super(SpatialIndex, self).__init__(oEditor)
+        self.tolerance = tolerance
+        self.resolved = 0
+        self.fallbacks = 0
+        self.builds = 0
+
+    def _geometry(self, body_name):
+        entries = self._bodies.setdefault(body_name, {})
+        if 'geometry' not in entries:
+            entries['geometry'] = _BodyGeometry(self, body_name, self.tolerance)
+            self.builds += 1
+        return entries['geometry']
+
+    def _centers(self, body_name):
+        entries = self._bodies.setdefault(body_name, {})
+        if 'centers' not in entries:
+            entries['centers'] = _FaceCenters(self, body_name)
+        return entries['centers']
+
+    def _center_on_face(self, body_name, centers, faceid):
+        """
+        Return whether the center of a face lies on it, as the full index
+        finds if it has been built, or else as HFSS does, asked once for
+        each face.
+        """
+        if faceid not in centers.onface:
+            center = centers.center(faceid)
+            geometry = self._bodies[body_name].get('geometry')
+            faces = [face for face in getattr(geometry, 'faces', ())
+                     if face.faceid == faceid]
+            if faces:
+                interior, boundary = faces[0].classify(center[np.newaxis, :],
+                                                       self.tolerance)
+                onface = bool(interior[0])
+            else:
+                x, y, z = center.tolist()
+                try:
+                    picked = super(SpatialIndex, self).GetFaceByPosition(
+                        ["NAME:Parameters",
+                         "BodyName:=", body_name,
+                         "Xposition:=", str(x),
+                         "YPosition:=", str(y),
+                         "ZPosition:=", str(z)])
+                except COM_ERRORS:
+                    picked = None
+                onface = picked is not None and int(picked) == faceid
+            centers.onface[faceid] = onface
+        return centers.onface[faceid]
+
+    def _resolve(self, body_name, points, kind):
+        """
+        Return the ids picked locally, with -1 for unresolved points.
+        """
+        if kind == 'face':
+            centers = self._centers(body_name)
+            ids = centers.pick_faces(points, self.tolerance)
+            for faceid in np.unique(ids[ids >= 0]).tolist():
+                if not self._center_on_face(body_name, centers, faceid):
+                    ids[ids == faceid] = -1
+            missed = np.flatnonzero(ids < 0)
+            if len(missed):
+                geometry = self._geometry(body_name)
+                ids[missed] = geometry.pick_faces(points[missed], self.tolerance)
+        else:
+            ids = self._geometry(body_name).pick_edges(points, self.tolerance)
+
+        unresolved = int(np.sum(ids < 0))
+        self.fallbacks += unresolved
+        self.resolved += len(ids) - unresolved
+
+        return ids
+
+    def _pick(self, body_name, points, kind):
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        ids = self._resolve(body_name, points, kind)
+
+        if kind == 'face':
+            method = super(SpatialIndex, self).GetFaceByPosition
+            name = "NAME:Parameters"
+        else:
+            method = super(SpatialIndex, self).GetEdgeByPosition
+            name = "NAME:EdgeParameters"
+
+        result = ids.tolist()
+        for n in np.flatnonzero(ids < 0).tolist():
+            x, y, z = points[n].tolist()
+            result[n] = method([name,
+                                "BodyName:=", body_name,
+                                "Xposition:=", str(x),
+                                "YPosition:=", str(y),
+                                "ZPosition:=", str(z)])
+
+        return result
+
+    def _probe(self, positionparameters):
+        try:
+            return np.array([[float(get_array_value(positionparameters, key))
+                              for key in ("Xposition", "YPosition", "ZPosition")]])
+        except (TypeError, ValueError):
+            return None
+
+    def get_faces_by_position(self, body_name, points):
+        """
+        Get the faces of a given body that lie at the given positions.
+
+        Parameters
+        ----------
+        body_name : str
+            Name of the body whose faces will be returned
+        points : array_like, shape (N, 3)
+            Probe positions in model units.
+
+        Returns
+        -------
+        faceids : list of int
+            Id number of the face at each position.
+        """
+        return self._pick(body_name, points, 'face')
+
+    def get_edges_by_position(self, body_name, points):
+        """
+        Get the edges of a given body that lie at the given positions.
+
+        Parameters
+        ----------
+        body_name : str
+            Name of the body whose edges will be returned
+        points : array_like, shape (N, 3)
+            Probe positions in model units.
+
+        Returns
+        -------
+        edgeids : list of int
+            Id number of the edge at each position.
+        """
+        return self._pick(body_name, points, 'edge')
+
+    def GetFaceByPosition(self, positionparameters):
+        probe = self._probe(positionparameters)
+        if probe is None:
+            self.fallbacks += 1
+        else:
+            body_name = get_array_value(positionparameters, "BodyName")
+            faceid = self._resolve(body_name, probe, 'face')[0]
+            if faceid >= 0:
+                return int(faceid)
+
+        return super(SpatialIndex, self).GetFaceByPosition(positionparameters)
+
+    def GetEdgeByPosition(self, positionparameters):
+        probe = self._probe(positionparameters)
+        if probe is None:
+            self.fallbacks += 1
+        else:
+            body_name = get_array_value(positionparameters, "BodyName")
+            edgeid = self._resolve(body_name, probe, 'edge')[0]
+            if edgeid >= 0:
+                return int(edgeid)
+
+        return super(SpatialIndex, self).GetEdgeByPosition(positionparameters)
@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+"""
+Extraction of repeated subexpressions of modeler arguments into design
+variables.
+
+Example Usage
+-------------
+>>> import hycohanz as hfss
+>>> [oAnsoftApp, oDesktop] = hfss.setup_interface()
+>>> oProject = hfss.new_project(oDesktop)
+>>> oDesign = hfss.insert_design(oProject, "HFSSDesign1", "DrivenModal")
+>>> hfss.add_property(oDesign, "substrate_h", "0.8mm")
+>>> hfss.add_property(oDesign, "copper_t", "35um")
+>>> oEditor = hfss.SubexpressionHoister(hfss.set_active_editor(oDesign), oDesign)
+>>> h = "substrate_h + 2*copper_t"
+>>> for n in range(3):
+...     box = hfss.create_box(oEditor, n, 0, h, 1, 1, "copper_t")
+>>> oEditor.variables
+OrderedDict([('cse1', 'substrate_h + 2*copper_t')])
+>>> oEditor.report()['hoisted']
+1
+
+"""
+
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import collections
+
+from hycohanz.editorproxy import EditorProxy
+from hycohanz.expression import (_Leaf,
+                                 _Neg,
+                                 _Binary,
+                                 _render,
+                                 _substitute,
+                                 _text)
+from hycohanz.property import add_property
+
+class _Candidates(object):
+    """
+    The parse of an expression argument, with the rendered text of each of
+    its operations.
+    """
+    __slots__ = ('node', 'keys')
+
+    def __init__(self, node):
+        self.node = node
+        self.keys = {}
+        stack = [node]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, _Leaf):
+                continue
+            self.keys[id(item)] = _render(item)
+            if isinstance(item, _Neg):
+                stack.append(item.operand)
+            elif isinstance(item, _Binary):
+                stack.extend([item.left, item.right])
+            else:
+                stack.extend(item.args)
+
+class SubexpressionHoister(EditorProxy):
+    """
+    Wrap an HFSS editor and replace subexpressions repeated across the
+    arguments of editor calls with local design variables.
+
+    The string arguments of each editor call made through the hoister (and
+    hence create_box(), move(), and the other modeler functions) are parsed
+    as expressions, and their operations counted by rendered text.  When an
+    operation of at least MinLength characters has been seen MinCount
+    times, it is added to the design as a variable with add_property(), and
+    it and later occurrences are sent as the variable's name.  Larger
+    operations are preferred to the operations inside them, and variables
+    reference earlier variables where they can.
+
+    The calls are forwarded immediately, so the values they return are
+    unchanged, and the occurrences before the MinCount-th are sent as
+    written.  Arguments without a hoisted operation are sent unchanged.
+
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor to wrap.
+    oDesign : pywin32 COMObject
+        The design of the editor, to which the variables are added.  Names
+        already used by its variables are skipped.
+    MinCount : int
+        The number of occurrences of an operation before it is hoisted.
+    MinLength : int
+        The length of the shortest operation, as rendered, that is hoisted.
+    Prefix : str
+        The prefix of the names of the variables, which are numbered from 1.
+
+    Attributes
+    ----------
+    variables : OrderedDict
+        The hoisted variables, mapped to their values, in the order added.
+    """
+    def __init__(self, oEditor, oDesign, MinCount=2, MinLength=12, Prefix="cse"):
+        super(SubexpressionHoister, self).__init__(oEditor)
+        self.oDesign = oDesign
+        self.mincount = MinCount
+        self.minlength = MinLength
+        self.prefix = Prefix
+        self.variables = collections.OrderedDict()
+        self._taken = set(oDesign.GetVariables())
+        self._names = {}
+        self._counts = collections.Counter()
+        self._candidates = {}
+        self._rewritten = {}
+        self._ncalls = 0
+        self._before = 0
+        self._after = 0
+
+    def __getattr__(self, name):
+        method = super(SubexpressionHoister, self).__getattr__(name)
+
+        if not callable(method) or name.startswith('Get'):
+            return method
+
+        def hoist(*args):
+            self._ncalls += 1
+            return method(*self._rewrite(args))
+
+        return hoist
+
+    def _rewrite(self, args):
+        """
+        Return a copy of the arguments of an editor call with their hoisted
+        operations replaced.
+        """
+        result = []
+        for arg in args:
+            if isinstance(arg, list):
+                arg = self._rewrite(arg)
+            elif isinstance(arg, tuple):
+                arg = tuple(self._rewrite(arg))
+            elif isinstance(arg, str):
+                arg = self._rewrite_text(arg)
+            result.append(arg)
+        return result
+
+    def _rewrite_text(self, text):
+        try:
+            candidates = self._candidates[text]
+        except KeyError:
+            candidates = None
+            if not (text.endswith(':=') or text.startswith('NAME:')):
+                node = _text(text)
+                if not isinstance(node, _Leaf):
+                    candidates = _Candidates(node)
+            self._candidates[text] = candidates
+        if candidates is None:
+            return text
+
+        replacements = self._visit(candidates)
+        self._before += len(text)
+        if not replacements:
+            self._after += len(text)
+            return text
+
+        # The rewritten text only changes when a variable is hoisted.
+        generation = len(self.variables)
+        cached = self._rewritten.get(text)
+        if cached is None or cached[0] != generation:
+            cached = self._rewritten[text] = (
+                generation, _render(_substitute(candidates.node, replacements)))
+        self._after += len(cached[1])
+        return cached[1]
+
+    def _visit(self, candidates):
+        """
+        Count the operations of an argument, hoisting those seen often
+        enough, and return the replacements of the hoisted ones by id.
+        """
+        replacements = {}
+        keys = candidates.keys
+        stack = [candidates.node]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, _Leaf):
+                continue
+
+            key = keys[id(item)]
+            name = self._names.get(key)
+            if name is None and len(key) >= self.minlength:
+                self._counts[key] += 1
+                if self._counts[key] >= self.mincount:
+                    name = self._hoist(key, item, keys)
+            if name is not None:
+                replacements[id(item)] = _Leaf(name)
+                continue
+
+            if isinstance(item, _Neg):
+                stack.append(item.operand)
+            elif isinstance(item, _Binary):
+                stack.extend([item.right, item.left])
+            else:
+                stack.extend(reversed(item.args))
+        return replacements
+
+    def _hoist(self, key, node, keys):
+        """
+        Add a variable for an operation, referencing the variables already
+        hoisted from within it.
+        """
+        replacements = {}
+        stack = [node]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, _Leaf):
+                continue
+            name = self._names.get(keys[id(item)])
+            if name is not None and item is not node:
+                replacements[id(item)] = _Leaf(name)
+            elif isinstance(item, _Neg):
+                stack.append(item.operand)
+            elif isinstance(item, _Binary):
+                stack.extend([item.left, item.right])
+            else:
+                stack.extend(item.args)
+        value = _render(_substitute(node, replacements)) if replacements else key
+
+        number = len(self.variables) + 1
+        name = '{0}{1}'.format(self.prefix, number)
+        while name in self._taken:
+            number += 1
+            name = '{0}{1}'.format(self.prefix, number)
+
+        add_property(self.oDesign, name, value)
+        self._taken.add(name)
+        self._names[key] = name
+        self.variables[name] = value
+        self._after += len(name) + len(value)
+        return name
+
+    def report(self):
+        """
+        Return the effect of hoisting on the expression arguments sent.
+
+        Returns
+        -------
+        report : dict
+            'calls' is the number of editor calls made through the hoister,
+            'hoisted' the number of variables added, 'before' the total
+            length of the expression arguments as written, 'after' their
+            length as sent plus the lengths of the variables' names and
+            values, and 'reduction' the fraction saved.
+        """
+        return {'calls': self._ncalls,
+                'hoisted': len(self.variables),
+                'before': self._before,
+                'after': self._after,
+                'reduction': 1 - self._after/self._before if self._before else 0.0}
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+A cache of face, edge, and vertex lookups for the HFSS 3D Modeler editor.
+
+Example Usage
+-------------
+>>> import hycohanz as hfss
+>>> [oAnsoftApp, oDesktop] = hfss.setup_interface()
+>>> oProject = hfss.new_project(oDesktop)
+>>> oDesign = hfss.insert_design(oProject, "HFSSDesign1", "DrivenModal")
+>>> oEditor = hfss.TopologyCache(hfss.set_active_editor(oDesign))
+>>> box = hfss.create_box(oEditor, 0, 0, 0, 1, 1, 1)
+>>> face1 = hfss.get_face_by_position(oEditor, box, 0.5, 0.5, 0)
+>>> face2 = hfss.get_face_by_position(oEditor, box, 0.5, 0.5, 0)
+>>> oEditor.hits, oEditor.misses
+(1, 1)
+
+"""
+
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+from hycohanz.editorproxy import (EditorProxy,
+                                  get_array_value,
+                                  get_partlist)
+
+# Editor methods that may change the topology of the selected parts.
+TOPOLOGY_METHODS = frozenset(["Move",
+                              "Rotate",
+                              "Mirror",
+                              "Scale",
+                              "Subtract",
+                              "Unite",
+                              "Intersect",
+                              "Imprint",
+                              "Split",
+                              "Fillet",
+                              "Chamfer",
+                              "UncoverFaces",
+                              "CoverLines",
+                              "CoverSurfaces",
+                              "Connect",
+                              "SeparateBody",
+                              "SweepAlongVector",
+                              "SweepAroundAxis",
+                              "SweepAlongPath",
+                              "ThickenSheet",
+                              "DuplicateAlongLine",
+                              "DuplicateAroundAxis",
+                              "DuplicateMirror",
+                              "Delete",
+                              "Cut"])
+
+# Editor methods whose effect can't be attributed to particular parts.
+RESET_METHODS = frozenset(["Import",
+                           "Undo",
+                           "Redo"])
+
+# Keys under which HFSS selection arrays list the affected parts.
+SELECTION_KEYS = ("Selections", "Blank Parts", "Tool Parts")
+
+def _affected_parts(args):
+    """
+    Return the part names listed in any selection array among args.
+    """
+    partlist = []
+    for arg in args:
+        if isinstance(arg, (list, tuple)) and arg and arg[0] == "NAME:Selections":
+            for key in SELECTION_KEYS:
+                partlist += get_partlist(arg, key)
+    return partlist
+
+class TopologyCache(EditorProxy):
+    """
+    Wrap an HFSS editor and memoize per-body topology lookups.
+
+    GetFaceIDs, GetEdgeIDsFromObject, GetVertexIDsFromObject,
+    GetFaceByPosition, and GetEdgeByPosition results (and hence
+    get_face_ids(), get_face_by_position(), and get_edge_by_position()) are
+    cached per body.  A body's entries are discarded whenever an operation
+    that can change its topology, such as move(), rotate(), mirror(),
+    scale(), subtract(), unite(), imprint(), split(), fillet(),
+    uncover_faces(), connect(), or delete(), is applied to it through the
+    cache.  import_model() and undo/redo discard everything.
+
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor to wrap.
+
+    Attributes
+    ----------
+    hits : int
+        The number of lookups answered from the cache.
+    misses : int
+        The number of lookups sent to HFSS.
+    invalidations : int
+        The number of times cached entries of a body were discarded.
+    """
+    def __init__(self, oEditor):
+        super(TopologyCache, self).__init__(oEditor)
+        self._bodies = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __getattr__(self, name):
+        method = super(TopologyCache, self).__getattr__(name)
+
+        if name in TOPOLOGY_METHODS:
+            def change(*args):
+                try:
+                    return method(*args)
+                finally:
+                    self.invalidate(_affected_parts(args))
+            return change
+        elif name in RESET_METHODS:
+            def reset(*args):
+                try:
+                    return method(*args)
+                finally:
+                    self.clear()
+            return reset
+        else:
+            return method
+
+    def _lookup(self, body, key, method, *args):
+        entries = self._bodies.setdefault(body, {})
+        try:
+            result = entries[key]
+        except KeyError:
+            result = entries[key] = method(*args)
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        return result
+
+    def invalidate(self, partlist):
+        """
+        Discard the cached lookups of the given parts.
+        """
+        for part in partlist:
+            if self._bodies.pop(part, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        """
+        Discard all cached lookups.
+        """
+        self.invalidations += len(self._bodies)
+        self._bodies.clear()
+
+    def stats(self):
+        """
+        Return the cache statistics as a dict.
+        """
+        lookups = self.hits + self.misses
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'bodies': len(self._bodies)}
+
+    # Cached lookups
+
+    def GetFaceIDs(self, body_name):
+        return self._lookup(body_name, ('faces',),
+                            self.oEditor.GetFaceIDs, body_name)
+
+    def GetEdgeIDsFromObject(self, body_name):
+        return self._lookup(body_name, ('edges',),
+                            self.oEditor.GetEdgeIDsFromObject, body_name)
+
+    def GetVertexIDsFromObject(self, body_name):
+        return self._lookup(body_name, ('vertices',),
+                            self.oEditor.GetVertexIDsFromObject, body_name)
+
+    def _position_key(self, kind, positionparameters):
+        return (kind,
+                get_array_value(positionparameters, "Xposition"),
+                get_array_value(positionparameters, "YPosition"),
+                get_array_value(positionparameters, "ZPosition"))
+
+    def GetFaceByPosition(self, positionparameters):
+        body = get_array_value(positionparameters, "BodyName")
+        return self._lookup(body, self._position_key('face', positionparameters),
+                            self.oEditor.GetFaceByPosition, positionparameters)
+
+    def GetEdgeByPosition(self, positionparameters):
+        body = get_array_value(positionparameters, "BodyName")
+        return self._lookup(body, self._position_key('edge', positionparameters),
+                            self.oEditor.GetEdgeByPosition, positionparameters)
+
+    # Renaming keeps the topology, so move the cached entries along.
+
+    def RenamePart(self, renameparamsarray):
+        result = self.oEditor.RenamePart(renameparamsarray)
+
+        oldname = get_array_value(renameparamsarray, "Old Name")
+        newname = get_array_value(renameparamsarray, "New Name")
+        entries = self._bodies.pop(oldname, None)
+        self._bodies.pop(newname, None)
+        if entries is not None:
+            self._bodies[newname] = entries
+
+        return result
@@ -0,0 +1,451 @@
+# -*- coding: utf-8 -*-
+"""
+Record and replay of HFSS COM traffic.
+
+A TraceRecorder wraps the objects returned by setup_interface(), and every
+object obtained through them, writing each COM call, with its arguments,
+return value, and wall time, to a trace file as it is made.  A
+TraceReplayer reads the trace back, standing in for HFSS: it returns the
+recorded values, checks that the calls made are the recorded ones, and
+reports the time spent in Python between calls.  A trace recorded against
+HFSS on Windows can so be replayed anywhere, to measure the overhead of a
+new version of hycohanz on a realistic workload, and to check that it
+still makes the same calls.
+
+Trace format
+------------
+A trace is a text file, gzip-compressed if its name ends in ".gz", with one
+JSON value per line.  The first line is a header object.  Each following
+line is one call::
+
+    [handle, method, args, result, elapsed]
+
+handle identifies the object called: 0 is oAnsoftApp, 1 is oDesktop, and
+each COM object returned by a call is given the next handle and recorded
+as {"@": handle}.  A call that raised is recorded with the result
+{"!": message}.  Lines are written as the calls are made, so traces of
+millions of calls take constant memory to record and replay.
+
+Example Usage
+-------------
+>>> import hycohanz as hfss
+>>> with hfss.TraceRecorder('run.trace.gz') as recorder:
+...     [oAnsoftApp, oDesktop] = hfss.setup_interface(recorder=recorder)
+...     oProject = hfss.new_project(oDesktop)
+...     oDesign = hfss.insert_design(oProject, "HFSSDesign1", "DrivenModal")
+...     oEditor = hfss.set_active_editor(oDesign, "3D Modeler")
+...     box = hfss.create_box(oEditor, 0, 0, 0, 1, 1, 1)
+
+Later, on any machine:
+
+>>> with hfss.TraceReplayer('run.trace.gz') as replayer:
+...     [oAnsoftApp, oDesktop] = hfss.setup_interface(fake=replayer)
+...     oProject = hfss.new_project(oDesktop)
+...     oDesign = hfss.insert_design(oProject, "HFSSDesign1", "DrivenModal")
+...     oEditor = hfss.set_active_editor(oDesign, "3D Modeler")
+...     box = hfss.create_box(oEditor, 0, 0, 0, 1, 1, 1)
+>>> replayer.print_report()  # doctest: +ELLIPSIS
+4 calls replayed in ...
+
+"""
+
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import array
+import collections
+import gzip
+import io
+import json
+import numbers
+import timeit
+
+import numpy as np
+
+from hycohanz.instrument import (VALUE_TYPES,
+                                 _caller,
+                                 _percentiles)
+
+FORMAT = 'hycohanz-trace'
+VERSION = 1
+
+# Handles of the objects returned by setup_interface().
+APP = 0
+DESKTOP = 1
+
+# Modules whose frames wrap the COM objects, and so don't count as callers.
+WRAPPER_MODULES = ('hycohanz.instrument', __name__)
+
+class TraceMismatch(Exception):
+    """
+    A call made during replay that differs from the recorded call.
+    """
+    pass
+
+class TraceComError(Exception):
+    """
+    An error reported by HFSS during recording, raised again on replay.
+    """
+    pass
+
+def _open(filename, mode):
+    if filename.endswith('.gz'):
+        return io.TextIOWrapper(gzip.GzipFile(filename, mode + 'b'), encoding='utf-8')
+    else:
+        return io.open(filename, mode, encoding='utf-8')
+
+def _default(value):
+    """
+    Encode the values json can't: object handles, and numpy scalars.
+    """
+    if isinstance(value, (RecordedObject, ReplayObject)):
+        return {'@': value._handle}
+    elif isinstance(value, np.bool_):
+        return bool(value)
+    elif isinstance(value, numbers.Integral):
+        return int(value)
+    elif isinstance(value, numbers.Real):
+        return float(value)
+    elif isinstance(value, np.ndarray):
+        return value.tolist()
+    else:
+        return '{0}'.format(value)
+
+_encoder = json.JSONEncoder(separators=(',', ':'), default=_default)
+
+class RecordedObject(object):
+    """
+    Stand in for an HFSS COM object, recording the methods called on it.
+    """
+    def __init__(self, recorder, obj, handle):
+        self._recorder = recorder
+        self._obj = obj
+        self._handle = handle
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        attr = getattr(self._obj, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args):
+            return self._recorder.call(self, attr, name, args)
+
+        return call
+
+    def __repr__(self):
+        return '<Recorded {0} {1!r}>'.format(self._handle, self._obj)
+
+class TraceRecorder(object):
+    """
+    Record the COM calls made through the objects it wraps to a trace file.
+
+    Pass the recorder to setup_interface(), or wrap the objects it returns
+    with wrap(), and close() the recorder when done.
+
+    Parameters
+    ----------
+    filename : str
+        The trace file, gzip-compressed if the name ends in ".gz".
+
+    Attributes
+    ----------
+    calls : int
+        The number of calls recorded.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self.calls = 0
+        self._handles = 0
+        self._file = _open(filename, 'w')
+        self._write({'format': FORMAT, 'version': VERSION})
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, typ, val, traceback):
+        self.close()
+
+    def _write(self, value):
+        self._file.write(_encoder.encode(value))
+        self._file.write('\n')
+
+    def wrap(self, obj):
+        """
+        Wrap a COM object, giving it the next handle.  The first two objects
+        wrapped must be oAnsoftApp and oDesktop, in that order.
+        """
+        if isinstance(obj, RecordedObject):
+            return obj
+        handle = self._handles
+        self._handles += 1
+        return RecordedObject(self, obj, handle)
+
+    def _wrap_result(self, result):
+        if isinstance(result, VALUE_TYPES) or isinstance(result, RecordedObject):
+            return result
+        elif isinstance(result, (list, tuple)):
+            if any(not isinstance(item, VALUE_TYPES) for item in result):
+                return type(result)(self._wrap_result(item) for item in result)
+            return result
+        else:
+            return self.wrap(result)
+
+    def call(self, obj, method, name, args):
+        """
+        Call a method of a wrapped object, recording it.
+        """
+        # Pass the COM objects themselves for any recorded objects passed as
+        # arguments, which are written to the trace as their handles.
+        comargs = [arg._obj if isinstance(arg, RecordedObject) else arg
+                   for arg in args]
+
+        t0 = timeit.default_timer()
+        try:
+            result = method(*comargs)
+        except Exception as e:
+            elapsed = timeit.default_timer() - t0
+            self._write([obj._handle, name, args, {'!': '{0}'.format(e)},
+                        round(elapsed, 7)])
+            self.calls += 1
+            raise
+        elapsed = timeit.default_timer() - t0
+
+        result = self._wrap_result(result)
+        self._write([obj._handle, name, args, result, round(elapsed, 7)])
+        self.calls += 1
+        return result
+
+    def close(self):
+        """
+        Close the trace file.
+        """
+        self._file.close()
+
+class ReplayObject(object):
+    """
+    Stand in for a recorded HFSS COM object, replaying the calls made on it.
+    """
+    def __init__(self, replayer, handle):
+        self._replayer = replayer
+        self._handle = handle
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        def call(*args):
+            return self._replayer.call(self, name, args)
+
+        return call
+
+    def __repr__(self):
+        return '<Replay {0}>'.format(self._handle)
+
+class TraceReplayer(object):
+    """
+    Replay a trace file, standing in for HFSS.
+
+    Each call made through the objects returned by setup_interface() is
+    matched against the next recorded call, and returns the recorded value
+    (or raises TraceComError if the recorded call failed).  The trace is
+    read as it is replayed.
+
+    Parameters
+    ----------
+    filename : str
+        The trace file, gzip-compressed if the name ends in ".gz".
+    check : bool
+        If True, raise TraceMismatch if a call differs from the recorded one
+        in object, method, or arguments, or if close() is called before the
+        whole trace is replayed.  If False, only the method names must
+        match, so that traces can be replayed against code that passes
+        different arguments.
+
+    Attributes
+    ----------
+    calls : int
+        The number of calls replayed.
+    recorded : float
+        The total wall time of the replayed calls when recorded, in
+        seconds.
+    """
+    def __init__(self, filename, check=True):
+        self.filename = filename
+        self.check = check
+        self.calls = 0
+        self.recorded = 0.0
+        self._callers = collections.OrderedDict()
+        self._file = _open(filename, 'r')
+
+        header = json.loads(self._file.readline() or 'null')
+        if not isinstance(header, dict) or header.get('format') != FORMAT:
+            raise ValueError(filename + ' is not a hycohanz trace')
+        if header.get('version', 0) > VERSION:
+            raise ValueError('{0} is a version {1} trace; this version of hycohanz '
+                             'reads up to version {2}'.format(filename,
+                                                              header['version'],
+                                                              VERSION))
+
+        self._start = None
+        self._last = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, typ, val, traceback):
+        if typ is None:
+            self.close()
+        else:
+            self._file.close()
+
+    def setup_interface(self):
+        """
+        Return stand-ins for the oAnsoftApp and oDesktop COM objects, in the
+        manner of hycohanz.setup_interface().
+        """
+        self._start = self._last = timeit.default_timer()
+        return [ReplayObject(self, APP), ReplayObject(self, DESKTOP)]
+
+    def _decode(self, value):
+        if isinstance(value, list):
+            return tuple(self._decode(item) for item in value)
+        elif isinstance(value, dict) and '@' in value:
+            return ReplayObject(self, value['@'])
+        else:
+            return value
+
+    def _next(self):
+        line = self._file.readline()
+        if not line:
+            return None
+        return json.loads(line)
+
+    def call(self, obj, method, args):
+        """
+        Replay a method call on obj, returning the recorded result.
+        """
+        now = timeit.default_timer()
+        caller = _caller(WRAPPER_MODULES)
+
+        record = self._next()
+        if record is None:
+            raise TraceMismatch('Call {0}: {1} called after the end of the trace'
+                                .format(self.calls + 1, method))
+
+        handle, name, recordedargs, result, elapsed = record
+        if name != method:
+            raise TraceMismatch('Call {0}: expected {1}, got {2}'
+                                .format(self.calls + 1, name, method))
+        if self.check:
+            if handle != obj._handle:
+                raise TraceMismatch('Call {0}: expected {1} on object {2}, got object {3}'
+                                    .format(self.calls + 1, name, handle, obj._handle))
+            actualargs = json.loads(_encoder.encode(args))
+            if actualargs != recordedargs:
+                raise TraceMismatch('Call {0}: {1} arguments differ\n'
+                                    '  recorded: {2}\n'
+                                    '  replayed: {3}'.format(self.calls + 1, name,
+                                                             json.dumps(recordedargs),
+                                                             json.dumps(actualargs)))
+
+        try:
+            overheads, recorded = self._callers[caller]
+        except KeyError:
+            overheads, recorded = self._callers[caller] = (array.array('d'), array.array('d'))
+        overheads.append(now - self._last)
+        recorded.append(elapsed)
+        self.calls += 1
+        self.recorded += elapsed
+
+        try:
+            if isinstance(result, dict) and '!' in result:
+                raise TraceComError(result['!'])
+            return self._decode(result)
+        finally:
+            self._last = timeit.default_timer()
+
+    def close(self):
+        """
+        Close the trace file, checking that the whole trace was replayed.
+        """
+        try:
+            if self.check:
+                record = self._next()
+                if record is not None:
+                    remaining = 1 + sum(1 for line in self._file if line.strip())
+                    raise TraceMismatch('Replay ended after {0} calls with {1} recorded '
+                                        'calls remaining, starting with {2}'
+                                        .format(self.calls, remaining, record[1]))
+        finally:
+            self._file.close()
+
+    def summary(self):
+        """
+        Summarize the replay.
+
+        Returns
+        -------
+        summary : dict
+            'calls' gives the number of calls replayed.  'replay' is the
+            wall time of the replay, and 'overhead' the part of it spent in
+            Python before each call, in seconds.  'recorded' is the total
+            time of the calls when recorded, so that overhead + recorded
+            estimates the run time against HFSS.  'functions' lists, per
+            calling hycohanz function, the number of calls, the total
+            overhead, its p50/p95/p99 per call, and the recorded time, in
+            order of decreasing overhead.
+        """
+        functions = []
+        for caller, (overheads, recorded) in self._callers.items():
+            overheads = np.frombuffer(overheads, dtype=float)
+            p50, p95, p99 = _percentiles(overheads)
+            functions.append(collections.OrderedDict([
+                ('name', caller),
+                ('calls', len(overheads)),
+                ('overhead', float(overheads.sum())),
+                ('p50', float(p50)),
+                ('p95', float(p95)),
+                ('p99', float(p99)),
+                ('recorded', float(np.frombuffer(recorded, dtype=float).sum()))]))
+        functions.sort(key=lambda entry: entry['overhead'], reverse=True)
+
+        if self._start is None:
+            replay = 0.0
+        else:
+            replay = self._last - self._start
+
+        return collections.OrderedDict([
+            ('calls', self.calls),
+            ('replay', replay),
+            ('overhead', sum(entry['overhead'] for entry in functions)),
+            ('recorded', self.recorded),
+            ('functions', functions)])
+
+    def report(self):
+        """
+        Return the summary as a text table.
+        """
+        summary = self.summary()
+
+        lines = ['{calls} calls replayed in {replay:.3f} s: {overhead:.3f} s Python '
+                 'overhead, {recorded:.3f} s recorded COM time'.format(**summary),
+                 '',
+                 '{0:<40} {1:>7} {2:>11} {3:>9} {4:>9} {5:>9} {6:>11}'.format(
+                     'hycohanz function', 'calls', 'overhead s', 'p50 us',
+                     'p95 us', 'p99 us', 'recorded s')]
+        for entry in summary['functions']:
+            lines.append('{name:<40} {calls:>7} {overhead:>11.3f} {0:>9.1f} {1:>9.1f} '
+                         '{2:>9.1f} {recorded:>11.3f}'.format(1e6*entry['p50'],
+                                                             1e6*entry['p95'],
+                                                             1e6*entry['p99'],
+                                                             **entry))
+
+        return '\n'.join(lines)
+
+    def print_report(self):
+        """
+        Print the summary as a text table.
+        """
+        print(self.report())
@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+"""
+Deferred modeler operations for the HFSS 3D Modeler editor.
+
+Example Usage
+-------------
+>>> import hycohanz as hfss
+>>> [oAnsoftApp, oDesktop] = hfss.setup_interface()
+>>> oProject = hfss.new_project(oDesktop)
+>>> oDesign = hfss.insert_design(oProject, "HFSSDesign1", "DrivenModal")
+>>> oEditor = hfss.set_active_editor(oDesign, "3D Modeler")
+>>> box = hfss.create_box(oEditor, 0, 0, 0, 1, 1, 1)
+>>> with hfss.modeler_transaction(oEditor) as tx:
+...     hfss.move(tx, [box], 1, 0, 0)
+...     hfss.move(tx, [box], 0, 1, 0)
+...     hfss.assign_material(tx, [box], "copper")
+...     len(tx.plan())
+2
+
+"""
+
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import collections
+
+from hycohanz.editorproxy import (EditorProxy,
+                                  get_array_value,
+                                  get_partlist)
+
+# Editor methods that are queued by a transaction.  Any other editor call
+# flushes the queue first.
+DEFERRED_METHODS = frozenset(["Move",
+                              "Rotate",
+                              "Scale",
+                              "AssignMaterial",
+                              "Delete"])
+
+# The parameters of each transform that are combined when it is folded.
+TRANSFORM_KEYS = {"Move": ("TranslateVectorX",
+                           "TranslateVectorY",
+                           "TranslateVectorZ"),
+                  "Rotate": ("RotateAngle",),
+                  "Scale": ("ScaleX",
+                            "ScaleY",
+                            "ScaleZ")}
+
+# The parameter values of each transform that leave the parts unchanged.
+IDENTITY = {"Move": 0.0,
+            "Rotate": 0.0,
+            "Scale": 1.0}
+
+def _combine(method, a, b):
+    """
+    Combine two transform parameter values, numerically if possible and
+    otherwise as an HFSS expression.
+    """
+    try:
+        a, b = float(a), float(b)
+    except ValueError:
+        if method == "Scale":
+            return '(' + a + ') * (' + b + ')'
+        else:
+            return '(' + a + ') + (' + b + ')'
+    else:
+        if method == "Scale":
+            return repr(a*b)
+        else:
+            return repr(a + b)
+
+def _is_identity(method, parametersarray):
+    for key in TRANSFORM_KEYS[method]:
+        try:
+            if float(get_array_value(parametersarray, key)) != IDENTITY[method]:
+                return False
+        except ValueError:
+            return False
+    return True
+
+def _with_value(array, key, value):
+    array = list(array)
+    array[array.index(key + ":=") + 1] = value
+    return array
+
+def _with_partlist(selectionsarray, partlist):
+    return _with_value(selectionsarray, "Selections", ','.join(partlist))
+
+class _Transform(object):
+    """
+    A queued Move, Rotate, or Scale.
+    """
+    def __init__(self, method, partlist, selectionsarray, parametersarray):
+        self.method = method
+        self.partlist = partlist
+        self.partset = frozenset(partlist)
+        self.selectionsarray = selectionsarray
+        self.parametersarray = parametersarray
+
+    def fold(self, method, partlist, parametersarray):
+        """
+        Fold a later transform into this one if possible.
+        """
+        if method != self.method or frozenset(partlist) != self.partset:
+            return False
+
+        if method == "Rotate" and (get_array_value(parametersarray, "RotateAxis") !=
+                                   get_array_value(self.parametersarray, "RotateAxis")):
+            return False
+
+        for key in TRANSFORM_KEYS[method]:
+            value = _combine(method,
+                             get_array_value(self.parametersarray, key),
+                             get_array_value(parametersarray, key))
+            self.parametersarray = _with_value(self.parametersarray, key, value)
+
+        return True
+
+class ModelerTransaction(EditorProxy):
+    """
+    Wrap an HFSS editor and queue modeler operations until the transaction
+    is flushed.
+
+    Move, Rotate, Scale, AssignMaterial, and Delete calls (and hence
+    move(), rotate(), scale(), assign_material(), and delete()) made
+    through the transaction are queued.  Any other editor call, such as a
+    create or a query, flushes the queue first, so that it sees the
+    modeler in the state the caller expects.  When flushed, the queue is
+    optimized:
+
+    * a transform of a selection is folded into the previous operation on
+      those parts if that is a transform of the same kind on the same
+      selection, and transforms that fold to the identity are dropped;
+    * operations on parts deleted later in the queue are dropped, and all
+      deletions are sent in a single Delete;
+    * material assignments are grouped into one AssignMaterial per
+      material, the last assignment to each part winning.
+
+    Transforms are sent in their original order, then material
+    assignments, then the deletion.
+
+    Used as a context manager, the transaction is flushed on exit, or
+    discarded if the block raised an exception.
+
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor to wrap.
+
+    Attributes
+    ----------
+    ops : list of (str, tuple)
+        The queued editor calls, as method name and arguments.
+    queued : int
+        The number of editor calls queued over the life of the transaction.
+    sent : int
+        The number of queued editor calls actually sent to HFSS.
+    """
+    def __init__(self, oEditor):
+        super(ModelerTransaction, self).__init__(oEditor)
+        self.ops = []
+        self.queued = 0
+        self.sent = 0
+
+    def __getattr__(self, name):
+        method = super(ModelerTransaction, self).__getattr__(name)
+
+        if name in DEFERRED_METHODS:
+            def defer(*args):
+                self.ops.append((name, args))
+                self.queued += 1
+            return defer
+        elif callable(method):
+            def barrier(*args):
+                self.flush()
+                return method(*args)
+            return barrier
+        else:
+            return method
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, typ, val, traceback):
+        if typ is None:
+            self.flush()
+        else:
+            self.discard()
+
+    def plan(self):
+        """
+        Return the optimized editor calls for the queued operations.
+
+        Returns
+        -------
+        ops : list of (str, tuple)
+            The editor calls that flush() would send, as method name and
+            arguments.
+        """
+        transforms = []
+        latest = {}
+        materials = collections.OrderedDict()
+        deleted = collections.OrderedDict()
+        deletearray = None
+
+        for method, args in self.ops:
+            partlist = get_partlist(args[0])
+
+            if method == "Delete":
+                deletearray = deletearray or args[0]
+                for part in partlist:
+                    deleted[part] = None
+            elif method == "AssignMaterial":
+                for part in partlist:
+                    materials.pop(part, None)
+                    materials[part] = tuple(args[1])
+            else:
+                previous = max([latest.get(part, -1) for part in partlist] + [-1])
+                if previous < 0 or not transforms[previous].fold(method, partlist, args[1]):
+                    transforms.append(_Transform(method, partlist, args[0], args[1]))
+                    for part in partlist:
+                        latest[part] = len(transforms) - 1
+
+        plan = []
+        for transform in transforms:
+            partlist = [part for part in transform.partlist if part not in deleted]
+            if partlist and not _is_identity(transform.method, transform.parametersarray):
+                plan.append((transform.method,
+                             (_with_partlist(transform.selectionsarray, partlist),
+                              transform.parametersarray)))
+
+        groups = collections.OrderedDict()
+        for part, attributesarray in materials.items():
+            if part not in deleted:
+                groups.setdefault(attributesarray, []).append(part)
+
+        for attributesarray, partlist in groups.items():
+            plan.append(("AssignMaterial",
+                         (["NAME:Selections", "Selections:=", ','.join(partlist)],
+                          list(attributesarray))))
+
+        if deleted:
+            plan.append(("Delete", (_with_partlist(deletearray, list(deleted)),)))
+
+        return plan
+
+    def flush(self):
+        """
+        Send the optimized queue to HFSS and empty it.
+        """
+        if not self.ops:
+            return
+
+        plan = self.plan()
+        self.ops = []
+        for method, args in plan:
+            getattr(self.oEditor, method)(*args)
+        self.sent += len(plan)
+
+    def discard(self):
+        """
+        Empty the queue without sending anything to HFSS.
+        """
+        self.ops = []
+
+def modeler_transaction(oEditor):
+    """
+    Return a ModelerTransaction wrapping the given editor, for use in a
+    with-statement.
+
+    Parameters
+    ----------
+    oEditor : pywin32 COMObject
+        The HFSS editor in which the operations will be performed.
+
+    Returns
+    -------
+    tx : ModelerTransaction
+        The transaction, which is passed to hycohanz functions in place of
+        oEditor.
+    """
+    return ModelerTransaction(oEditor)
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+A client-side cache of variable values that sends only the changes to HFSS.
+
+Example Usage
+-------------
+>>> import hycohanz as hfss
+>>> [oAnsoftApp, oDesktop] = hfss.setup_interface()
+>>> oProject = hfss.new_project(oDesktop)
+>>> oDesign = hfss.insert_design(oProject, "HFSSDesign1", "DrivenModal")
+>>> hfss.add_properties(oDesign, [("w", "1mm"), ("l", "2mm")])
+OrderedDict()
+>>> store = hfss.VariableStore(oProject)
+>>> for w in ["1mm", "1mm", "1.5mm"]:
+...     store.update({"w": w, "l": "2mm"})
+>>> store.sent, store.skipped, store.calls
+(3, 3, 2)
+
+"""
+
+from __future__ import division, print_function, unicode_literals, absolute_import
+
+import collections
+
+from hycohanz.expression import Expression
+from hycohanz.snapshot import invalidate_snapshots
+
+class VariableStore(object):
+    """
+    Cache the values last sent to HFSS for design and project variables,
+    and send changed values in batches.
+
+    Values set with set() or update() are compared with the value last
+    sent for the variable, and unchanged values are skipped.  The changed
+    values are sent by flush(), in one ChangeProperty call for the design
+    variables and one for the project variables (names beginning with
+    '$'), rather than with a SetVariableValue call per variable.  update()
+    flushes after setting, and used as a context manager, the store is
+    flushed on exit.
+
+    The store assumes it is the only writer of the variables.  Call
+    invalidate() if they are changed by other means, so that the next
+    values set are sent whatever they are.
+
+    Parameters
+    ----------
+    oProject : pywin32 COMObject
+        The HFSS project.
+    oDesign : pywin32 COMObject, optional
+        The design of the local variables.  The active design of the project
+        is looked up once if not given.
+
+    Attributes
+    ----------
+    design : pywin32 COMObject
+        The design of the local variables.
+    pending : OrderedDict
+        The changed values not yet sent.
+    sent : int
+        The number of values sent to HFSS.
+    skipped : int
+        The number of values set that were unchanged, and not sent.
+    calls : int
+        The number of ChangeProperty calls made.
+    """
+    def __init__(self, oProject, oDesign=None):
+        self.project = oProject
+        self.design = oDesign if oDesign is not None else oProject.GetActiveDesign()
+        self.pending = collections.OrderedDict()
+        self.sent = 0
+        self.skipped = 0
+        self.calls = 0
+        self._values = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, typ, val, traceback):
+        if typ is None:
+            self.flush()
+
+    def get(self, name, default=None):
+        """
+        Return the value to be sent or last sent for a variable, as an HFSS
+        expression string.
+        """
+        try:
+            return self.pending[name]
+        except KeyError:
+            return self._values.get(name, default)
+
+    def set(self, name, value):
+        """
+        Set the value of a variable, to be sent on the next flush() if it
+        changed.
+
+        Parameters
+        ----------
+        name : str
+            The name of the variable, beginning with '$' for a project
+            variable.
+        value : Hyphasis Expression object
+            The new value of the variable.
+        """
+        value = Expression(value).expr
+        if self._values.get(name) == value:
+            self.pending.pop(name, None)
+            self.skipped += 1
+        else:
+            self.pending[name] = value
+
+    def update(self, mapping):
+        """
+        Set the values of variables, and send those that changed.
+
+        Parameters
+        ----------
+        mapping : dict or list of (str, value)
+            The names of the variables mapped to their new values.
+        """
+        if hasattr(mapping, 'items'):
+            mapping = mapping.items()
+        for name, value in mapping:
+            self.set(name, value)
+        self.flush()
+
+    def flush(self):
+        """
+        Send the changed values to HFSS.
+
+        If a ChangeProperty call fails, the values it carried are forgotten,
+        so that they are sent again when next set, the values not yet sent
+        remain pending, and the error is raised.
+        """
+        if not self.pending:
+            return
+
+        pending = self.pending
+        self.pending = collections.OrderedDict()
+
+        local = [(name, value) for name, value in pending.items() if not name.startswith('$')]
+        project = [(name, value) for name, value in pending.items() if name.startswith('$')]
+        for server, tab, propservers, items in [
+                (self.design, "NAME:LocalVariableTab", "LocalVariables", local),
+                (self.project, "NAME:ProjectVariableTab", "ProjectVariables", project)]:
+            if not items:
+                continue
+
+            changedpropsarray = ["NAME:ChangedProps"]
+            for name, value in items:
+                changedpropsarray.append(["NAME:" + name, "Value:=", value])
+
+            self.calls += 1
+            try:
+                server.ChangeProperty(["NAME:AllTabs",
+                                       [tab,
+                                        ["NAME:PropServers", propservers],
+                                        changedpropsarray]])
+            except Exception:
+                invalidate_snapshots(server)
+                for name, value in items:
+                    self._values.pop(name, None)
+                    pending.pop(name)
+                # Values for the other server, not yet sent, stay pending.
+                pending.update(self.pending)
+                self.pending = pending
+                raise
+
+            for name, value in items:
+                self._values[name] = value
+                del pending[name]
+            self.sent += len(items)
+            invalidate_snapshots(server, items)
+
+    def invalidate(self, name=None):
+        """
+        Forget the value last sent for a variable, or for all variables if
+        name is None, so that it is sent when next set.
+        """
+        if name is None:
+            self._values.clear()
+        else:
+            self._values.pop(name, None)